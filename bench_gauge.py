@@ -0,0 +1,576 @@
+# Performance benchmarks for the gauge server
+#
+#   python bench_gauge.py                 # full run, JSON to stdout
+#   python bench_gauge.py --quick -o bench.json
+#   python bench_gauge.py --only parser,export,protocol
+#   python bench_gauge.py --only load --async-mode gevent
+#
+# parser   frames/sec through PacketParser on clean and noisy byte streams
+# latency  serial byte -> Socket.IO client with 1, 10 and 50 clients, using a
+#          simulated gauge and a real server on localhost. Needs the
+#          Socket.IO client extras: pip install "python-socketio[client]"
+# export   /export/continuous time-to-first-byte, total time and peak Python
+#          memory at 10k, 1M and 10M rows (csv and bin)
+# protocol JSON events vs the binary gauge_bin event: bytes on the wire from a
+#          simulated 100 Hz gauge (needs the client extras too) and encode
+#          CPU per broadcast frame
+# load     100 dashboards, each subscribed to one of 4 simulated gauges
+#          (--all-gauges for every gauge), against a server in its own
+#          process: latency per second of the run, deliveries, server threads
+#          and CPU. --async-mode picks the server's GAUGE_ASYNC_MODE
+#
+# Results are one JSON document so runs can be diffed or plotted.
+
+import argparse
+import array
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+
+from gauge_parser import PacketParser, encode_frame
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))], 3)
+
+
+def make_stream(frames, noise, seed=1):
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(frames):
+        if noise and rng.random() < noise:
+            junk = bytes(rng.randrange(256) for _ in range(rng.randint(1, 8)))
+            chunks.append(junk)
+        chunks.append(encode_frame((i % 200000) / 1000 - 100, i % 100 == 0))
+    return b''.join(chunks)
+
+
+def bench_parser(quick):
+    frames = 100_000 if quick else 1_000_000
+    results = []
+    for label, noise in (('clean', 0.0), ('noisy', 0.05)):
+        data = make_stream(frames, noise)
+        for chunk in (64, 4096):
+            parser = PacketParser()
+            view = memoryview(data)
+            decoded = 0
+            t = time.perf_counter()
+            for i in range(0, len(data), chunk):
+                decoded += len(parser.feed(view[i:i + chunk]))
+            elapsed = time.perf_counter() - t
+            results.append({
+                'stream': label,
+                'chunk_bytes': chunk,
+                'frames': decoded,
+                'dropped_bytes': parser.dropped_bytes,
+                'seconds': round(elapsed, 4),
+                'frames_per_sec': round(decoded / elapsed),
+                'mb_per_sec': round(len(data) / elapsed / 1e6, 2),
+            })
+    return results
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(gs):
+    port = free_port()
+    thread = threading.Thread(
+        target=gs.socketio.run, args=(gs.app,),
+        kwargs={'host': '127.0.0.1', 'port': port, 'allow_unsafe_werkzeug': True, 'log_output': False},
+        daemon=True)
+    thread.start()
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + '/api/gauges', timeout=1).read()
+            return url
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError('server did not start')
+
+
+def post(url, body):
+    req = urllib.request.Request(url, data=json.dumps(body).encode(),
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return json.loads(resp.read())
+
+
+def bench_latency(gs, quick):
+    try:
+        import socketio as sio_client
+        sio_client.Client(reconnection=False)
+        import websocket  # noqa: F401  (websocket transport)
+    except ImportError as e:
+        return {'skipped': f'Socket.IO client extras missing: {e}'}
+
+    from gauge_sim import SimGauge
+
+    url = start_server(gs)
+    rate = 50.0
+    duration = 2.0 if quick else 5.0
+    results = []
+    for n_clients in (1, 10, 50):
+        sent = {}
+        recv = []       # gauge_data: byte written -> sample seen by a client
+        captures = []   # important_capture: emitted immediately, no tick wait
+        lock = threading.Lock()
+
+        def make_client():
+            client = sio_client.Client(reconnection=False)
+
+            @client.on('gauge_data')
+            def on_data(data):
+                now = time.perf_counter()
+                with lock:
+                    for sample in data.get('samples', ()):
+                        t = sent.get(round(sample['value'], 3))
+                        if t is not None:
+                            recv.append(now - t)
+
+            @client.on('important_capture')
+            def on_capture(data):
+                now = time.perf_counter()
+                with lock:
+                    t = sent.get(round(data['value'], 3))
+                    if t is not None:
+                        captures.append(now - t)
+
+            client.connect(url, transports=['websocket'])
+            return client
+
+        clients = [make_client() for _ in range(n_clients)]
+        gauge = SimGauge(rate=rate)
+        post(url + '/api/connect', {'port': gauge.port})
+        time.sleep(0.2)
+
+        seq = 0
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            seq += 1
+            value = (seq % 900000) / 1000
+            sent[round(value, 3)] = time.perf_counter()
+            gauge.write(encode_frame(value, seq % 25 == 0))
+            time.sleep(1.0 / rate)
+        time.sleep(0.5)
+
+        post(url + '/api/disconnect', {'gauge': gauge.port})
+        for client in clients:
+            client.disconnect()
+        gauge.close()
+
+        ms = [x * 1000 for x in recv]
+        cap_ms = [x * 1000 for x in captures]
+        results.append({
+            'clients': n_clients,
+            'frames_sent': seq,
+            'deliveries': len(ms),
+            'expected_deliveries': seq * n_clients,
+            'sample_ms': {'p50': percentile(ms, 50), 'p95': percentile(ms, 95),
+                          'p99': percentile(ms, 99), 'max': percentile(ms, 100)},
+            'capture_ms': {'p50': percentile(cap_ms, 50), 'p95': percentile(cap_ms, 95),
+                           'max': percentile(cap_ms, 100)},
+            'broadcast_hz': gs.app.config['BROADCAST_HZ'],
+        })
+    return results
+
+
+def fill_log(log, rows):
+    # synthetic readings 10 ms apart, added in 1M row slices
+    start = time.time_ns() - rows * 10_000_000
+    step = 1_000_000
+    for i in range(0, rows, step):
+        n = min(step, rows - i)
+        ts = array.array('q', range(start + i * 10_000_000, start + (i + n) * 10_000_000, 10_000_000))
+        values = array.array('d', ((j % 2000) / 1000 - 1 for j in range(i, i + n)))
+        status = array.array('B', (j % 4 for j in range(i, i + n)))
+        log.extend(ts, values, status)
+
+
+def run_export(client, gauge, fmt):
+    t = time.perf_counter()
+    resp = client.get(f'/export/continuous?gauge={gauge}&format={fmt}', buffered=False)
+    chunks = iter(resp.response)
+    size = len(next(chunks))
+    first = time.perf_counter() - t
+    for chunk in chunks:
+        size += len(chunk)
+    resp.close()
+    return first, time.perf_counter() - t, size
+
+
+def bench_export(gs, quick):
+    sizes = (10_000, 100_000) if quick else (10_000, 1_000_000, 10_000_000)
+    results = []
+    client = gs.app.test_client()
+    for rows in sizes:
+        gs.app.config['LOG_MEMORY_MB'] = rows * 17 / (1024 * 1024) + 1
+        session = gs.GaugeSession(f'bench-export-{rows}')
+        with gs.sessions_lock:
+            gs.sessions[session.gauge_id] = session
+        fill_log(session.continuous_log, rows)
+
+        for fmt in ('csv', 'bin'):
+            first, total, size = run_export(client, session.gauge_id, fmt)
+            # second pass under tracemalloc, which slows things down
+            tracemalloc.start()
+            run_export(client, session.gauge_id, fmt)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append({
+                'rows': rows,
+                'format': fmt,
+                'first_byte_ms': round(first * 1000, 2),
+                'seconds': round(total, 3),
+                'rows_per_sec': round(rows / total),
+                'bytes': size,
+                'peak_python_mb': round(peak / 1e6, 2),
+            })
+
+        with gs.sessions_lock:
+            del gs.sessions[session.gauge_id]
+        del session
+    return results
+
+
+def packet_bytes(event, data):
+    # what the server hands to the websocket: the Socket.IO text packet plus
+    # any binary attachments
+    from socketio import packet
+    encoded = packet.Packet(packet.EVENT, data=[event, data]).encode()
+    return sum(len(part) for part in (encoded if isinstance(encoded, list) else [encoded]))
+
+
+def bench_protocol_cpu(gs, quick):
+    from socketio import packet
+    ticks = 2000 if quick else 20000
+    per_tick = 5   # 100 Hz gauge, 20 Hz broadcast
+    session = gs.GaugeSession('bench-protocol')
+    session.set_tolerance(0.05, -0.05, 0.0)
+    frames = []
+    for i in range(ticks):
+        for j in range(per_tick):
+            k = i * per_tick + j
+            session.handle_reading(math.sin(k / 50) * 0.06, k % 50 == 0)
+        session.publish()
+        items = [session.pending.popleft() for _ in range(len(session.pending))]
+        frames.append((session.snapshot, items))
+
+    results = {'frames': ticks, 'samples_per_frame': per_tick}
+    for name, event, build in (('json', 'gauge_data', session.json_frame),
+                               ('binary', 'gauge_bin', session.binary_frame)):
+        session.wire['raw'].keyframe = True
+        size = 0
+        t = time.perf_counter()
+        for snapshot, items in frames:
+            encoded = packet.Packet(packet.EVENT, data=[event, build(snapshot, items)]).encode()
+            size += sum(len(part) for part in (encoded if isinstance(encoded, list) else [encoded]))
+        elapsed = time.perf_counter() - t
+        results[name] = {'us_per_frame': round(elapsed / ticks * 1e6, 2),
+                         'bytes_per_frame': round(size / ticks, 1)}
+    return results
+
+
+def bench_protocol_wire(gs, quick):
+    try:
+        import socketio as sio_client
+        sio_client.Client(reconnection=False)
+        import websocket  # noqa: F401
+    except ImportError as e:
+        return {'skipped': f'Socket.IO client extras missing: {e}'}
+
+    from gauge_sim import SimGauge, Simulator
+
+    url = start_server(gs)
+    duration = 3.0 if quick else 10.0
+    counts = {'json': [0, 0], 'binary': [0, 0]}   # messages, bytes
+    lock = threading.Lock()
+
+    def count(proto, event, data):
+        with lock:
+            counts[proto][0] += 1
+            counts[proto][1] += packet_bytes(event, data)
+
+    json_client = sio_client.Client(reconnection=False)
+    json_client.on('gauge_data', lambda data: count('json', 'gauge_data', data))
+    json_client.on('important_capture', lambda data: count('json', 'important_capture', data))
+    json_client.connect(url, transports=['websocket'])
+
+    bin_client = sio_client.Client(reconnection=False)
+    bin_client.on('gauge_bin', lambda data: count('binary', 'gauge_bin', data))
+    bin_client.connect(url, transports=['websocket'])
+    bin_client.call('set_protocol', {'binary': True})
+
+    sim = Simulator([SimGauge(rate=100.0, profile='sine', noise=0.002, button_every=0.5, seed=1)])
+    post(url + '/api/connect', {'port': sim.ports[0]})
+    sim.start()
+    time.sleep(duration)
+    post(url + '/api/disconnect', {'gauge': sim.ports[0]})
+    sim.stop()
+    json_client.disconnect()
+    bin_client.disconnect()
+
+    out = {'seconds': duration, 'rate_hz': 100.0, 'frames_sent': sim.gauges[0].frames}
+    for proto, (messages, size) in counts.items():
+        out[proto] = {'messages': messages, 'bytes': size, 'bytes_per_sec': round(size / duration)}
+    if counts['binary'][1]:
+        out['json_to_binary_ratio'] = round(counts['json'][1] / counts['binary'][1], 2)
+    return out
+
+
+def bench_protocol(gs, quick):
+    return {'cpu': bench_protocol_cpu(gs, quick), 'wire': bench_protocol_wire(gs, quick)}
+
+
+def start_server_process(async_mode):
+    # own process so the clients' GIL and the async mode's monkey patching
+    # don't touch the server being measured
+    port = free_port()
+    env = dict(os.environ, GAUGE_ASYNC_MODE=async_mode, GAUGE_STORE_PATH='')
+    code = ('import gauge_server as gs; '
+            f"gs.socketio.run(gs.app, host='127.0.0.1', port={port}, allow_unsafe_werkzeug=True, log_output=False)")
+    proc = subprocess.Popen([sys.executable, '-c', code], env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(200):
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited with {proc.returncode}')
+        try:
+            urllib.request.urlopen(url + '/api/gauges', timeout=1).read()
+            return proc, url
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError('server did not start')
+
+
+def proc_usage(pid):
+    # (threads, cpu seconds) from /proc, None where there is no /proc
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            threads = next(int(line.split()[1]) for line in f if line.startswith('Threads:'))
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return threads, (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, StopIteration, ValueError):
+        return None, None
+
+
+def load_worker(url, watch, ready, stop, results):
+    # A batch of dashboards in one process, speaking Engine.IO/Socket.IO over
+    # plain websockets from a single select loop. Messages are only timestamped
+    # here and decoded after the run, so the load generator stays cheap.
+    import selectors
+    import websocket
+    ws_url = url.replace('http', 'ws', 1) + '/socket.io/?EIO=4&transport=websocket'
+    sel = selectors.DefaultSelector()
+    conns = []
+    for gauge in watch:
+        ws = websocket.create_connection(ws_url, timeout=10)
+        ws.recv()        # Engine.IO open packet
+        ws.send('40')    # join the default namespace
+        if gauge is not None:
+            # like the dashboard: only the gauge on screen
+            ws.send('42' + json.dumps(['subscribe', {'gauges': [gauge]}]))
+        sel.register(ws.sock, selectors.EVENT_READ, ws)
+        conns.append(ws)
+    ready.release()
+    cpu, wall = time.process_time(), time.monotonic()
+    raw = []
+    while not stop.is_set():
+        for key, _ in sel.select(0.1):
+            ws = key.data
+            msg = ws.recv()
+            if msg == '2':
+                ws.send('3')     # Engine.IO ping
+            elif msg.startswith('42'):
+                raw.append((time.monotonic(), msg))
+    cpu, wall = time.process_time() - cpu, time.monotonic() - wall
+    seen = []
+    for received, msg in raw:
+        event, data = json.loads(msg[2:])
+        if event == 'gauge_data':
+            seen.extend((data['gauge'], round(sample['value'], 3), received) for sample in data['samples'])
+    results.put((seen, cpu, wall))
+    for ws in conns:
+        ws.close()
+
+
+def bench_load(quick, async_mode='threading', n_clients=100, n_gauges=4, all_gauges=False):
+    try:
+        import socketio as sio_client
+        sio_client.Client(reconnection=False)
+        import websocket  # noqa: F401
+    except ImportError as e:
+        return {'skipped': f'Socket.IO client extras missing: {e}'}
+    if async_mode != 'threading':
+        try:
+            __import__(async_mode)
+        except ImportError as e:
+            return {'skipped': f'{async_mode} not installed: {e}'}
+
+    import multiprocessing
+    from gauge_sim import SimGauge
+
+    proc, url = start_server_process(async_mode)
+    rate = 20.0
+    duration = 4.0 if quick else 15.0
+    # clients are spread over processes so decoding on the client side
+    # doesn't end up being what's measured
+    ctx = multiprocessing.get_context('spawn')
+    n_workers = max(1, min(os.cpu_count() or 1, -(-n_clients // 10)))
+    ready = ctx.Semaphore(0)
+    stop = ctx.Event()
+    results = ctx.Queue()
+    sent = {}
+    gauges = [SimGauge(rate=rate) for _ in range(n_gauges)]
+    # each dashboard watches one gauge, round robin, unless all_gauges
+    watch = [None if all_gauges else gauges[i % n_gauges].port for i in range(n_clients)]
+    try:
+        t = time.monotonic()
+        workers = []
+        for i in range(n_workers):
+            worker = ctx.Process(target=load_worker, args=(url, watch[i::n_workers], ready, stop, results),
+                                 daemon=True)
+            worker.start()
+            workers.append(worker)
+        for _ in workers:
+            ready.acquire()
+        connect_s = time.monotonic() - t
+
+        post(url + '/api/connect', {'ports': [g.port for g in gauges]})
+        time.sleep(0.5)
+
+        threads_before, cpu_before = proc_usage(proc.pid)
+        start = time.monotonic()
+        seq = 0
+        while time.monotonic() - start < duration:
+            seq += 1
+            for i, gauge in enumerate(gauges):
+                value = i * 100 + (seq % 90000) / 1000
+                sent[(gauge.port, round(value, 3))] = time.monotonic()
+                gauge.write(encode_frame(value, False))
+            time.sleep(1.0 / rate)
+        time.sleep(1.0)
+        threads_after, cpu_after = proc_usage(proc.pid)
+
+        stop.set()
+        seen = []
+        client_cpu = client_wall = 0.0
+        for _ in workers:
+            worker_seen, worker_cpu, worker_wall = results.get(timeout=60)
+            seen.extend(worker_seen)
+            client_cpu += worker_cpu
+            client_wall = max(client_wall, worker_wall)
+        for worker in workers:
+            worker.join(timeout=10)
+        post(url + '/api/disconnect', {})
+        for gauge in gauges:
+            gauge.close()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    by_second = {}    # second of the run -> latencies (s)
+    for gauge, value, received in seen:
+        t = sent.get((gauge, value))
+        if t is not None:
+            by_second.setdefault(int(t - start), []).append(received - t)
+    every = [x for values in by_second.values() for x in values]
+    ms = lambda values, p: round(percentile(values, p) * 1000, 2) if values else None
+    return {
+        'async_mode': async_mode,
+        'clients': n_clients,
+        'client_processes': n_workers,
+        'gauges': n_gauges,
+        'subscription': 'all gauges' if all_gauges else 'one gauge each',
+        'rate_hz': rate,
+        'seconds': duration,
+        'connect_s': round(connect_s, 2),
+        'frames_sent': seq * n_gauges,
+        'deliveries': len(every),
+        'expected_deliveries': seq * (n_gauges if all_gauges else 1) * n_clients,
+        'sample_ms': {'p50': ms(every, 50), 'p95': ms(every, 95), 'p99': ms(every, 99), 'max': ms(every, 100)},
+        # flat p95 from second to second is what "stable" means here
+        'p95_ms_by_second': [ms(by_second[k], 95) for k in sorted(by_second)],
+        'server_threads': threads_after,
+        'server_cpu_percent': (round((cpu_after - cpu_before) / (duration + 1.0) * 100, 1)
+                               if cpu_before is not None else None),
+        # if this nears 100% per core the clients, not the server, set the latency
+        'client_cpu_percent': round(client_cpu / client_wall * 100, 1),
+    }
+
+
+def git_rev():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Gauge server benchmarks')
+    ap.add_argument('--quick', action='store_true', help='smaller sizes for CI')
+    ap.add_argument('--only', default='parser,latency,export,protocol')
+    ap.add_argument('-o', '--output', help='write JSON here instead of stdout')
+    ap.add_argument('--async-mode', default='threading', choices=('threading', 'gevent', 'eventlet'),
+                    help='server async mode for the load test')
+    ap.add_argument('--clients', type=int, default=100, help='dashboards in the load test')
+    ap.add_argument('--gauges', type=int, default=4, help='simulated gauges in the load test')
+    ap.add_argument('--all-gauges', action='store_true',
+                    help='load test dashboards take every gauge instead of one each')
+    args = ap.parse_args()
+    only = set(args.only.split(','))
+
+    # keep the benchmark away from the real store file
+    os.environ['GAUGE_STORE_PATH'] = ''
+    import gauge_server as gs
+
+    results = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_rev(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'quick': args.quick,
+        }
+    }
+    if 'parser' in only:
+        results['parser'] = bench_parser(args.quick)
+    if 'latency' in only:
+        results['latency'] = bench_latency(gs, args.quick)
+    if 'export' in only:
+        results['export'] = bench_export(gs, args.quick)
+    if 'protocol' in only:
+        results['protocol'] = bench_protocol(gs, args.quick)
+    if 'load' in only:
+        results['load'] = bench_load(args.quick, args.async_mode, args.clients, args.gauges, args.all_gauges)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# Pages and scripts served straight from memory
+#
+# Everything is built once at startup: the body, its gzip variant, a content
+# hash for the ETag and the Last-Modified time. A request then only picks a
+# variant and compares validators, so a repeat visit is a bodyless 304.
+
+import gzip
+import hashlib
+from datetime import datetime, timezone
+from flask import Response
+
+# for files whose URL carries their hash and so can never change
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# for pages at a fixed URL: keep a copy, but check the ETag every time
+REVALIDATE = 'no-cache'
+
+
+class StaticAsset:
+    """One in-memory file with a precompressed variant and cache validators."""
+
+    def __init__(self, body, mimetype, last_modified=None, cache_control=REVALIDATE):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(body).hexdigest()
+        self.etag = self.digest[:16]
+        self.last_modified = datetime.fromtimestamp(last_modified, timezone.utc) if last_modified else None
+        self.cache_control = cache_control
+
+    def response(self, request):
+        # only send the gzip copy if it is actually smaller
+        use_gzip = request.accept_encodings['gzip'] > 0 and len(self.gzipped) < len(self.body)
+        resp = Response(self.gzipped if use_gzip else self.body, mimetype=self.mimetype)
+        # gzip gets its own tag so a cache never mixes the two encodings
+        resp.set_etag(self.etag + '-gz' if use_gzip else self.etag)
+        if use_gzip:
+            resp.headers['Content-Encoding'] = 'gzip'
+        resp.headers['Vary'] = 'Accept-Encoding'
+        resp.headers['Cache-Control'] = self.cache_control
+        if self.last_modified is not None:
+            resp.last_modified = self.last_modified
+        return resp.make_conditional(request)
@@ -0,0 +1,164 @@
+# Downsampling for /api/history
+#
+# Ranges are cut into buckets whose width comes from a fixed 1-2-5 ladder and
+# whose edges are aligned to multiples of that width, so the same bucket shows
+# up again when the user pans or zooms back. Aggregates of buckets that can no
+# longer change are cached.
+
+import threading
+import time
+from collections import OrderedDict
+
+MS = 1_000_000
+# 1 ms ... ~1 week, 1-2-5 steps
+WIDTH_LADDER = [m * 10 ** e * MS for e in range(0, 9) for m in (1, 2, 5)]
+
+# (count, sum, min, min_ts, max, max_ts)
+_COUNT, _SUM, _MIN, _MIN_TS, _MAX, _MAX_TS = range(6)
+
+
+def bucket_width(start_ns, end_ns, buckets):
+    raw = max(1, -(-(end_ns - start_ns) // max(1, buckets)))
+    for width in WIDTH_LADDER:
+        if width >= raw:
+            return width
+    return raw
+
+
+def aggregate_blocks(blocks, width):
+    """Bucket aggregates from (ts, values, status) blocks, for the in-memory log."""
+    out = {}
+    for ts, values, _ in blocks:
+        for t, v in zip(ts, values):
+            b = t // width
+            agg = out.get(b)
+            if agg is None:
+                out[b] = [1, v, v, t, v, t]
+                continue
+            agg[_COUNT] += 1
+            agg[_SUM] += v
+            if v < agg[_MIN]:
+                agg[_MIN] = v
+                agg[_MIN_TS] = t
+            if v > agg[_MAX]:
+                agg[_MAX] = v
+                agg[_MAX_TS] = t
+    return out
+
+
+def minmax_points(aggs):
+    # two points per bucket, in the order they happened
+    ts, values = [], []
+    for b in sorted(aggs):
+        agg = aggs[b]
+        lo = (agg[_MIN_TS], agg[_MIN])
+        hi = (agg[_MAX_TS], agg[_MAX])
+        if lo[0] > hi[0]:
+            lo, hi = hi, lo
+        ts.append(lo[0])
+        values.append(lo[1])
+        if hi[0] != lo[0]:
+            ts.append(hi[0])
+            values.append(hi[1])
+    return ts, values
+
+
+def lttb(ts, values, threshold):
+    """Largest-Triangle-Three-Buckets down to threshold points."""
+    n = len(ts)
+    if threshold >= n or threshold < 3:
+        return ts, values
+    out_t, out_v = [ts[0]], [values[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # average of the next bucket is the third triangle corner
+        start = int((i + 1) * every) + 1
+        end = min(int((i + 2) * every) + 1, n)
+        count = end - start
+        avg_t = sum(ts[start:end]) / count
+        avg_v = sum(values[start:end]) / count
+
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        at, av = ts[a], values[a]
+        best = -1.0
+        pick = lo
+        for j in range(lo, hi):
+            area = abs((at - avg_t) * (values[j] - av) - (at - ts[j]) * (avg_v - av))
+            if area > best:
+                best = area
+                pick = j
+        out_t.append(ts[pick])
+        out_v.append(values[pick])
+        a = pick
+    out_t.append(ts[-1])
+    out_v.append(values[-1])
+    return out_t, out_v
+
+
+class BucketCache:
+    """LRU of sealed bucket aggregates keyed by (gauge, width)."""
+
+    def __init__(self, max_buckets=500_000, settle_ns=5_000_000_000):
+        self.max_buckets = max_buckets
+        self.settle_ns = settle_ns  # buckets newer than this may still get rows
+        self.levels = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.levels.clear()
+            self.size = 0
+
+    def get(self, gauge, width, b0, b1, fetch):
+        """Aggregates for buckets b0..b1 inclusive; fetch(lo_ns, hi_ns) fills gaps."""
+        key = (gauge, width)
+        with self.lock:
+            level = self.levels.get(key)
+            if level is None:
+                level = self.levels[key] = {}
+            else:
+                self.levels.move_to_end(key)
+            # a missing bucket is either uncached or known to be empty (None)
+            missing = [b for b in range(b0, b1 + 1) if b not in level]
+        self.hits += (b1 - b0 + 1) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            fetched = {}
+            # one query per contiguous run of missing buckets
+            run_start = prev = missing[0]
+            for b in missing[1:] + [None]:
+                if b is not None and b == prev + 1:
+                    prev = b
+                    continue
+                fetched.update(fetch(run_start * width, (prev + 1) * width - 1))
+                if b is not None:
+                    run_start = prev = b
+
+            sealed = (time.time_ns() - self.settle_ns) // width
+            with self.lock:
+                for b in missing:
+                    if b < sealed:
+                        level[b] = fetched.get(b)
+                        self.size += 1
+                self._trim()
+        else:
+            fetched = {}
+
+        with self.lock:
+            out = {}
+            for b in range(b0, b1 + 1):
+                agg = fetched.get(b) if b in fetched else level.get(b)
+                if agg is not None:
+                    out[b] = agg
+        return out
+
+    def _trim(self):
+        while self.size > self.max_buckets and len(self.levels) > 1:
+            _, level = self.levels.popitem(last=False)
+            self.size -= len(level)
@@ -0,0 +1,274 @@
+# Columnar, fixed-capacity store for the continuous log
+#
+# Each reading costs 17 bytes (int64 ns timestamp, float64 value, uint8 status)
+# instead of a dict with two strings. When the ring is full the oldest chunk is
+# either spilled to an append-only file or evicted.
+
+import array
+import json
+import os
+import struct
+import threading
+from bisect import bisect_left
+
+STATUS_NAMES = ('none', 'pass', 'over', 'under')
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+ROW_BYTES = 8 + 8 + 1
+
+# Binary export: a 16 byte preamble (magic, version, record size, header
+# length), a space-padded JSON header, then packed little-endian records until
+# EOF. The JSON carries a numpy dtype spec, so a client can do
+#   magic, version, rsize, hlen = struct.unpack('<8sHHI', f.read(16))
+#   hdr = json.loads(f.read(hlen - 16))
+#   np.fromfile(path, dtype=np.dtype([tuple(d) for d in hdr['dtype']]), offset=hlen)
+BIN_MAGIC = b'ETOPOOG\x00'
+BIN_VERSION = 1
+BIN_PREAMBLE = struct.Struct('<8sHHI')
+CONTINUOUS_RECORD = struct.Struct('<qdB')
+CONTINUOUS_DTYPE = [['ts_ns', '<i8'], ['value', '<f8'], ['status', 'u1']]
+IMPORTANT_RECORD = struct.Struct('<qdBB')
+IMPORTANT_DTYPE = [['ts_ns', '<i8'], ['value', '<f8'], ['status', 'u1'], ['type', 'u1']]
+CAPTURE_TYPES = ('Manual', 'Button')
+
+
+def bin_header(record, dtype, **meta):
+    body = dict(meta, version=BIN_VERSION, record_size=record.size, dtype=dtype,
+                status=list(STATUS_NAMES), units='mm')
+    text = json.dumps(body, separators=(',', ':')).encode()
+    # pad so records start on a 16 byte boundary
+    header_len = BIN_PREAMBLE.size + len(text)
+    header_len += -header_len % 16
+    text += b' ' * (header_len - BIN_PREAMBLE.size - len(text))
+    return BIN_PREAMBLE.pack(BIN_MAGIC, BIN_VERSION, record.size, header_len) + text
+
+
+class SampleLog:
+    """Ring of (ts_ns, value, status code) columns with a memory budget.
+
+    Rows are addressed by a sequence number that keeps counting across
+    evictions, so readers can walk a snapshot in blocks while the reader
+    thread keeps appending. Rows that get pushed out of the ring mid-read
+    are picked up from the spill file when spilling is on.
+    """
+
+    def __init__(self, memory_budget=32 * 1024 * 1024, spill_path=None, chunk_rows=4096):
+        capacity = max(memory_budget // ROW_BYTES, chunk_rows, 1)
+        self.capacity = capacity
+        self.chunk_rows = min(chunk_rows, capacity)
+        self.ts = array.array('q', bytes(8 * capacity))
+        self.values = array.array('d', bytes(8 * capacity))
+        self.status = array.array('B', bytes(capacity))
+        self.spill_path = spill_path
+        self.spill_file = spill_path   # file the current generation spills to
+        self.readers = {}              # spill file -> block iterators reading it
+        self.generation = 0
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.head = 0        # ring index of the oldest row still in memory
+        self.size = 0
+        self.first_seq = 0   # sequence number of that row
+        self.spilled = []    # (first_seq, rows, file offset, first_ts, last_ts)
+        self.spill_bytes = 0
+        self.evicted = 0     # rows dropped for good
+        self.generation += 1
+        if self.spill_path:
+            if self.readers.get(self.spill_file):
+                # an export is still reading the old file (and Windows won't
+                # delete an open one), so start a new one; the last reader
+                # out removes the old
+                self.spill_file = f'{self.spill_path}.{self.generation}'
+            if os.path.exists(self.spill_file):
+                os.remove(self.spill_file)
+
+    def clear(self):
+        with self.lock:
+            self._reset()
+
+    def __len__(self):
+        # everything still readable: spilled chunks plus the ring
+        return self.end_seq - self.start_seq
+
+    @property
+    def end_seq(self):
+        return self.first_seq + self.size
+
+    @property
+    def start_seq(self):
+        return self.spilled[0][0] if self.spilled else self.first_seq
+
+    @property
+    def memory_bytes(self):
+        return self.capacity * ROW_BYTES
+
+    def append(self, ts_ns, value, status):
+        with self.lock:
+            if self.size == self.capacity:
+                self._release_oldest()
+            i = self.head + self.size
+            if i >= self.capacity:
+                i -= self.capacity
+            self.ts[i] = ts_ns
+            self.values[i] = value
+            self.status[i] = status
+            self.size += 1
+
+    def extend(self, ts, values, status):
+        """Bulk append equal-length array columns ('q', 'd', 'B')."""
+        n = len(ts)
+        i = 0
+        with self.lock:
+            while i < n:
+                if self.size == self.capacity:
+                    self._release_oldest()
+                start = (self.head + self.size) % self.capacity
+                k = min(n - i, self.capacity - self.size, self.capacity - start)
+                self.ts[start:start + k] = ts[i:i + k]
+                self.values[start:start + k] = values[i:i + k]
+                self.status[start:start + k] = status[i:i + k]
+                self.size += k
+                i += k
+
+    def _copy(self, offset, n):
+        # n rows starting offset rows after head, unwrapped into new arrays
+        start = (self.head + offset) % self.capacity
+        stop = start + n
+        if stop <= self.capacity:
+            return self.ts[start:stop], self.values[start:stop], self.status[start:stop]
+        stop -= self.capacity
+        return (self.ts[start:] + self.ts[:stop],
+                self.values[start:] + self.values[:stop],
+                self.status[start:] + self.status[:stop])
+
+    def _release_oldest(self):
+        n = self.chunk_rows
+        if self.spill_path:
+            ts, values, status = self._copy(0, n)
+            with open(self.spill_file, 'ab') as f:
+                ts.tofile(f)
+                values.tofile(f)
+                status.tofile(f)
+            self.spilled.append((self.first_seq, n, self.spill_bytes, ts[0], ts[-1]))
+            self.spill_bytes += n * ROW_BYTES
+        else:
+            self.evicted += n
+        self.head = (self.head + n) % self.capacity
+        self.first_seq += n
+        self.size -= n
+
+    def _read_spilled(self, path, chunk):
+        _, n, offset, _, _ = chunk
+        ts = array.array('q')
+        values = array.array('d')
+        status = array.array('B')
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            ts.fromfile(f, n)
+            values.fromfile(f, n)
+            status.fromfile(f, n)
+        return ts, values, status
+
+    def _ts_at(self, seq):
+        return self.ts[(self.head + seq - self.first_seq) % self.capacity]
+
+    def _ring_seq_for_time(self, t_ns):
+        # first in-memory seq with ts >= t_ns (timestamps are appended in order)
+        lo, hi = self.first_seq, self.end_seq
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts_at(mid) < t_ns:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def blocks(self, start_ns=None, end_ns=None, block=4096):
+        """Yield (ts, values, status) array blocks of a snapshot taken at call time.
+
+        Rows appended after the call are not included; rows evicted while
+        reading are skipped, and reading stops if the log is cleared. Only
+        one block is held in memory at a time.
+        """
+        # taken here rather than on first next() so the snapshot is the
+        # state at call time, not whenever the consumer starts reading
+        with self.lock:
+            end_seq = self.end_seq
+            chunks = list(self.spilled)
+            seq = self.start_seq
+            generation = self.generation
+        return self._iter_blocks(seq, end_seq, chunks, generation, start_ns, end_ns, block)
+
+    def _iter_blocks(self, seq, end_seq, chunks, generation, start_ns, end_ns, block):
+        # registered on the first next(), since a generator that never starts
+        # never runs its finally either
+        with self.lock:
+            if generation != self.generation:
+                return
+            path = self.spill_file
+            self.readers[path] = self.readers.get(path, 0) + 1
+        try:
+            yield from self._read_blocks(seq, end_seq, chunks, generation, path, start_ns, end_ns, block)
+        finally:
+            with self.lock:
+                self.readers[path] -= 1
+                if not self.readers[path]:
+                    del self.readers[path]
+                    if path != self.spill_file and os.path.exists(path):
+                        os.remove(path)
+
+    def _read_blocks(self, seq, end_seq, chunks, generation, path, start_ns, end_ns, block):
+        for chunk in chunks:
+            first_seq, n, _, first_ts, last_ts = chunk
+            if end_ns is not None and first_ts > end_ns:
+                return
+            if start_ns is None or last_ts >= start_ns:
+                cols = self._trim(self._read_spilled(path, chunk), start_ns, end_ns)
+                if len(cols[0]):
+                    yield cols
+            seq = first_seq + n
+
+        while seq < end_seq:
+            with self.lock:
+                if generation != self.generation:
+                    return  # cleared while we were reading
+                if seq >= self.first_seq:
+                    if start_ns is not None:
+                        seq = max(seq, self._ring_seq_for_time(start_ns))
+                    n = min(block, end_seq - seq)
+                    cols = self._copy(seq - self.first_seq, n)
+                    overtaken = None
+                else:
+                    # the ring moved past us while we were yielding
+                    overtaken = next((c for c in self.spilled if c[0] + c[1] > seq), None)
+                    if overtaken is None:
+                        seq = self.first_seq
+                        continue
+            if overtaken is not None:
+                ts, values, status = self._read_spilled(path, overtaken)
+                skip = seq - overtaken[0]
+                take = min(overtaken[1], end_seq - overtaken[0])
+                cols = (ts[skip:take], values[skip:take], status[skip:take])
+                seq = overtaken[0] + take
+            else:
+                seq += n
+            past_end = end_ns is not None and len(cols[0]) and cols[0][-1] >= end_ns
+            cols = self._trim(cols, start_ns, end_ns)
+            if len(cols[0]):
+                yield cols
+            if past_end:
+                return
+
+    @staticmethod
+    def _trim(cols, start_ns, end_ns):
+        ts, values, status = cols
+        lo = bisect_left(ts, start_ns) if start_ns is not None else 0
+        hi = bisect_left(ts, end_ns + 1) if end_ns is not None else len(ts)
+        if lo == 0 and hi == len(ts):
+            return cols
+        return ts[lo:hi], values[lo:hi], status[lo:hi]
+
+    def rows(self, start_ns=None, end_ns=None):
+        """Yield (ts_ns, value, status code) rows, oldest first."""
+        for ts, values, status in self.blocks(start_ns, end_ns):
+            yield from zip(ts, values, status)
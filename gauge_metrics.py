@@ -0,0 +1,102 @@
+# Prometheus text exposition without the client library
+#
+# Most numbers the server exports already exist as plain counters on the
+# sessions and are only read when /metrics is scraped. Histograms are the only
+# thing touched on the hot path: one bisect and two adds per observation.
+
+import threading
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0)
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class Histogram:
+    """Fixed-bucket histogram with one child per label set."""
+
+    def __init__(self, name, doc, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.children = {}
+        self.lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(values, _HistogramChild(self.buckets))
+        return child
+
+    def render(self, out):
+        out.append(f'# HELP {self.name} {self.doc}')
+        out.append(f'# TYPE {self.name} histogram')
+        for values, child in list(self.children.items()):
+            base = list(zip(self.label_names, values))
+            counts, total, count = child.snapshot()
+            running = 0
+            for bound, n in zip(self.buckets, counts):
+                running += n
+                out.append(f'{self.name}_bucket{_labels(base + [("le", repr(float(bound)))])} {running}')
+            out.append(f'{self.name}_bucket{_labels(base + [("le", "+Inf")])} {count}')
+            out.append(f'{self.name}_sum{_labels(base)} {total}')
+            out.append(f'{self.name}_count{_labels(base)} {count}')
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', 'count', 'lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is the +Inf overflow
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self.lock:
+            return self.counts[:-1], self.sum, self.count
+
+
+class MetricsWriter:
+    """Collects samples for one scrape, grouped by metric name."""
+
+    def __init__(self):
+        self.families = {}
+
+    def add(self, name, kind, doc, value, **labels):
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = (kind, doc, [])
+        if value is None:
+            return
+        family[2].append((tuple(labels.items()), value))
+
+    def render(self, histograms=()):
+        out = []
+        for name, (kind, doc, samples) in self.families.items():
+            out.append(f'# HELP {name} {doc}')
+            out.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                out.append(f'{name}{_labels(labels)} {value}')
+        for histogram in histograms:
+            histogram.render(out)
+        return '\n'.join(out) + '\n'
@@ -0,0 +1,110 @@
+# Etopoo frame parser, shared by the server reader thread and the tools
+#
+# Frame layout (11 bytes):
+#   0x12, sign ('+' or '-'), 0x00, six ascii digits, 0x0D, flag
+# flag is 0x0A when the data button on the gauge was pressed
+
+SYNC = 0x12
+FRAME_LEN = 11
+BUTTON_FLAG = 0x0A
+
+PLUS = ord('+')
+MINUS = ord('-')
+
+
+class PacketParser:
+    """Linear-time framer over a preallocated buffer.
+
+    Bytes are copied once into a fixed bytearray, sync bytes are found with
+    find() instead of shifting one byte at a time, and every complete frame
+    in the chunk is decoded in one pass. Only the unfinished tail (< 11 bytes)
+    is ever moved back to the front.
+    """
+
+    def __init__(self, capacity=4096):
+        if capacity < FRAME_LEN:
+            raise ValueError(f"capacity must be at least {FRAME_LEN} bytes")
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._end = 0
+        self.frames = 0         # good frames decoded
+        self.bad_frames = 0     # framed ok but digits were not 6 ascii digits
+        self.dropped_bytes = 0  # bytes thrown away while resyncing
+
+    def reset(self):
+        self._end = 0
+        self.frames = 0
+        self.bad_frames = 0
+        self.dropped_bytes = 0
+
+    def discard_pending(self):
+        # drop a half-received frame (e.g. cut off by a dropout) but keep the
+        # counters, which are totals for the life of the session
+        self.dropped_bytes += self._end
+        self._end = 0
+
+    @property
+    def pending(self):
+        return self._end
+
+    def feed(self, data):
+        """Append a chunk and return [(raw_value, is_button), ...] for every complete frame."""
+        out = []
+        src = memoryview(data)
+        while len(src):
+            n = min(len(src), self.capacity - self._end)
+            self._view[self._end:self._end + n] = src[:n]
+            self._end += n
+            src = src[n:]
+            self._scan(out)
+        return out
+
+    def _scan(self, out):
+        buf = self._buf
+        end = self._end
+        pos = 0
+
+        while True:
+            idx = buf.find(SYNC, pos, end)
+            if idx < 0:
+                self.dropped_bytes += end - pos
+                pos = end
+                break
+            if idx > pos:
+                self.dropped_bytes += idx - pos
+                pos = idx
+            if end - idx < FRAME_LEN:
+                break  # wait for the rest of the frame
+
+            if (buf[idx + 1] in (PLUS, MINUS) and
+                    buf[idx + 2] == 0x00 and
+                    buf[idx + 9] == 0x0D):
+                digits = bytes(buf[idx + 3:idx + 9])
+                if digits.isdigit():
+                    value = int(digits) / 1000
+                    if buf[idx + 1] == MINUS:
+                        value = -value
+                    out.append((value, buf[idx + 10] == BUTTON_FLAG))
+                    self.frames += 1
+                else:
+                    self.bad_frames += 1
+                pos = idx + FRAME_LEN
+            else:
+                # false sync, skip just this byte
+                self.dropped_bytes += 1
+                pos = idx + 1
+
+        # keep the unfinished tail at the front of the buffer
+        tail = end - pos
+        if tail and pos:
+            self._view[0:tail] = self._view[pos:end]
+        self._end = tail
+
+
+def encode_frame(value, button=False):
+    """Build one frame the way the gauge sends it (simulator and benchmarks)."""
+    sign = b'-' if value < 0 else b'+'
+    digits = b'%06d' % min(round(abs(value) * 1000), 999999)
+    flag = BUTTON_FLAG if button else 0x0D
+    return b'\x12' + sign + b'\x00' + digits + b'\x0d' + bytes((flag,))
@@ -0,0 +1,28 @@
+# Serial reading that wakes on data instead of polling
+#
+# read_available() blocks in the driver (select() on POSIX, overlapped IO on
+# Windows) until the first byte arrives, then takes whatever else is already
+# buffered. The port timeout only bounds how long a cancelled reader lingers;
+# cancel_read() wakes it immediately where pyserial supports it.
+
+
+def read_available(ser):
+    """Block until data arrives (or the port timeout expires) and return it."""
+    first = ser.read(1)
+    if not first:
+        return b''
+    waiting = ser.in_waiting
+    if waiting:
+        return first + ser.read(waiting)
+    return first
+
+
+def cancel_read(ser):
+    # wake a reader blocked in read_available() so it can notice it was stopped
+    cancel = getattr(ser, 'cancel_read', None)
+    if cancel is not None:
+        try:
+            cancel()
+        except Exception:
+            pass
+
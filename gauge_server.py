@@ -1,53 +1,187 @@
-from flask import Flask, render_template_string, send_file, jsonify, request
-from flask_socketio import SocketIO, emit
+import os
+
+# Socket.IO server mode. 'threading' (default) runs the Werkzeug server with a
+# thread per client; 'gevent' or 'eventlet' serve many dashboards from green
+# threads. Green modes patch the standard library, so this runs before any
+# other import.
+ASYNC_MODE = os.environ.get('GAUGE_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+elif ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+GREEN_THREADS = ASYNC_MODE in ('gevent', 'eventlet')
+
+# Blocking calls that never give the hub a chance to switch (sysfs walks,
+# sqlite commits) go through this, which runs them on a real OS thread in the
+# green modes so the clients keep being served meanwhile.
+if ASYNC_MODE == 'gevent':
+    import gevent
+    def run_blocking(fn, *args):
+        return gevent.get_hub().threadpool.apply(fn, args)
+elif ASYNC_MODE == 'eventlet':
+    from eventlet import tpool
+    run_blocking = tpool.execute
+else:
+    def run_blocking(fn, *args):
+        return fn(*args)
+
+from flask import Flask, Response, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import serial
 import serial.tools.list_ports
 import threading
 import time
+import atexit
 from datetime import datetime
 import csv
-import os
+import io
+import re
+import unicodedata
+from urllib.parse import quote
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import Future
+from gauge_parser import PacketParser
+from gauge_serial import read_available, cancel_read
+from gauge_log import (SampleLog, STATUS_CODES, STATUS_NAMES, CAPTURE_TYPES,
+                       CONTINUOUS_RECORD, CONTINUOUS_DTYPE, IMPORTANT_RECORD,
+                       IMPORTANT_DTYPE, bin_header)
+from gauge_store import MeasurementStore
+from gauge_history import BucketCache, aggregate_blocks, bucket_width, lttb, minmax_points
+from gauge_metrics import Histogram, MetricsWriter, DURATION_BUCKETS
+from gauge_stats import RunningStats, PartitionedStats, ToleranceHistogram, parse_window
+from gauge_spc import ControlChart
+from gauge_wire import StatsEncoder, pack_message
+from gauge_assets import StaticAsset, IMMUTABLE
 #use print statements to debug
 
 
-app = Flask(__name__)
+# static files are served from memory by static_asset() below
+app = Flask(__name__, static_folder=None)
 app.config['SECRET_KEY'] = 'gauge_secret!'
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
+
+# Readings are batched and pushed to clients this many times per second
+app.config['BROADCAST_HZ'] = float(os.environ.get('GAUGE_BROADCAST_HZ', 20))
+
+# Memory budget for each gauge's continuous log; once full the oldest chunk is
+# spilled to LOG_SPILL_DIR, or evicted if no spill directory is set
+app.config['LOG_MEMORY_MB'] = float(os.environ.get('GAUGE_LOG_MEMORY_MB', 16))
+app.config['LOG_SPILL_DIR'] = os.environ.get('GAUGE_LOG_SPILL_DIR') or None
+
+# Sliding windows every gauge keeps next to its cumulative stats: a count
+# ('500' readings) or a time span ('30s', '5m', '1h'). Change per gauge at
+# runtime with the set_windows socket event.
+app.config['STATS_WINDOWS'] = [w for w in os.environ.get('GAUGE_STATS_WINDOWS', '100,60s').split(',') if w.strip()]
+
+# SPC control chart per gauge. Subgroups are built from captures (button or
+# manual) or from every reading; size 1 gives an individuals/moving-range
+# chart, 2-10 an X-bar/R chart. Limits freeze after SPC_BASELINE points.
+app.config['SPC_SOURCE'] = os.environ.get('GAUGE_SPC_SOURCE', 'captures')
+app.config['SPC_SUBGROUP'] = int(os.environ.get('GAUGE_SPC_SUBGROUP', 5))
+app.config['SPC_BASELINE'] = int(os.environ.get('GAUGE_SPC_BASELINE', 25))
+SPC_SOURCES = ('captures', 'readings')
+# recent chart points kept per gauge for /api/spc
+SPC_HISTORY = 500
+
+# Seconds between histogram pushes; only gauges whose counts changed are sent
+app.config['HISTOGRAM_INTERVAL'] = float(os.environ.get('GAUGE_HISTOGRAM_INTERVAL', 1.0))
+
+# The dashboard loads the Socket.IO client (4.5.0, shipped in static/) from the
+# server itself so it works with no internet access. Set GAUGE_SOCKETIO_JS to
+# another file, or to an http(s) URL to load it from a CDN instead.
+app.config['SOCKETIO_JS'] = os.environ.get(
+    'GAUGE_SOCKETIO_JS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'socket.io.min.js'))
+
+# Rows formatted per chunk of a streamed export
+EXPORT_CHUNK_ROWS = 4096
+
+# Every reading is also written to this SQLite file (WAL, batched commits) so
+# data survives restarts and reconnects. Set GAUGE_STORE_PATH='' to disable,
+# GAUGE_STORE_SYNC=full to fsync every batch.
+app.config['STORE_PATH'] = os.environ.get(
+    'GAUGE_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gauge_store.sqlite3'))
+app.config['STORE_SYNC'] = os.environ.get('GAUGE_STORE_SYNC', 'normal')
+store = None
+
+# /api/history never returns more than this many points per gauge
+HISTORY_MAX_POINTS = 10000
+history_cache = BucketCache()
+
+# Prometheus histograms; everything else on /metrics is read from the sessions
+read_to_emit_seconds = Histogram(
+    'gauge_read_to_emit_seconds', 'Time from serial read to socket emit.', ('gauge', 'event'))
+export_duration_seconds = Histogram(
+    'gauge_export_duration_seconds', 'Time to stream an export.', ('kind', 'format'),
+    buckets=DURATION_BUCKETS)
+socket_clients = 0
+
+# What each client is sent. The protocol is JSON events unless the client opts
+# in to the binary gauge_bin event (see gauge_wire.py) with set_protocol; the
+# subscribe event picks the gauges (all by default) and one tier:
+#   raw        every reading, a frame per broadcast tick
+#   decimated  the latest reading and the stats at DECIMATED_HZ
+#   stats      stats only at DECIMATED_HZ, e.g. a pass/NG wall display
+#   captures   important captures and SPC alarms only
+# Every (tier, protocol, gauge) is a Socket.IO room, gauge '*' meaning all of
+# them, and nothing is encoded for a room nobody is in.
+STREAM_TIERS = ('raw', 'decimated', 'stats', 'captures')
+PROTOCOLS = ('json', 'binary')
+app.config['DECIMATED_HZ'] = float(os.environ.get('GAUGE_DECIMATED_HZ', 5))
+client_streams = {}   # sid -> (protocol, tier, gauges or None for all)
+room_counts = {}      # room -> clients in it
+stream_lock = threading.Lock()
 
 # Serial port configuration, should only be 9600
-current_port = None
-current_baud = 9600
-
-# All Parameters found in Original template
-gauge_data = {
-    'current_value': 0.0,
-    'offset': 0.0,
-    'raw_value': 0.0,
-    'min': None,
-    'max': None,
-    'count': 0,
-    'button_count': 0,
-    'connected': False,
-    'tolerance': {
-        'usl': None,  # Upper Spec Limit
-        'lsl': None,  # Lower Spec Limit
-        'std': None,  # Standard/Target
-    },
-    'ng_plus': 0,   # Count over USL
-    'ng_minus': 0,  # Count under LSL
-    'pass_count': 0,
-    'sum': 0.0,     # For calculating average
-}
-
-# Data storage
-continuous_log = []
-important_log = []
-
-# Serial connection
-ser = None
-buffer = b''
-running = False
-read_thread = None
+DEFAULT_BAUD = 9600
+# Readers block until data arrives; the timeout only bounds how long a stopped
+# reader can linger on ports that can't cancel a pending read
+SERIAL_TIMEOUT = 0.5
+# How long a route waits for a gauge's reader to answer a query
+COMMAND_TIMEOUT = 2.0
+# A port that fails a read is reopened after RECONNECT_MIN seconds, doubling
+# up to RECONNECT_MAX between tries, until it comes back or is disconnected
+RECONNECT_MIN = 0.25
+RECONNECT_MAX = 10.0
+# reconnect gaps kept per gauge for /api/gauges
+GAP_HISTORY = 100
+# Seconds between serial port scans; /api/ports answers from the last scan and
+# clients get port_added / port_removed events instead of polling
+PORT_SCAN_INTERVAL = float(os.environ.get('GAUGE_PORT_SCAN_INTERVAL', 1.0))
+
+# All Parameters found in Original template, one copy per gauge
+def new_gauge_data():
+    return {
+        'current_value': 0.0,
+        'offset': 0.0,
+        'raw_value': 0.0,
+        'button_count': 0,
+        'connected': False,
+        'tolerance': {
+            'usl': None,  # Upper Spec Limit
+            'lsl': None,  # Lower Spec Limit
+            'std': None,  # Standard/Target
+        },
+        'ng_plus': 0,   # Count over USL
+        'ng_minus': 0,  # Count under LSL
+        'pass_count': 0,
+        # count/min/max/avg/std live in GaugeSession.cumulative (RunningStats)
+    }
+
+def open_store():
+    global store
+    path = app.config['STORE_PATH']
+    if store is None and path:
+        store = MeasurementStore(path, sync=app.config['STORE_SYNC'], run_blocking=run_blocking)
+        atexit.register(store.close)
+        print(f"Store: {path} ({store.recovered_rows} samples on disk, {len(store.gauge_ids)} gauges)")
+    return store
+
+# One GaugeSession per serial port, keyed by port name (which is also the gauge id)
+sessions = {}
+sessions_lock = threading.Lock()
 
 # HTML Template by claude
 HTML = """
@@ -57,7 +191,7 @@ HTML = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Gauge Monitor</title>
-    <script src="https://cdn.socket.io/4.5.4/socket.io.min.js"></script>
+    <script src="{{ socketio_js }}"></script>
     <style>
         * {
             margin: 0;
@@ -296,6 +430,27 @@ HTML = """
             color: #64748b;
         }
         
+        .histogram-canvas {
+            width: 100%;
+            height: 120px;
+            margin-top: 15px;
+            display: block;
+        }
+        .window-select {
+            margin-top: 25px;
+            font-size: 0.9em;
+            color: #64748b;
+            font-weight: 600;
+        }
+        .window-select select {
+            margin-left: 8px;
+            padding: 4px 8px;
+            border: 1px solid #cbd5e1;
+            border-radius: 6px;
+        }
+        .window-select + .stats-grid {
+            margin-top: 10px;
+        }
         .stats-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(140px, 1fr));
@@ -399,6 +554,14 @@ HTML = """
         .data-log.visible {
             display: block;
         }
+        .data-log.wide {
+            grid-column: 1 / -1;
+        }
+        .spc-summary {
+            font-size: 0.9em;
+            color: #475569;
+            margin-bottom: 15px;
+        }
         .log-header {
             display: flex;
             justify-content: space-between;
@@ -470,6 +633,15 @@ HTML = """
         .log-table tr.fail-row {
             background: #fef2f2;
         }
+        .log-table.virtual td {
+            height: 20px;
+            white-space: nowrap;
+        }
+        .log-table tr.spacer td {
+            padding: 0;
+            border: none;
+            height: auto;
+        }
         .type-button {
             color: #ef4444;
             font-weight: bold;
@@ -581,9 +753,16 @@ HTML = """
                         <span id="stdLabel">STD</span>
                         <span id="uslLabel">USL</span>
                     </div>
+                    <canvas class="histogram-canvas" id="histogram"></canvas>
                 </div>
             </div>
             
+            <div class="window-select">
+                Stats over
+                <select id="statsWindow">
+                    <option value="">everything since reset</option>
+                </select>
+            </div>
             <div class="stats-grid">
                 <div class="stat">
                     <div class="stat-label">Minimum</div>
@@ -601,6 +780,18 @@ HTML = """
                     <div class="stat-label">Range</div>
                     <div class="stat-value" id="range">---</div>
                 </div>
+                <div class="stat">
+                    <div class="stat-label">Std Dev</div>
+                    <div class="stat-value" id="std">---</div>
+                </div>
+                <div class="stat">
+                    <div class="stat-label">Cp</div>
+                    <div class="stat-value" id="cp">---</div>
+                </div>
+                <div class="stat">
+                    <div class="stat-label">Cpk</div>
+                    <div class="stat-value" id="cpk">---</div>
+                </div>
                 <div class="stat">
                     <div class="stat-label">Total</div>
                     <div class="stat-value" id="count">0</div>
@@ -641,7 +832,7 @@ HTML = """
                         <button class="btn-secondary btn-small" onclick="exportImportant()">Export</button>
                     </div>
                 </div>
-                <div class="log-table">
+                <div class="log-table virtual" id="importantScroll" onscroll="onImportantScroll()">
                     <table>
                         <thead>
                             <tr>
@@ -678,14 +869,42 @@ HTML = """
                     </table>
                 </div>
             </div>
+            
+            <div class="data-log wide" id="spcLog">
+                <div class="log-header">
+                    <div class="log-title">SPC Alarms</div>
+                    <span class="log-badge" id="spcCount">0</span>
+                </div>
+                <div class="spc-summary" id="spcSummary">Waiting for data...</div>
+                <div class="log-table">
+                    <table>
+                        <thead>
+                            <tr>
+                                <th>Time</th>
+                                <th>Chart</th>
+                                <th>Rule</th>
+                                <th>Point</th>
+                                <th>Description</th>
+                            </tr>
+                        </thead>
+                        <tbody id="spcLogBody"></tbody>
+                    </table>
+                </div>
+            </div>
         </div>
     </div>
     
     <script>
         const socket = io();
-        let importantData = [];
-        let continuousData = [];
+        // Rows rendered in the continuous log; older readings stay on the server
+        const CONTINUOUS_ROWS = 100;
+        // Captures kept in the browser; the export endpoints have all of them
+        const IMPORTANT_MAX = 200000;
+        let importantData = [];      // oldest first
+        let importantDropped = 0;    // trimmed from the front, keeps No. right
+        let continuousData = [];     // newest first, at most CONTINUOUS_ROWS
         let isConnected = false;
+        let currentGauge = null;  // gauge id (port) this dashboard is watching
         let tolerance = {usl: null, lsl: null, std: null};
         
         // Load COM ports on page load
@@ -702,12 +921,27 @@ HTML = """
                     data.ports.forEach(port => {
                         const option = document.createElement('option');
                         option.value = port.device;
-                        option.textContent = `${port.device} - ${port.description}`;
+                        option.textContent = `${port.device} - ${port.description}` + (port.in_use ? ' (in use)' : '');
                         select.appendChild(option);
                     });
                 });
         }
         
+        // the server watches for plugged/unplugged ports, no need to poll
+        socket.on('port_added', (port) => {
+            const select = document.getElementById('portSelect');
+            if ([...select.options].some(o => o.value === port.device)) return;
+            const option = document.createElement('option');
+            option.value = port.device;
+            option.textContent = `${port.device} - ${port.description}`;
+            select.appendChild(option);
+        });
+        
+        socket.on('port_removed', (port) => {
+            const select = document.getElementById('portSelect');
+            [...select.options].filter(o => o.value === port.device).forEach(o => o.remove());
+        });
+        
         function updateBaudOptions() {
             // Could auto-detect baud in future
         }
@@ -741,6 +975,8 @@ HTML = """
             .then(data => {
                 if (data.success) {
                     isConnected = true;
+                    currentGauge = data.gauge;
+                    subscribe();
                     setStatus('connected', 'Connected');
                     document.getElementById('connectBtn').textContent = 'Disconnect';
                     document.getElementById('connectBtn').classList.remove('btn-primary');
@@ -748,6 +984,7 @@ HTML = """
                     document.getElementById('gaugeCard').classList.add('visible');
                     document.getElementById('importantLog').classList.add('visible');
                     document.getElementById('continuousLog').classList.add('visible');
+                    document.getElementById('spcLog').classList.add('visible');
                 } else {
                     setStatus('disconnected', 'Connection Failed');
                     alert('Failed to connect: ' + data.error);
@@ -762,7 +999,11 @@ HTML = """
         }
         
         function disconnect() {
-            fetch('/api/disconnect', {method: 'POST'})
+            fetch('/api/disconnect', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({gauge: currentGauge})
+            })
             .then(r => r.json())
             .then(data => {
                 isConnected = false;
@@ -773,6 +1014,7 @@ HTML = """
                 document.getElementById('gaugeCard').classList.remove('visible');
                 document.getElementById('importantLog').classList.remove('visible');
                 document.getElementById('continuousLog').classList.remove('visible');
+                document.getElementById('spcLog').classList.remove('visible');
             });
         }
         
@@ -792,7 +1034,7 @@ HTML = """
             tolerance.std = isNaN(std) ? null : std;
             
             // Send to server
-            socket.emit('update_tolerance', tolerance);
+            socket.emit('update_tolerance', {...tolerance, gauge: currentGauge});
             
             // Update labels
             document.getElementById('uslLabel').textContent = tolerance.usl !== null ? tolerance.usl.toFixed(3) : 'USL';
@@ -814,7 +1056,78 @@ HTML = """
             return '';
         }
         
-        socket.on('gauge_data', (data) => {
+        // other gauges on the same server are ignored by this dashboard
+        function isMine(data) {
+            return !currentGauge || data.gauge === currentGauge;
+        }
+        
+        function windowLabel(name) {
+            return /[smh]$/.test(name) ? 'last ' + name : 'last ' + name + ' readings';
+        }
+        
+        function windowStats(data) {
+            const select = document.getElementById('statsWindow');
+            const windows = data.windows || [];
+            const names = windows.map(w => w.window);
+            const shown = Array.from(select.options).slice(1).map(o => o.value);
+            if (names.join() !== shown.join()) {
+                const keep = select.value;
+                select.length = 1;
+                names.forEach(n => select.add(new Option(windowLabel(n), n)));
+                select.value = names.includes(keep) ? keep : '';
+            }
+            return windows.find(w => w.window === select.value) || data;
+        }
+        
+        // Socket events only queue work; the DOM is touched once per animation
+        // frame however fast frames arrive, and not at all in a hidden tab
+        let pendingFrame = null;
+        let pendingButton = false;
+        let pendingSamples = [];
+        let pendingSpc = null;
+        let importantDirty = false;
+        let renderQueued = false;
+        
+        socket.on('gauge_data', queueFrame);
+        
+        function queueFrame(data) {
+            if (!isMine(data)) return;
+            pendingFrame = data;
+            pendingButton = pendingButton || data.button;
+            for (const s of data.samples || []) pendingSamples.push(s);
+            if (pendingSamples.length > 2 * CONTINUOUS_ROWS) {
+                pendingSamples = pendingSamples.slice(-CONTINUOUS_ROWS);
+            }
+            if (data.spc && data.spc.length) pendingSpc = data.spc[data.spc.length - 1];
+            scheduleRender();
+        }
+        
+        function scheduleRender() {
+            if (!renderQueued) {
+                renderQueued = true;
+                requestAnimationFrame(render);
+            }
+        }
+        
+        function render() {
+            renderQueued = false;
+            if (pendingFrame) {
+                renderFrame(pendingFrame, pendingButton);
+                pendingFrame = null;
+                pendingButton = false;
+            }
+            if (pendingSamples.length) {
+                renderContinuousLog(pendingSamples);
+                pendingSamples = [];
+            }
+            if (pendingSpc) {
+                updateSpcSummary(pendingSpc);
+                pendingSpc = null;
+            }
+            renderImportantLog();
+        }
+        
+        function renderFrame(data, button) {
             const valueEl = document.getElementById('value');
             const statusBadge = document.getElementById('statusBadge');
             
@@ -843,7 +1156,7 @@ HTML = """
                 statusBadge.textContent = 'No Tolerance Set';
             }
             
-            if (data.button) {
+            if (button) {
                 valueEl.classList.add('button-flash');
                 setTimeout(() => valueEl.classList.remove('button-flash'), 300);
             }
@@ -868,79 +1181,300 @@ HTML = """
             document.getElementById('ngPlus').textContent = data.ng_plus;
             document.getElementById('ngMinus').textContent = data.ng_minus;
             
-            if (data.min !== null) {
-                document.getElementById('min').textContent = data.min.toFixed(3);
+            // min/max/avg tiles follow the selected sliding window
+            const s = windowStats(data);
+            if (s.min !== null) {
+                document.getElementById('min').textContent = s.min.toFixed(3);
             }
-            if (data.max !== null) {
-                document.getElementById('max').textContent = data.max.toFixed(3);
+            if (s.max !== null) {
+                document.getElementById('max').textContent = s.max.toFixed(3);
             }
-            if (data.avg !== null) {
-                document.getElementById('avg').textContent = data.avg.toFixed(3);
+            if (s.avg !== null) {
+                document.getElementById('avg').textContent = s.avg.toFixed(3);
             }
-            if (data.range !== null) {
-                document.getElementById('range').textContent = data.range.toFixed(3);
+            if (s.range !== null) {
+                document.getElementById('range').textContent = s.range.toFixed(3);
             }
+            document.getElementById('std').textContent = s.std != null ? s.std.toFixed(4) : '---';
+            document.getElementById('cp').textContent = s.cp != null ? s.cp.toFixed(2) : '---';
+            document.getElementById('cpk').textContent = s.cpk != null ? s.cpk.toFixed(2) : '---';
+        }
+        
+        // Opt-in binary protocol (open the page with ?binary): one gauge_bin
+        // event per tick with packed samples and only the stats that changed.
+        // Layout is documented in gauge_wire.py.
+        const useBinary = new URLSearchParams(location.search).has('binary');
+        const STATUS_NAMES = ['none', 'pass', 'over', 'under'];
+        const CAPTURE_TYPES = ['Manual', 'Button'];
+        const STAT_FIELDS = [['count', 'u'], ['min', 'f'], ['max', 'f'], ['avg', 'f'], ['range', 'f'],
+            ['std', 'f'], ['cp', 'f'], ['cpk', 'f'], ['button_count', 'u'],
+            ['pass_count', 'u'], ['ng_plus', 'u'], ['ng_minus', 'u']];
+        const WINDOW_FIELDS = ['min', 'max', 'avg', 'range', 'std', 'cp', 'cpk'];
+        const binState = {};  // gauge -> stats built up from deltas
+        
+        // Only the gauge on screen is streamed (every gauge until one is picked).
+        // ?tier=decimated|stats|captures asks for less, e.g. on a wall display.
+        const streamTier = new URLSearchParams(location.search).get('tier') || 'raw';
+        
+        function subscribe() {
+            socket.emit('subscribe', {gauges: currentGauge ? [currentGauge] : '*', tier: streamTier});
+        }
+        
+        socket.on('connect', () => {
+            if (useBinary) socket.emit('set_protocol', {binary: true});
+            subscribe();
         });
         
-        socket.on('important_capture', (data) => {
-            addToImportantLog(data.time, data.value, data.type, data.status);
+        function formatTime(ms) {
+            const d = new Date(ms);
+            const p = (n, w) => String(n).padStart(w, '0');
+            return `${p(d.getHours(), 2)}:${p(d.getMinutes(), 2)}:${p(d.getSeconds(), 2)}.${p(d.getMilliseconds(), 3)}`;
+        }
+        
+        function decodeGaugeBin(buf) {
+            const dv = new DataView(buf);
+            const flags = dv.getUint8(1);
+            const nameLen = dv.getUint8(2);
+            let pos = 3;
+            const msg = {gauge: new TextDecoder().decode(new Uint8Array(buf, pos, nameLen))};
+            pos += nameLen;
+            const baseUs = Number(dv.getBigInt64(pos, true) / 1000n);
+            pos += 8;
+            const rows = () => {
+                const n = dv.getUint16(pos, true);
+                pos += 2;
+                const out = [];
+                for (let i = 0; i < n; i++, pos += 9) {
+                    out.push({
+                        ms: (baseUs + dv.getUint32(pos, true)) / 1000,
+                        value: dv.getInt32(pos + 4, true) / 1000,
+                        code: dv.getUint8(pos + 8) & 3,
+                        extra: dv.getUint8(pos + 8) >> 2,
+                    });
+                }
+                return out;
+            };
+            const float = () => { const v = dv.getFloat64(pos, true); pos += 8; return isNaN(v) ? null : v; };
+            if (flags & 1) msg.samples = rows();
+            if (flags & 2) msg.captures = rows();
+            if (flags & 4) {
+                const mask = dv.getUint16(pos, true);
+                pos += 2;
+                msg.stats = {};
+                STAT_FIELDS.forEach(([name, type], bit) => {
+                    if (!(mask & (1 << bit))) return;
+                    if (type === 'u') { msg.stats[name] = dv.getUint32(pos, true); pos += 4; }
+                    else msg.stats[name] = float();
+                });
+            }
+            if (flags & 16) {
+                const n = dv.getUint8(pos++);
+                msg.windows = [];
+                for (let i = 0; i < n; i++) {
+                    const len = dv.getUint8(pos++);
+                    const w = {window: new TextDecoder().decode(new Uint8Array(buf, pos, len))};
+                    pos += len;
+                    w.count = dv.getUint32(pos, true);
+                    pos += 4;
+                    WINDOW_FIELDS.forEach(f => { w[f] = float(); });
+                    msg.windows.push(w);
+                }
+            }
+            return msg;
+        }
+        
+        socket.on('gauge_bin', (buf) => {
+            const msg = decodeGaugeBin(buf);
+            if (!isMine(msg)) return;
+            const st = binState[msg.gauge] || (binState[msg.gauge] = {stats: {}, windows: [], value: 0});
+            if (msg.stats) Object.assign(st.stats, msg.stats);
+            if (msg.windows) st.windows = msg.windows;
+            (msg.captures || []).forEach(c =>
+                addToImportantLog(formatTime(c.ms), c.value, CAPTURE_TYPES[c.extra], STATUS_NAMES[c.code]));
+            if (!msg.samples && !msg.stats && !msg.windows) return;
+            const samples = (msg.samples || []).map(s =>
+                ({time: formatTime(s.ms), value: s.value, status: STATUS_NAMES[s.code], button: s.extra === 1}));
+            if (samples.length) st.value = samples[samples.length - 1].value;
+            queueFrame(Object.assign({}, st.stats, {
+                gauge: msg.gauge, value: st.value, windows: st.windows,
+                button: samples.some(s => s.button), samples,
+            }));
+        });
+        
+        function updateSpcSummary(point) {
+            const el = document.getElementById('spcSummary');
+            if (point.cl === undefined) {
+                el.textContent = 'Collecting baseline...';
+                return;
+            }
+            const phase = point.phase === 'monitor' ? 'Monitoring' : 'Baseline (limits still moving)';
+            el.textContent = `${phase} | X: CL ${point.cl.toFixed(4)}, UCL ${point.ucl.toFixed(4)}, ` +
+                `LCL ${point.lcl.toFixed(4)} | R: CL ${point.r_cl.toFixed(4)}, UCL ${point.r_ucl.toFixed(4)}`;
+        }
+        
+        socket.on('histogram', (data) => {
+            if (!isMine(data)) return;
+            drawHistogram(data);
+        });
+        
+        function drawHistogram(h) {
+            const canvas = document.getElementById('histogram');
+            const w = canvas.width = canvas.clientWidth;
+            const ht = canvas.height = canvas.clientHeight;
+            const ctx = canvas.getContext('2d');
+            ctx.clearRect(0, 0, w, ht);
+            const n = h.counts.length;
+            if (!n) return;
+            const peak = Math.max(...h.counts, 1);
+            const bw = w / n;
+            const x = v => (v - h.origin) / (h.width * n) * w;
+            h.counts.forEach((c, i) => {
+                const mid = h.origin + (i + 0.5) * h.width;
+                const out = (h.usl !== null && mid > h.usl) || (h.lsl !== null && mid < h.lsl);
+                ctx.fillStyle = out ? '#f87171' : '#667eea';
+                const bh = c / peak * (ht - 4);
+                ctx.fillRect(i * bw, ht - bh, Math.max(1, bw - 1), bh);
+            });
+            ctx.strokeStyle = '#1e293b';
+            [h.lsl, h.std, h.usl].forEach(v => {
+                if (v === null) return;
+                ctx.beginPath();
+                ctx.moveTo(x(v), 0);
+                ctx.lineTo(x(v), ht);
+                ctx.stroke();
+            });
+        }
+        
+        socket.on('spc_violation', (data) => {
+            if (!isMine(data)) return;
+            const tbody = document.getElementById('spcLogBody');
+            if (tbody.rows.length >= 200) {
+                tbody.deleteRow(tbody.rows.length - 1);
+            }
+            const row = tbody.insertRow(0);
+            row.className = 'fail-row';
+            row.insertCell(0).textContent = data.time;
+            row.insertCell(1).textContent = data.chart === 'r' ? 'R' : 'X';
+            row.insertCell(2).textContent = data.rule;
+            row.insertCell(3).textContent = (data.chart === 'r' ? data.r : data.x).toFixed(4);
+            row.insertCell(4).textContent = data.message;
+            const badge = document.getElementById('spcCount');
+            badge.textContent = parseInt(badge.textContent) + 1;
         });
         
-        socket.on('continuous_update', (data) => {
-            addToContinuousLog(data.time, data.value, data.status);
+        // the server reopens a dropped port by itself; counters and logs carry on
+        socket.on('gauge_link', (data) => {
+            if (!isMine(data) || !isConnected) return;
+            if (data.connected) {
+                setStatus('connected', `Connected (reconnected after ${data.gap_s.toFixed(1)}s)`);
+            } else {
+                setStatus('checking', 'Reconnecting...');
+            }
+        });
+        
+        socket.on('important_capture', (data) => {
+            if (!isMine(data)) return;
+            addToImportantLog(data.time, data.value, data.type, data.status);
         });
         
         function addToImportantLog(time, value, type, status) {
-            const tbody = document.getElementById('importantLogBody');
-            const row = tbody.insertRow(0);
-            
-            const rowClass = status === 'pass' ? 'pass-row' : (status !== 'none' ? 'fail-row' : '');
-            row.className = rowClass;
+            importantData.push({time, value, type, status});
+            if (importantData.length > IMPORTANT_MAX + IMPORTANT_MAX / 10) {
+                const cut = importantData.length - IMPORTANT_MAX;
+                importantData.splice(0, cut);
+                importantDropped += cut;
+            }
+            importantDirty = true;
+            scheduleRender();
+        }
+        
+        function rowClass(status) {
+            return status === 'pass' ? 'pass-row' : (status !== 'none' ? 'fail-row' : '');
+        }
+        
+        // Virtualized: only the rows in view (plus a margin) exist in the DOM,
+        // two spacer rows stand in for the rest. Newest capture on top.
+        let importantRowHeight = 45;
+        let importantShown = 0;   // captures on screen at the last render
+        let importantScrolled = false;
+        
+        function onImportantScroll() {
+            importantScrolled = true;
+            scheduleRender();
+        }
+        
+        function renderImportantLog() {
+            const scroller = document.getElementById('importantScroll');
+            const total = importantData.length;
+            if (!importantDirty && !importantScrolled) return;
+            importantScrolled = false;
+            const added = total + importantDropped - importantShown;
+            // keep the rows the user is looking at still when new ones land on top
+            if (importantDirty && added > 0 && scroller.scrollTop > 0) {
+                scroller.scrollTop += added * importantRowHeight;
+            }
+            importantShown = total + importantDropped;
+            importantDirty = false;
+            document.getElementById('importantCount').textContent = importantShown;
             
-            const typeClass = type === 'Button' ? 'type-button' : 'type-manual';
+            const view = scroller.clientHeight || 400;
+            const first = Math.max(0, Math.floor(scroller.scrollTop / importantRowHeight) - 10);
+            const last = Math.min(total, first + Math.ceil(view / importantRowHeight) + 20);
             
-            const count = tbody.rows.length;
-            row.insertCell(0).textContent = count;
-            row.insertCell(1).textContent = time;
-            row.insertCell(2).textContent = value.toFixed(3);
-            row.insertCell(3).innerHTML = getErrBadge(status);
-            const typeCell = row.insertCell(4);
-            typeCell.textContent = type;
-            typeCell.className = typeClass;
+            const tbody = document.getElementById('importantLogBody');
+            const rows = [];
+            rows.push(`<tr class="spacer"><td colspan="5" style="height:${first * importantRowHeight}px"></td></tr>`);
+            for (let i = first; i < last; i++) {
+                const idx = total - 1 - i;
+                const row = importantData[idx];
+                const typeClass = row.type === 'Button' ? 'type-button' : 'type-manual';
+                rows.push(`<tr class="${rowClass(row.status)}"><td>${idx + 1 + importantDropped}</td>` +
+                    `<td>${row.time}</td><td>${row.value.toFixed(3)}</td><td>${getErrBadge(row.status)}</td>` +
+                    `<td class="${typeClass}">${row.type}</td></tr>`);
+            }
+            rows.push(`<tr class="spacer"><td colspan="5" style="height:${(total - last) * importantRowHeight}px"></td></tr>`);
+            tbody.innerHTML = rows.join('');
             
-            importantData.unshift({time, value, type, status});
-            document.getElementById('importantCount').textContent = importantData.length;
+            // measure once real rows exist, so the spacers match the CSS
+            if (last > first) {
+                const h = tbody.rows[1].getBoundingClientRect().height;
+                if (h > 0) importantRowHeight = h;
+            }
         }
         
-        function addToContinuousLog(time, value, status) {
-            const tbody = document.getElementById('continuousLogBody');
+        function renderContinuousLog(samples) {
+            // newest first, and only the rows that fit in CONTINUOUS_ROWS
+            const fresh = samples.slice(-CONTINUOUS_ROWS).reverse();
+            continuousData = fresh.concat(continuousData).slice(0, CONTINUOUS_ROWS);
             
-            if (tbody.rows.length > 100) {
-                tbody.deleteRow(100);
+            // reuse the rows already in the table instead of building new ones
+            const tbody = document.getElementById('continuousLogBody');
+            while (tbody.rows.length < continuousData.length) {
+                const row = tbody.insertRow();
+                row.insertCell(0);
+                row.insertCell(1);
+                row.insertCell(2);
             }
-            
-            const row = tbody.insertRow(0);
-            const rowClass = status === 'pass' ? 'pass-row' : (status !== 'none' ? 'fail-row' : '');
-            row.className = rowClass;
-            
-            row.insertCell(0).textContent = time;
-            row.insertCell(1).textContent = value.toFixed(3);
-            row.insertCell(2).innerHTML = getErrBadge(status);
-            
-            continuousData.push({time, value, status});
+            continuousData.forEach((s, i) => {
+                const row = tbody.rows[i];
+                row.className = rowClass(s.status);
+                row.cells[0].textContent = s.time;
+                row.cells[1].textContent = s.value.toFixed(3);
+                row.cells[2].innerHTML = getErrBadge(s.status);
+            });
         }
         
         function zero() {
-            socket.emit('command', {cmd: 'zero'});
+            socket.emit('command', {cmd: 'zero', gauge: currentGauge});
         }
         
         function capture() {
-            socket.emit('command', {cmd: 'capture'});
+            socket.emit('command', {cmd: 'capture', gauge: currentGauge});
         }
         
         function resetStats() {
             if (confirm('Reset all statistics? This will not delete captured data.')) {
-                socket.emit('command', {cmd: 'reset_stats'});
+                socket.emit('command', {cmd: 'reset_stats', gauge: currentGauge});
             }
         }
         
@@ -956,7 +1490,7 @@ HTML = """
                 filename += '.csv';
             }
             
-            window.location.href = `/export/important?filename=${encodeURIComponent(filename)}`;
+            window.location.href = `/export/important?filename=${encodeURIComponent(filename)}&gauge=${encodeURIComponent(currentGauge || '')}`;
         }
         
         function exportContinuous() {
@@ -971,307 +1505,1414 @@ HTML = """
                 filename += '.csv';
             }
             
-            window.location.href = `/export/continuous?filename=${encodeURIComponent(filename)}`;
+            window.location.href = `/export/continuous?filename=${encodeURIComponent(filename)}&gauge=${encodeURIComponent(currentGauge || '')}`;
         }
     </script>
 </body>
 </html>
 """
 
+# HTML has nothing that changes per request, so the page is rendered once here
+# and served from memory with an ETag and a gzip copy
+assets = {}
+
+
+def build_assets():
+    path = app.config['SOCKETIO_JS']
+    if path.startswith(('http://', 'https://')):
+        # asked for explicitly, never a silent fallback
+        socketio_js = path
+    elif os.path.isfile(path):
+        with open(path, 'rb') as f:
+            client = StaticAsset(f.read(), 'application/javascript', os.path.getmtime(path), IMMUTABLE)
+        # the hash in the URL lets browsers keep it forever
+        socketio_js = f'/static/socket.io.{client.etag[:8]}.min.js'
+        assets[socketio_js] = client
+    else:
+        print(f"Socket.IO client not found at {path}, the dashboard cannot connect "
+              f"(set GAUGE_SOCKETIO_JS to the file or to a CDN URL)")
+        socketio_js = '/static/socket.io.min.js'
+    page = app.jinja_env.from_string(HTML).render(socketio_js=socketio_js)
+    assets['/'] = StaticAsset(page, 'text/html', os.path.getmtime(__file__))
+
+build_assets()
+
 @app.route('/')
 def index():
-    return render_template_string(HTML)
+    return assets['/'].response(request)
+
+@app.route('/static/<name>')
+def static_asset(name):
+    asset = assets.get('/static/' + name)
+    if asset is None:
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    return asset.response(request)
 
 @app.route('/api/ports')
 def get_ports():
-    ports = serial.tools.list_ports.comports()
-    port_list = [{'device': p.device, 'description': p.description} for p in ports]
+    port_watcher.start()
+    ports = port_watcher.snapshot()
+    with sessions_lock:
+        open_ports = {s.device for s in sessions.values() if s.is_open}
+    port_list = [dict(p, in_use=p['device'] in open_ports) for p in ports.values()]
     return jsonify({'ports': port_list})
 
+@app.route('/api/gauges')
+def get_gauges():
+    with sessions_lock:
+        gauges = [s.info() for s in sessions.values()]
+    return jsonify({'gauges': gauges})
+
 @app.route('/api/connect', methods=['POST'])
 def connect():
-    global ser, running, read_thread, current_port, current_baud, buffer
+    data = request.json or {}
+    baud = data.get('baud', DEFAULT_BAUD)
     
-    data = request.json
-    port = data.get('port')
-    baud = data.get('baud', 9600)
+    # either a single 'port' (old clients) or a list of 'ports'
+    ports = data.get('ports') or [data.get('port')]
+    ports = [p for p in ports if p]
+    if not ports:
+        return jsonify({'success': False, 'error': 'No port given'})
     
-    try:
-        # Close existing connection
-        if ser and ser.is_open:
-            ser.close()
-        
-        # Open new connection
-        ser = serial.Serial(port, baud, timeout=0.1)
-        ser.reset_input_buffer()
-        buffer = b''
-        
-        current_port = port
-        current_baud = baud
-        gauge_data['connected'] = True
-        
-        # Reset all parameters
-        gauge_data['count'] = 0
-        gauge_data['button_count'] = 0
-        gauge_data['min'] = None
-        gauge_data['max'] = None
-        gauge_data['ng_plus'] = 0
-        gauge_data['ng_minus'] = 0
-        gauge_data['pass_count'] = 0
-        gauge_data['sum'] = 0.0
-        continuous_log.clear()
-        important_log.clear()
-        
-        # Start reading thread
-        if read_thread and read_thread.is_alive():
-            running = False
-            read_thread.join(timeout=1)
-        
-        running = True
-        read_thread = threading.Thread(target=read_serial, daemon=True)
-        read_thread.start()
-        
+    opened = []
+    errors = {}
+    for port in ports:
+        with sessions_lock:
+            session = sessions.get(port)
+            created = session is None
+            if created:
+                session = GaugeSession(port)
+                sessions[port] = session
+        try:
+            session.open(baud)
+            opened.append(port)
+            broadcaster.start()
+            port_watcher.start()
+        except Exception as e:
+            errors[port] = str(e)
+            # a port that never opened must not stay behind as a gauge
+            if created:
+                with sessions_lock:
+                    if sessions.get(port) is session:
+                        del sessions[port]
+    
+    if opened:
         time.sleep(0.5)
-        
-        return jsonify({'success': True, 'port': port, 'baud': baud})
-        
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+    
+    if len(ports) == 1:
+        port = ports[0]
+        if errors:
+            return jsonify({'success': False, 'error': errors[port]})
+        return jsonify({'success': True, 'port': port, 'gauge': port, 'baud': baud})
+    
+    return jsonify({'success': bool(opened), 'gauges': opened, 'baud': baud, 'errors': errors})
 
 @app.route('/api/disconnect', methods=['POST'])
 def disconnect():
-    global ser, running
+    data = request.get_json(silent=True) or {}
+    gauge = data.get('gauge') or data.get('port')
     
-    running = False
-    if ser and ser.is_open:
-        ser.close()
-    gauge_data['connected'] = False
+    with sessions_lock:
+        targets = [sessions[gauge]] if gauge in sessions else ([] if gauge else list(sessions.values()))
+    for session in targets:
+        session.close()
     
-    return jsonify({'success': True})
+    return jsonify({'success': True, 'gauges': [s.gauge_id for s in targets]})
 
-@app.route('/export/important')
-def export_important():
-    custom_name = request.args.get('filename', '')
+def find_session(gauge_id):
+    # with no id given, fall back to the only (or most recently connected) gauge
+    with sessions_lock:
+        if gauge_id:
+            return sessions.get(gauge_id)
+        if not sessions:
+            return None
+        return max(sessions.values(), key=lambda s: s.connected_at)
+
+def usb_identity(device):
+    # (vid, pid, serial_number) of a USB serial adapter, None for anything else
+    p = port_watcher.snapshot().get(device)
+    if p is None or p['vid'] is None:
+        return None
+    return (p['vid'], p['pid'], p['serial_number'])
+
+def format_ts(ts_ns):
+    return datetime.fromtimestamp(ts_ns / 1e9).strftime('%H:%M:%S.%f')[:-3]
+
+def status_label(status):
+    if status == 'over':
+        return '+Err'
+    elif status == 'under':
+        return '-Err'
+    elif status == 'pass':
+        return 'Pass'
+    return ''
+
+def export_filename(prefix, ext):
+    # the client only picks the download name; nothing is written on the server
+    custom_name = os.path.basename(request.args.get('filename', '').replace('\\', '/'))
+    custom_name = re.sub(r'[^\w.() -]+', '_', custom_name).strip()
     if custom_name:
-        filename = custom_name
+        if ext == 'bin' and custom_name.endswith('.csv'):
+            custom_name = custom_name[:-4] + '.bin'
+        return custom_name
+    return f'{prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{ext}'
+
+def parse_time_arg(name):
+    # epoch seconds or an ISO-8601 local time, returned as epoch ns
+    text = request.args.get(name, '').strip()
+    if not text:
+        return None
+    try:
+        return int(float(text) * 1_000_000_000)
+    except ValueError:
+        pass
+    return int(datetime.fromisoformat(text).timestamp() * 1_000_000_000)
+
+def export_args(prefix):
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'bin'):
+        return None, ({'success': False, 'error': f'Unknown format: {fmt}'}, 400)
+    source = request.args.get('source', 'memory')
+    if source not in ('memory', 'store'):
+        return None, ({'success': False, 'error': f'Unknown source: {source}'}, 400)
+    if source == 'store' and store is None:
+        return None, ({'success': False, 'error': 'Store is disabled'}, 400)
+    
+    # the store keeps gauges from before a restart, so it needs no session
+    gauge = request.args.get('gauge')
+    session = find_session(gauge)
+    if source == 'store':
+        gauge = gauge or (session.gauge_id if session is not None else None)
+        if gauge not in store.gauge_ids:
+            return None, ({'success': False, 'error': 'Unknown gauge'}, 404)
+    elif session is None:
+        return None, ({'success': False, 'error': 'Unknown gauge'}, 404)
     else:
-        filename = f'important_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    
-    filepath = os.path.join(os.getcwd(), filename)
-    
-    with open(filepath, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['No.', 'Timestamp', 'Value (mm)', 'Status', 'Type'])
-        for idx, row in enumerate(important_log, 1):
-            status_text = row.get('status', 'none')
-            if status_text == 'over':
-                status_text = '+Err'
-            elif status_text == 'under':
-                status_text = '-Err'
-            elif status_text == 'pass':
-                status_text = 'Pass'
-            else:
-                status_text = ''
+        gauge = session.gauge_id
+    try:
+        start_ns = parse_time_arg('start')
+        end_ns = parse_time_arg('end')
+    except ValueError as e:
+        return None, ({'success': False, 'error': f'Bad time range: {e}'}, 400)
+    
+    return (gauge, session, fmt, source, start_ns, end_ns, export_filename(prefix, fmt)), None
+
+def timed_export(chunks, kind, fmt):
+    t = time.perf_counter()
+    try:
+        yield from chunks
+    finally:
+        export_duration_seconds.labels(kind, fmt).observe(time.perf_counter() - t)
+
+def content_disposition(filename):
+    # headers are latin-1, so non-ASCII names go in filename* (RFC 6266) with
+    # an ASCII fallback, the same way send_file does it
+    try:
+        filename.encode('ascii')
+        return f'attachment; filename="{filename}"'
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+        return f'attachment; filename="{simple}"; filename*=UTF-8\'\'{quote(filename, safe="!#$&+-.^_`|~")}'
+
+def stream_export(chunks, filename, fmt, kind):
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/octet-stream'
+    return Response(timed_export(chunks, kind, fmt), mimetype=mimetype,
+                    headers={'Content-Disposition': content_disposition(filename),
+                             'Cache-Control': 'no-store'})
+
+def important_slice(log, start_ns, end_ns):
+    # important_log is append-only between reconnects and in time order, so
+    # the rows in range at request time are an index range
+    count = len(log)
+    lo = bisect_left(log, start_ns, 0, count, key=lambda r: r['ts_ns']) if start_ns is not None else 0
+    hi = bisect_right(log, end_ns, lo, count, key=lambda r: r['ts_ns']) if end_ns is not None else count
+    return lo, hi
+
+def iter_important_csv(log, lo, hi):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['No.', 'Timestamp', 'Value (mm)', 'Status', 'Type'])
+    yield out.getvalue()
+    
+    for start in range(lo, hi, EXPORT_CHUNK_ROWS):
+        out.seek(0)
+        out.truncate()
+        for idx, row in enumerate(log[start:min(start + EXPORT_CHUNK_ROWS, hi)], start + 1):
+            status_text = status_label(row.get('status', 'none'))
             writer.writerow([idx, row['time'], f"{row['value']:.3f}", status_text, row['type']])
+        yield out.getvalue()
+
+def iter_continuous_csv(blocks):
+    yield 'Timestamp,Value (mm),Status\r\n'
     
-    return send_file(filepath, as_attachment=True, download_name=filename)
+    labels = [status_label(name) for name in STATUS_NAMES]
+    last_sec = None
+    hms = ''
+    for ts, values, status in blocks:
+        lines = []
+        for ts_ns, value, code in zip(ts, values, status):
+            # strftime once per second instead of once per row
+            sec, ns = divmod(ts_ns, 1_000_000_000)
+            if sec != last_sec:
+                last_sec = sec
+                hms = datetime.fromtimestamp(sec).strftime('%H:%M:%S')
+            lines.append(f"{hms}.{ns // 1_000_000:03d},{value:.3f},{labels[code]}\r\n")
+        yield ''.join(lines)
+
+def iter_important_bin(log, lo, hi, header):
+    yield header
+    pack = IMPORTANT_RECORD.pack
+    types = {name: code for code, name in enumerate(CAPTURE_TYPES)}
+    for start in range(lo, hi, EXPORT_CHUNK_ROWS):
+        yield b''.join(pack(row['ts_ns'], row['value'], STATUS_CODES[row['status']], types[row['type']])
+                       for row in log[start:min(start + EXPORT_CHUNK_ROWS, hi)])
+
+def iter_continuous_bin(blocks, header):
+    yield header
+    pack = CONTINUOUS_RECORD.pack
+    for ts, values, status in blocks:
+        yield b''.join(map(pack, ts, values, status))
+
+@app.route('/export/important')
+def export_important():
+    args, error = export_args('important_data')
+    if error:
+        return jsonify(error[0]), error[1]
+    gauge, session, fmt, source, start_ns, end_ns, filename = args
+    
+    if source == 'store':
+        # captures are few, so the whole range is read up front
+        log = [{'ts_ns': ts_ns, 'time': format_ts(ts_ns), 'value': value,
+                'status': STATUS_NAMES[code], 'type': CAPTURE_TYPES[kind]}
+               for ts_ns, value, code, kind in store.captures(gauge, start_ns, end_ns)]
+        lo, hi = 0, len(log)
+    else:
+        log = session.important_log
+        lo, hi = important_slice(log, start_ns, end_ns)
+    if fmt == 'bin':
+        header = bin_header(IMPORTANT_RECORD, IMPORTANT_DTYPE, kind='important', gauge=gauge,
+                            source=source, start_ns=start_ns, end_ns=end_ns, types=list(CAPTURE_TYPES))
+        return stream_export(iter_important_bin(log, lo, hi, header), filename, fmt, 'important')
+    return stream_export(iter_important_csv(log, lo, hi), filename, fmt, 'important')
 
 @app.route('/export/continuous')
 def export_continuous():
-    custom_name = request.args.get('filename', '')
-    if custom_name:
-        filename = custom_name
+    args, error = export_args('continuous_data')
+    if error:
+        return jsonify(error[0]), error[1]
+    gauge, session, fmt, source, start_ns, end_ns, filename = args
+    
+    if source == 'store':
+        blocks = store.blocks(gauge, start_ns, end_ns, block=EXPORT_CHUNK_ROWS)
     else:
-        filename = f'continuous_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    
-    filepath = os.path.join(os.getcwd(), filename)
-    
-    with open(filepath, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Timestamp', 'Value (mm)', 'Status'])
-        for row in continuous_log:
-            status_text = row.get('status', 'none')
-            if status_text == 'over':
-                status_text = '+Err'
-            elif status_text == 'under':
-                status_text = '-Err'
-            elif status_text == 'pass':
-                status_text = 'Pass'
-            else:
-                status_text = ''
-            writer.writerow([row['time'], f"{row['value']:.3f}", status_text])
+        blocks = session.continuous_log.blocks(start_ns, end_ns, block=EXPORT_CHUNK_ROWS)
+    if fmt == 'bin':
+        header = bin_header(CONTINUOUS_RECORD, CONTINUOUS_DTYPE, kind='continuous', gauge=gauge,
+                            source=source, start_ns=start_ns, end_ns=end_ns)
+        return stream_export(iter_continuous_bin(blocks, header), filename, fmt, 'continuous')
+    return stream_export(iter_continuous_csv(blocks), filename, fmt, 'continuous')
+
+def history_for(gauge, source, start_ns, end_ns, points, method):
+    session = find_session(gauge) if source == 'memory' else None
+    if source == 'memory' and session is None:
+        return None
+    
+    if end_ns is None:
+        end_ns = time.time_ns()
+    if start_ns is None:
+        # default to everything we have for this gauge
+        if source == 'store':
+            start_ns = store.time_range(gauge)[0]
+        else:
+            first = next(session.continuous_log.rows(), None)
+            start_ns = first[0] if first else None
+    result = {'gauge': gauge, 'mode': 'raw', 'count': 0, 't': [], 'v': []}
+    if start_ns is None or start_ns > end_ns:
+        return result
     
-    return send_file(filepath, as_attachment=True, download_name=filename)
+    # lttb picks its points from a finer min/max series
+    buckets = max(1, (points - 2) // 2) if method == 'minmax' else points * 2
+    width = bucket_width(start_ns, end_ns, buckets)
+    b0, b1 = start_ns // width, end_ns // width
+    if source == 'store':
+        aggs = history_cache.get(gauge, width, b0, b1,
+                                 lambda lo, hi: store.aggregate(gauge, lo, hi, width))
+    else:
+        aggs = aggregate_blocks(session.continuous_log.blocks(start_ns, end_ns), width)
+    total = sum(agg[0] for agg in aggs.values())
+    result['count'] = total
+    
+    if total <= points:
+        # small enough to send as is
+        if source == 'store':
+            blocks = store.blocks(gauge, start_ns, end_ns)
+        else:
+            blocks = session.continuous_log.blocks(start_ns, end_ns)
+        ts, values = [], []
+        for block_ts, block_values, _ in blocks:
+            ts.extend(block_ts)
+            values.extend(block_values)
+    else:
+        ts, values = minmax_points(aggs)
+        # aligned edge buckets can reach past the requested range
+        keep = [i for i, t in enumerate(ts) if start_ns <= t <= end_ns]
+        if len(keep) != len(ts):
+            ts = [ts[i] for i in keep]
+            values = [values[i] for i in keep]
+        if method == 'lttb':
+            ts, values = lttb(ts, values, points)
+        result['mode'] = method
+        result['width_ms'] = width / 1_000_000
+    
+    result['t'] = [t // 1_000_000 for t in ts]
+    result['v'] = [round(v, 3) for v in values]
+    return result
+
+@app.route('/api/history')
+def get_history():
+    try:
+        start_ns = parse_time_arg('start')
+        end_ns = parse_time_arg('end')
+        points = int(request.args.get('points', 1000))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Bad argument: {e}'}), 400
+    points = max(3, min(points, HISTORY_MAX_POINTS))
+    
+    method = request.args.get('method', 'minmax')
+    if method not in ('minmax', 'lttb'):
+        return jsonify({'success': False, 'error': f'Unknown method: {method}'}), 400
+    source = request.args.get('source') or ('store' if store is not None else 'memory')
+    if source not in ('memory', 'store') or (source == 'store' and store is None):
+        return jsonify({'success': False, 'error': f'Source not available: {source}'}), 400
+    
+    gauges = [g for arg in request.args.getlist('gauge') for g in arg.split(',') if g]
+    if not gauges:
+        if source == 'store':
+            gauges = sorted(store.gauge_ids)
+        else:
+            with sessions_lock:
+                gauges = list(sessions)
+    
+    results = []
+    for gauge in gauges:
+        result = history_for(gauge, source, start_ns, end_ns, points, method)
+        if result is not None:
+            results.append(result)
+    
+    return jsonify({'success': True, 'source': source, 'points': points, 'gauges': results,
+                    'cache': {'hits': history_cache.hits, 'misses': history_cache.misses}})
+
+@app.route('/api/stats')
+def get_stats():
+    # merged across gauges, and across hourly partitions when a range is given;
+    # start_ns/end_ns give the whole hours that were used
+    gauges = [g for arg in request.args.getlist('gauge') for g in arg.split(',') if g]
+    with sessions_lock:
+        selected = [sessions[g] for g in gauges if g in sessions] if gauges else list(sessions.values())
+    try:
+        start_ns = parse_time_arg('start')
+        end_ns = parse_time_arg('end')
+        usl = request.args.get('usl', type=float)
+        lsl = request.args.get('lsl', type=float)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Bad argument: {e}'}), 400
+    
+    # without explicit limits use the gauges' own, if they all agree
+    if usl is None and lsl is None and selected:
+        limits = {(s.snapshot['tolerance']['usl'], s.snapshot['tolerance']['lsl']) for s in selected}
+        if len(limits) == 1:
+            usl, lsl = limits.pop()
+    
+    merged = RunningStats()
+    per_gauge = {}
+    covered = []
+    for session in selected:
+        if start_ns is None and end_ns is None:
+            part = session.call(session.cumulative.copy)
+            first = last = None
+        else:
+            # whole hours only, so say which ones went in
+            part, first, last = session.call(session.partitions.query_span, start_ns, end_ns)
+            if first is not None:
+                covered.append((first, last))
+        per_gauge[session.gauge_id] = dict(part.as_dict(usl, lsl), start_ns=first, end_ns=last)
+        merged.merge(part)
+    
+    return jsonify({'success': True, 'usl': usl, 'lsl': lsl,
+                    'start_ns': min(c[0] for c in covered) if covered else None,
+                    'end_ns': max(c[1] for c in covered) if covered else None,
+                    'merged': merged.as_dict(usl, lsl), 'gauges': per_gauge})
+
+@app.route('/api/spc')
+def get_spc():
+    gauges = [g for arg in request.args.getlist('gauge') for g in arg.split(',') if g]
+    with sessions_lock:
+        selected = [sessions[g] for g in gauges if g in sessions] if gauges else list(sessions.values())
+    return jsonify({'success': True, 'gauges': [session.call(session.spc_info) for session in selected]})
+
+@app.route('/api/histogram')
+def get_histogram():
+    # bins start at origin and are width mm wide; under/over sit outside them
+    gauges = [g for arg in request.args.getlist('gauge') for g in arg.split(',') if g]
+    with sessions_lock:
+        selected = [sessions[g] for g in gauges if g in sessions] if gauges else list(sessions.values())
+    return jsonify({'success': True, 'gauges': [session.call(session.histogram_snapshot) for session in selected]})
+
+@app.route('/metrics')
+def metrics():
+    w = MetricsWriter()
+    with sessions_lock:
+        active = list(sessions.values())
+    for session in active:
+        gauge = session.gauge_id
+        data = session.snapshot['stats']
+        w.add('gauge_connected', 'gauge', 'Serial port is open.', int(session.is_open), gauge=gauge)
+        w.add('gauge_packets_decoded_total', 'counter', 'Frames decoded.', session.parser.frames, gauge=gauge)
+        w.add('gauge_bad_frames_total', 'counter', 'Framed packets with invalid digits.',
+              session.parser.bad_frames, gauge=gauge)
+        w.add('gauge_resync_bytes_dropped_total', 'counter', 'Bytes skipped while resyncing.',
+              session.parser.dropped_bytes, gauge=gauge)
+        w.add('gauge_read_errors_total', 'counter', 'Serial read errors.', session.read_errors, gauge=gauge)
+        w.add('gauge_reconnects_total', 'counter', 'Times the port was reopened after a dropout.',
+              session.reconnects, gauge=gauge)
+        w.add('gauge_link_down_seconds_total', 'counter', 'Time spent reconnecting after dropouts.',
+              session.downtime(), gauge=gauge)
+        w.add('gauge_readings', 'gauge', 'Readings since connect or reset_stats.', data['count'], gauge=gauge)
+        w.add('gauge_button_presses', 'gauge', 'Button presses since connect or reset_stats.',
+              data['button_count'], gauge=gauge)
+        for result, key in (('pass', 'pass_count'), ('ng_plus', 'ng_plus'), ('ng_minus', 'ng_minus')):
+            w.add('gauge_tolerance_results', 'gauge', 'Pass/NG counts since connect or reset_stats.',
+                  data[key], gauge=gauge, result=result)
+        w.add('gauge_log_rows', 'gauge', 'Rows held per log.', len(session.continuous_log),
+              gauge=gauge, log='continuous')
+        w.add('gauge_log_rows', 'gauge', 'Rows held per log.', len(session.important_log),
+              gauge=gauge, log='important')
+        w.add('gauge_log_evicted_rows_total', 'counter', 'Continuous log rows evicted from memory.',
+              session.continuous_log.evicted, gauge=gauge)
+        w.add('gauge_spc_violations_total', 'counter', 'SPC rule violations since the limits froze.',
+              session.spc.violations, gauge=gauge)
+        w.add('gauge_pending_samples', 'gauge', 'Readings waiting for the next broadcast.',
+              len(session.pending), gauge=gauge)
+    w.add('gauge_socket_clients', 'gauge', 'Connected Socket.IO clients.', socket_clients)
+    with stream_lock:
+        streams = list(client_streams.values())
+    for protocol in PROTOCOLS:
+        for tier in STREAM_TIERS:
+            w.add('gauge_socket_subscriptions', 'gauge', 'Socket.IO clients per protocol and stream tier.',
+                  sum(1 for p, t, _ in streams if p == protocol and t == tier), protocol=protocol, tier=tier)
+    if store is not None:
+        w.add('gauge_store_rows_written_total', 'counter', 'Rows committed to the store.', store.written)
+        w.add('gauge_store_batches_total', 'counter', 'Store commits.', store.batches)
+        w.add('gauge_store_errors_total', 'counter', 'Failed store commits.', store.errors)
+        w.add('gauge_store_backlog', 'gauge', 'Rows queued for the store.', store.backlog)
+    body = w.render((read_to_emit_seconds, export_duration_seconds))
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@socketio.on('connect')
+def handle_connect():
+    global socket_clients
+    socket_clients += 1
+    set_client_stream(request.sid, 'json', 'raw', None)
+    port_watcher.start()
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    global socket_clients
+    socket_clients -= 1
+    # Socket.IO drops the rooms themselves, only our counts need fixing
+    with stream_lock:
+        old = client_streams.pop(request.sid, None)
+        if old:
+            for room in stream_rooms(*old):
+                room_counts[room] -= 1
+
+def stream_room(tier, protocol, gauge):
+    return f'{tier}:{protocol}:{gauge}'
+
+def stream_rooms(protocol, tier, gauges):
+    return {stream_room(tier, protocol, gauge) for gauge in (gauges or ('*',))}
+
+def set_client_stream(sid, protocol=None, tier=None, gauges=False):
+    # None/False keep the current protocol/tier/gauges; gauges=None means all
+    with stream_lock:
+        old = client_streams.get(sid)
+        if old is not None:
+            protocol = protocol or old[0]
+            tier = tier or old[1]
+            if gauges is False:
+                gauges = old[2]
+        old_rooms = stream_rooms(*old) if old else set()
+        new = (protocol, tier, gauges or None)
+        new_rooms = stream_rooms(*new)
+        for room in old_rooms - new_rooms:
+            leave_room(room, sid=sid)
+            room_counts[room] -= 1
+        for room in new_rooms - old_rooms:
+            join_room(room, sid=sid)
+            room_counts[room] = room_counts.get(room, 0) + 1
+        client_streams[sid] = new
+    return new
+
+def listeners(gauge, protocols, tiers):
+    # rooms with anyone in them that want this gauge's events; empty means
+    # the event doesn't need encoding at all
+    rooms = []
+    for protocol in protocols:
+        for tier in tiers:
+            for name in (gauge, '*'):
+                room = stream_room(tier, protocol, name)
+                if room_counts.get(room):
+                    rooms.append(room)
+    return rooms
+
+def keyframe_binary(tier, gauges):
+    # a new binary listener has no stats to apply deltas to yet
+    with sessions_lock:
+        targets = [s for g, s in sessions.items() if gauges is None or g in gauges]
+    for session in targets:
+        if tier in session.wire:
+            session.wire[tier].keyframe = True
+
+@socketio.on('set_protocol')
+def handle_set_protocol(data):
+    protocol = 'binary' if data.get('binary') else 'json'
+    _, tier, gauges = set_client_stream(request.sid, protocol=protocol)
+    if protocol == 'binary':
+        keyframe_binary(tier, gauges)
+    return {'success': True, 'protocol': protocol}
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    data = data or {}
+    tier = data.get('tier', 'raw')
+    if tier not in STREAM_TIERS:
+        return {'success': False, 'error': f"tier must be one of {', '.join(STREAM_TIERS)}"}
+    # 'gauges' as a list, or a single 'gauge'; missing, empty or '*' means all
+    gauges = data.get('gauges')
+    if gauges is None and data.get('gauge'):
+        gauges = [data['gauge']]
+    if isinstance(gauges, str):
+        gauges = [gauges]
+    if not gauges or '*' in gauges:
+        gauges = None
+    else:
+        gauges = tuple(sorted({str(g) for g in gauges}))
+    protocol, tier, gauges = set_client_stream(request.sid, tier=tier, gauges=gauges)
+    if protocol == 'binary':
+        keyframe_binary(tier, gauges)
+    return {'success': True, 'tier': tier, 'gauges': list(gauges) if gauges else '*', 'protocol': protocol}
+
+def target_sessions(data):
+    # socket handlers address one gauge by id, or every gauge when no id is sent
+    gauge = data.get('gauge')
+    with sessions_lock:
+        if gauge:
+            return [sessions[gauge]] if gauge in sessions else []
+        return list(sessions.values())
 
 @socketio.on('update_tolerance')
 def handle_tolerance(data):
-    global gauge_data
-    gauge_data['tolerance']['usl'] = data.get('usl')
-    gauge_data['tolerance']['lsl'] = data.get('lsl')
-    gauge_data['tolerance']['std'] = data.get('std')
+    for session in target_sessions(data):
+        session.set_tolerance(data.get('usl'), data.get('lsl'), data.get('std'))
     print(f"Tolerance updated: USL={data.get('usl')}, LSL={data.get('lsl')}, STD={data.get('std')}")
 
+@socketio.on('set_windows')
+def handle_set_windows(data):
+    specs = [str(w).strip() for w in data.get('windows') or []]
+    try:
+        for spec in specs:
+            parse_window(spec)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}  # socket.io ack
+    for session in target_sessions(data):
+        session.set_windows(specs)
+    print(f"Stats windows: {', '.join(specs) or 'none'}")
+    return {'success': True, 'windows': specs}
+
+@socketio.on('get_histogram')
+def handle_get_histogram(data):
+    # answered through the ack, so only the asking client gets it
+    return {'success': True, 'gauges': [session.call(session.histogram_snapshot)
+                                        for session in target_sessions(data or {})]}
+
+@socketio.on('set_spc')
+def handle_set_spc(data):
+    source = data.get('source') or app.config['SPC_SOURCE']
+    subgroup = data.get('subgroup') or app.config['SPC_SUBGROUP']
+    baseline = data.get('baseline') or app.config['SPC_BASELINE']
+    try:
+        if source not in SPC_SOURCES:
+            raise ValueError(f"source must be one of {', '.join(SPC_SOURCES)}")
+        ControlChart(subgroup, baseline)
+    except (TypeError, ValueError) as e:
+        return {'success': False, 'error': str(e)}  # socket.io ack
+    for session in target_sessions(data):
+        session.set_spc(source, ControlChart(subgroup, baseline))
+    print(f"SPC: {source}, subgroup {subgroup}, baseline {baseline}")
+    return {'success': True}
+
 @socketio.on('command')
 def handle_command(data):
-    global gauge_data
-    
     cmd = data.get('cmd')
     
-    if cmd == 'zero':
-        gauge_data['offset'] = gauge_data['raw_value']
-        print(f"Zeroed at {gauge_data['offset']:.3f}mm")
+    for session in target_sessions(data):
+        if cmd == 'zero':
+            session.zero()
+        elif cmd == 'reset_stats':
+            session.reset_stats()
+            print(f"[{session.gauge_id}] Statistics reset")
+        elif cmd == 'capture':
+            session.capture()
+
+
+class GaugeSession:
+    """One serial port: its own reader thread, stats, logs and tolerance.
     
-    elif cmd == 'reset_stats':
-        gauge_data['count'] = 0
+    The reader thread is the only writer of the session state. Everything
+    else (socket handlers, routes) submits commands that the reader applies
+    between serial reads, and reads the immutable `snapshot` the reader
+    publishes after each batch. When no reader is running the submitting
+    thread takes the writer role itself.
+    """
+    
+    def __init__(self, port):
+        self.port = port
+        self.gauge_id = port
+        self.baud = DEFAULT_BAUD
+        self.ser = None
+        self.parser = PacketParser()
+        self.running = False
+        self.read_thread = None
+        self.connected_at = 0.0
+        self.gauge_data = new_gauge_data()
+        self.continuous_log = self.new_log()
+        self.important_log = []
+        self.pending = deque()
+        self.read_errors = 0
+        self.device = port           # current path, can move when the cable is replugged
+        self.usb = None              # (vid, pid, serial_number) seen at open
+        self.wake = threading.Event()   # cuts a reconnect backoff short on close()
+        self.lost_ns = None          # when the port died, while reconnecting
+        self.reconnects = 0
+        self.downtime_ns = 0         # total time spent reconnecting
+        self.gaps = deque(maxlen=GAP_HISTORY)
+        self.cumulative = RunningStats()    # since connect / reset_stats
+        self.partitions = PartitionedStats()  # hourly, for /api/stats ranges
+        self.windows = [parse_window(w) for w in app.config['STATS_WINDOWS']]
+        self.spc_source = app.config['SPC_SOURCE']
+        self.spc = ControlChart(app.config['SPC_SUBGROUP'], app.config['SPC_BASELINE'])
+        self.spc_points = deque(maxlen=SPC_HISTORY)
+        self.spc_pending = deque()
+        self.histogram = ToleranceHistogram()
+        self.histogram_sent = None   # version last pushed to clients
+        # stats deltas for binary clients, per tier since they send at different rates
+        self.wire = {tier: StatsEncoder() for tier in ('raw', 'decimated', 'stats')}
+        self.store_id = None   # row in the store, added once the port has opened
+        
+        self.commands = deque()          # (future, fn, args), applied in order
+        self.writer = threading.Lock()   # held by whoever applies them, not per reading
+        self.snapshot = None
+        self.snapshot_sent = None        # last snapshot a frame went out with
+        # what the decimated and stats tiers still owe their clients
+        self.slow_sent = None
+        self.slow_last = None
+        self.slow_button = False
+        self.slow_spc = []
+        self.publish()
+    
+    def new_log(self):
+        spill_path = None
+        spill_dir = app.config['LOG_SPILL_DIR']
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            name = re.sub(r'[^A-Za-z0-9]+', '_', self.port).strip('_')
+            spill_path = os.path.join(spill_dir, f'continuous_{name}_{os.getpid()}.bin')
+        budget = int(app.config['LOG_MEMORY_MB'] * 1024 * 1024)
+        return SampleLog(memory_budget=budget, spill_path=spill_path)
+    
+    @property
+    def is_open(self):
+        return bool(self.ser and self.ser.is_open)
+    
+    # --- single writer ---------------------------------------------------
+    
+    def submit(self, fn, *args):
+        """Queue fn(*args) for the writer; returns a Future with its result."""
+        future = Future()
+        self.commands.append((future, fn, args))
+        if not self.drain():
+            # the reader owns the state; wake it if it is asleep in read()
+            ser = self.ser
+            if ser is not None and ser.is_open:
+                cancel_read(ser)
+        return future
+    
+    def call(self, fn, *args):
+        # for queries that need a consistent view, e.g. merging partitions
+        return self.submit(fn, *args).result(timeout=COMMAND_TIMEOUT)
+    
+    def drain(self):
+        # apply queued commands here if no reader holds the writer role
+        if not self.writer.acquire(blocking=False):
+            return False
+        while True:
+            try:
+                self.apply_commands()
+            finally:
+                self.writer.release()
+            # a submit() that came in while we held the lock found it taken
+            # and left its command to us; pick it up unless someone else has
+            if not self.commands or not self.writer.acquire(blocking=False):
+                return True
+    
+    def apply_commands(self):
+        commands = self.commands
+        if not commands:
+            return
+        while commands:
+            future, fn, args = commands.popleft()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                print(f"[{self.gauge_id}] Command error: {e}")
+                future.set_exception(e)
+        self.publish()
+    
+    def publish(self):
+        # a fresh dict every time, never mutated after this, so any thread
+        # can hold on to it without copying or locking
+        gauge_data = self.gauge_data
+        tolerance = dict(gauge_data['tolerance'])
+        stats = self.cumulative.as_dict(tolerance['usl'], tolerance['lsl'])
+        stats.update({
+            'button_count': gauge_data['button_count'],
+            'pass_count': gauge_data['pass_count'],
+            'ng_plus': gauge_data['ng_plus'],
+            'ng_minus': gauge_data['ng_minus'],
+            'windows': [w.as_dict(tolerance['usl'], tolerance['lsl']) for w in self.windows],
+        })
+        self.snapshot = {
+            'stats': stats,
+            'value': gauge_data['current_value'],
+            'offset': gauge_data['offset'],
+            'connected': gauge_data['connected'],
+            'tolerance': tolerance,
+            'windows': [w.name for w in self.windows],
+        }
+    
+    # --- lifecycle --------------------------------------------------------
+    
+    def info(self):
+        snapshot = self.snapshot
+        downtime = self.downtime()
+        uptime = max(0.0, time.time() - self.connected_at - downtime) if self.connected_at else 0.0
+        return {
+            'gauge': self.gauge_id,
+            'port': self.port,
+            'baud': self.baud,
+            'connected': snapshot['connected'],
+            'count': snapshot['stats']['count'],
+            'button_count': snapshot['stats']['button_count'],
+            'continuous_size': len(self.continuous_log),
+            'continuous_evicted': self.continuous_log.evicted,
+            'important_size': len(self.important_log),
+            'dropped_bytes': self.parser.dropped_bytes,
+            'store_backlog': store.backlog if store is not None else None,
+            'tolerance': snapshot['tolerance'],
+            'windows': snapshot['windows'],
+            'device': self.device,
+            'reconnecting': self.lost_ns is not None,
+            'reconnects': self.reconnects,
+            'downtime_s': downtime,
+            'uptime_s': uptime,
+            'gaps': list(self.gaps),
+        }
+    
+    def downtime(self):
+        # seconds spent reconnecting since open, including a gap still open
+        lost_ns = self.lost_ns
+        downtime_ns = self.downtime_ns
+        if lost_ns is not None:
+            downtime_ns += time.time_ns() - lost_ns
+        return downtime_ns / 1e9
+    
+    def open(self, baud):
+        # Close existing connection and reader
+        self.close()
+        
+        # Open new connection
+        ser = serial.Serial(self.port, baud, timeout=SERIAL_TIMEOUT)
+        ser.reset_input_buffer()
+        if self.store_id is None and store is not None:
+            self.store_id = store.gauge_id(self.port)
+        
+        with self.writer:
+            self.ser = ser
+            self.parser.reset()
+            self.baud = baud
+            self.device = self.port
+            self.usb = usb_identity(self.port)
+            self.connected_at = time.time()
+            self.gauge_data['connected'] = True
+            self.wake.clear()
+            self.lost_ns = None
+            self.reconnects = 0
+            self.downtime_ns = 0
+            self.gaps.clear()
+            
+            # Reset all parameters. Exports still streaming keep the old
+            # important_log list, so it is replaced rather than cleared
+            self._reset_stats()
+            self.continuous_log.clear()
+            self.important_log = []
+            self.pending.clear()
+            self.partitions.clear()
+            self.publish()
+            
+            # Start reading thread; it takes over the writer role once we let go
+            self.running = True
+            self.read_thread = threading.Thread(target=self.read_serial, daemon=True,
+                                                name=f'gauge-reader-{self.port}')
+            self.read_thread.start()
+    
+    def close(self):
+        self.running = False
+        self.wake.set()
+        if self.ser and self.ser.is_open:
+            cancel_read(self.ser)
+        if self.read_thread and self.read_thread.is_alive() and self.read_thread is not threading.current_thread():
+            self.read_thread.join(timeout=1)
+        if self.ser and self.ser.is_open:
+            self.ser.close()
+        self.submit(self._closed)
+    
+    def _closed(self):
+        self.gauge_data['connected'] = False
+        if self.lost_ns is not None:
+            # closed while reconnecting, stop counting the gap
+            self.downtime_ns += time.time_ns() - self.lost_ns
+            self.lost_ns = None
+    
+    # --- commands, callable from any thread ---------------------------------
+    
+    def set_tolerance(self, usl, lsl, std):
+        self.submit(self._set_tolerance, usl, lsl, std)
+    
+    def zero(self):
+        self.submit(self._zero)
+    
+    def reset_stats(self):
+        self.submit(self._reset_stats)
+    
+    def capture(self):
+        self.submit(self._capture)
+    
+    def set_windows(self, specs):
+        # parsed here so bad specs fail in the caller, swapped in by the writer
+        self.submit(setattr, self, 'windows', [parse_window(w) for w in specs])
+    
+    def set_spc(self, source, chart):
+        if source not in SPC_SOURCES:
+            raise ValueError(f"source must be one of {', '.join(SPC_SOURCES)}")
+        self.submit(self._set_spc, source, chart)
+    
+    # --- writer side --------------------------------------------------------
+    
+    def _set_tolerance(self, usl, lsl, std):
+        self.gauge_data['tolerance']['usl'] = usl
+        self.gauge_data['tolerance']['lsl'] = lsl
+        self.gauge_data['tolerance']['std'] = std
+        self.histogram.set_limits(usl, lsl, std)
+    
+    def _zero(self):
+        self.gauge_data['offset'] = self.gauge_data['raw_value']
+        print(f"[{self.gauge_id}] Zeroed at {self.gauge_data['offset']:.3f}mm")
+    
+    def _reset_stats(self):
+        gauge_data = self.gauge_data
         gauge_data['button_count'] = 0
-        gauge_data['min'] = None
-        gauge_data['max'] = None
         gauge_data['ng_plus'] = 0
         gauge_data['ng_minus'] = 0
         gauge_data['pass_count'] = 0
-        gauge_data['sum'] = 0.0
-        print("Statistics reset")
+        self.cumulative.reset()
+        for window in self.windows:
+            window.clear()
+        self.histogram.clear()
+        self.spc.reset()
+        self.spc_points.clear()
+    
+    def _set_spc(self, source, chart):
+        self.spc_source = source
+        self.spc = chart
+        self.spc_points.clear()
     
-    elif cmd == 'capture':
-        timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
-        value = gauge_data['current_value']
+    def add_spc(self, value, ts_ns, timestamp):
+        point = self.spc.add(value, ts_ns)
+        if point is None:
+            return
+        point['time'] = timestamp
+        self.spc_points.append(point)
+        self.spc_pending.append(point)
+        # alarms go out straight away like captures, points ride the next frame
+        rooms = point['violations'] and listeners(self.gauge_id, PROTOCOLS, ('raw', 'decimated', 'captures'))
+        for violation in point['violations']:
+            if rooms:
+                socketio.emit('spc_violation', dict(violation, gauge=self.gauge_id, time=timestamp,
+                                                    x=point['x'], r=point['r']), to=rooms)
+            print(f"[{self.gauge_id}] SPC {violation['chart']}-chart rule {violation['rule']}: "
+                  f"{violation['message']} ({point['x']:.4f})")
+    
+    def spc_info(self):
+        info = self.spc.info()
+        info.update({'gauge': self.gauge_id, 'source': self.spc_source, 'points': list(self.spc_points)})
+        return info
+    
+    def _capture(self):
+        ts_ns = time.time_ns()
+        timestamp = format_ts(ts_ns)
+        value = self.gauge_data['current_value']
         
         # Check tolerance
-        status = check_tolerance(value)
+        status = self.check_tolerance(value)
         
-        important_log.append({
+        self.important_log.append({
+            'ts_ns': ts_ns,
             'time': timestamp,
             'value': value,
             'type': 'Manual',
             'status': status
         })
+        if self.store_id is not None:
+            store.add_capture(self.store_id, ts_ns, value, STATUS_CODES[status], CAPTURE_TYPES.index('Manual'))
+        if self.spc_source == 'captures':
+            self.add_spc(value, ts_ns, timestamp)
         
-        socketio.emit('important_capture', {
-            'time': timestamp,
-            'value': value,
-            'type': 'Manual',
-            'status': status
-        })
+        self.emit_capture(ts_ns, timestamp, value, 'Manual', status)
         
-        print(f"Manual capture: {value:.3f}mm [{status}]")
-
-def check_tolerance(value):
-    usl = gauge_data['tolerance']['usl']
-    lsl = gauge_data['tolerance']['lsl']
+        print(f"[{self.gauge_id}] Manual capture: {value:.3f}mm [{status}]")
     
-    if usl is not None and value > usl:
-        return 'over'
-    if lsl is not None and value < lsl:
-        return 'under'
-    if usl is not None or lsl is not None:
-        return 'pass'
-    return 'none'
+    def emit_capture(self, ts_ns, timestamp, value, kind, status):
+        # captures skip the broadcast tick in both protocols and every tier but stats
+        tiers = ('raw', 'decimated', 'captures')
+        rooms = listeners(self.gauge_id, ('json',), tiers)
+        if rooms:
+            socketio.emit('important_capture', {
+                'gauge': self.gauge_id,
+                'time': timestamp,
+                'value': value,
+                'type': kind,
+                'status': status
+            }, to=rooms)
+        rooms = listeners(self.gauge_id, ('binary',), tiers)
+        if rooms:
+            socketio.emit('gauge_bin', pack_message(
+                self.gauge_id, captures=[(ts_ns, value, STATUS_CODES[status], CAPTURE_TYPES.index(kind))]),
+                to=rooms)
+    
+    def check_tolerance(self, value):
+        usl = self.gauge_data['tolerance']['usl']
+        lsl = self.gauge_data['tolerance']['lsl']
+        
+        if usl is not None and value > usl:
+            return 'over'
+        if lsl is not None and value < lsl:
+            return 'under'
+        if usl is not None or lsl is not None:
+            return 'pass'
+        return 'none'
+    
+    def handle_reading(self, raw_value, is_button, t_read=None):
+        gauge_data = self.gauge_data
+        gauge_data['raw_value'] = raw_value
+        zeroed_value = raw_value - gauge_data['offset']
+        gauge_data['current_value'] = zeroed_value
+        
+        # Update stats, O(1) per reading
+        ts_ns = time.time_ns()
+        self.cumulative.update(zeroed_value)
+        self.partitions.update(ts_ns, zeroed_value)
+        for window in self.windows:
+            window.update(ts_ns, zeroed_value)
+        self.histogram.update(zeroed_value)
+        
+        # Check tolerance
+        status = self.check_tolerance(zeroed_value)
+        if status == 'over':
+            gauge_data['ng_plus'] += 1
+        elif status == 'under':
+            gauge_data['ng_minus'] += 1
+        elif status == 'pass':
+            gauge_data['pass_count'] += 1
+        
+        if is_button:
+            gauge_data['button_count'] += 1
+        
+        timestamp = format_ts(ts_ns)
+        
+        code = STATUS_CODES[status]
+        self.continuous_log.append(ts_ns, zeroed_value, code)
+        if self.store_id is not None:
+            store.add_sample(self.store_id, ts_ns, zeroed_value, code)
+        
+        if self.spc_source == 'readings':
+            self.add_spc(zeroed_value, ts_ns, timestamp)
+        
+        # picked up by the broadcaster on its next tick
+        if t_read is None:
+            t_read = time.perf_counter()
+        self.pending.append((t_read, ts_ns, zeroed_value, code, is_button))
+        
+        if is_button:
+            self.important_log.append({
+                'ts_ns': ts_ns,
+                'time': timestamp,
+                'value': zeroed_value,
+                'type': 'Button',
+                'status': status
+            })
+            if self.store_id is not None:
+                store.add_capture(self.store_id, ts_ns, zeroed_value, code, CAPTURE_TYPES.index('Button'))
+            if self.spc_source == 'captures':
+                self.add_spc(zeroed_value, ts_ns, timestamp)
+            
+            self.emit_capture(ts_ns, timestamp, zeroed_value, 'Button', status)
+            read_to_emit_seconds.labels(self.gauge_id, 'capture').observe(time.perf_counter() - t_read)
 
-def read_serial():
-    global ser, buffer, running, gauge_data, continuous_log, important_log
+    def flush_frame(self, slow_tick=True):
+        # drain with popleft so the reader can keep appending while we emit
+        snapshot = self.snapshot
+        pending = self.pending
+        items = [pending.popleft() for _ in range(len(pending))]
+        spc_pending = self.spc_pending
+        spc = [spc_pending.popleft() for _ in range(len(spc_pending))]
+        gauge = self.gauge_id
+        
+        if items or snapshot is not self.snapshot_sent:
+            self.snapshot_sent = snapshot
+            rooms = listeners(gauge, ('json',), ('raw',))
+            if rooms:
+                socketio.emit('gauge_data', self.json_frame(snapshot, items, spc), to=rooms)
+            rooms = listeners(gauge, ('binary',), ('raw',))
+            if rooms:
+                socketio.emit('gauge_bin', self.binary_frame(snapshot, items), to=rooms)
+        
+        # the slower tiers catch up on what they skipped when their turn comes
+        if items:
+            self.slow_last = items[-1]
+            self.slow_button = self.slow_button or any(item[4] for item in items)
+        self.slow_spc.extend(spc)
+        if slow_tick:
+            if snapshot is not self.slow_sent:
+                self.slow_sent = snapshot
+                self.flush_slow(snapshot)
+            self.slow_last = None
+            self.slow_button = False
+            self.slow_spc = []
+        
+        now = time.perf_counter()
+        latency = read_to_emit_seconds.labels(gauge, 'frame')
+        for item in items:
+            latency.observe(now - item[0])
+    
+    def flush_slow(self, snapshot):
+        gauge = self.gauge_id
+        last = [self.slow_last] if self.slow_last is not None else []
+        rooms = listeners(gauge, ('json',), ('decimated',))
+        if rooms:
+            frame = self.json_frame(snapshot, last, self.slow_spc)
+            frame['button'] = self.slow_button
+            socketio.emit('gauge_data', frame, to=rooms)
+        rooms = listeners(gauge, ('binary',), ('decimated',))
+        if rooms:
+            socketio.emit('gauge_bin', self.binary_frame(snapshot, last, 'decimated'), to=rooms)
+        rooms = listeners(gauge, ('json',), ('stats',))
+        if rooms:
+            socketio.emit('gauge_data', self.json_frame(snapshot, []), to=rooms)
+        rooms = listeners(gauge, ('binary',), ('stats',))
+        if rooms:
+            socketio.emit('gauge_bin', self.binary_frame(snapshot, [], 'stats'), to=rooms)
+    
+    def json_frame(self, snapshot, items, spc=()):
+        frame = dict(snapshot['stats'])
+        frame['gauge'] = self.gauge_id
+        frame['value'] = items[-1][2] if items else snapshot['value']
+        frame['button'] = any(item[4] for item in items)
+        frame['samples'] = [{'time': format_ts(ts_ns), 'value': value, 'status': STATUS_NAMES[code],
+                             'button': button} for _, ts_ns, value, code, button in items]
+        if spc:
+            frame['spc'] = spc
+        return frame
+    
+    def binary_frame(self, snapshot, items, tier='raw'):
+        samples = [item[1:] for item in items]
+        return pack_message(self.gauge_id, samples=samples, stats=self.wire[tier].encode(snapshot['stats']))
+    
+    def histogram_snapshot(self):
+        snapshot = self.histogram.snapshot()
+        snapshot['gauge'] = self.gauge_id
+        return snapshot
     
-    while running and ser and ser.is_open:
+    def flush_histogram(self):
+        # called by the broadcaster; the snapshot itself is taken by the writer
+        if self.histogram.version != self.histogram_sent and self.histogram_rooms():
+            self.submit(self._emit_histogram)
+    
+    def histogram_rooms(self):
+        return listeners(self.gauge_id, PROTOCOLS, ('raw', 'decimated', 'stats'))
+    
+    def _emit_histogram(self):
+        rooms = self.histogram_rooms()
+        if not rooms:
+            return
+        snapshot = self.histogram_snapshot()
+        self.histogram_sent = snapshot['version']
+        socketio.emit('histogram', snapshot, to=rooms)
+    
+    def read_serial(self):
+        # each gauge has its own thread; the serial read releases the GIL so
+        # readers on different ports never wait on each other
+        while self.running:
+            ser = self.ser
+            lost = None
+            with self.writer:
+                while self.running and ser.is_open:
+                    self.apply_commands()
+                    try:
+                        # sleeps in the driver until bytes arrive (or a command
+                        # cancels the read), no polling
+                        data = read_available(ser)
+                    except (serial.SerialException, OSError) as e:
+                        if not self.running:
+                            break
+                        # unplugged or bumped cable: the port won't come back by itself
+                        self.read_errors += 1
+                        lost = e
+                        self._port_lost(ser, e)
+                        break
+                    if data:
+                        try:
+                            t_read = time.perf_counter()
+                            # every complete frame in the chunk comes back in one batch
+                            frames = self.parser.feed(data)
+                            for raw_value, is_button in frames:
+                                self.handle_reading(raw_value, is_button, t_read)
+                            if frames:
+                                self.publish()
+                        except Exception as e:
+                            self.read_errors += 1
+                            print(f"[{self.gauge_id}] Read error: {e}")
+                        if GREEN_THREADS:
+                            # gevent's select returns without switching when
+                            # bytes are already waiting, so a busy port would
+                            # never let the broadcaster and clients run
+                            socketio.sleep(0)
+                self.apply_commands()
+            # anything queued while we were letting go of the writer role
+            if self.commands:
+                self.drain()
+            if lost is None or not self.reconnect():
+                break
+    
+    def _port_lost(self, ser, error):
+        # stats, logs and SPC stay as they are; only the link is marked down
+        print(f"[{self.gauge_id}] Port lost ({error}), reconnecting")
         try:
-            if ser.in_waiting > 0:
-                buffer += ser.read(ser.in_waiting)
-                
-                while len(buffer) >= 11:
-                    if (buffer[0] == 0x12 and 
-                        buffer[1] in [ord('+'), ord('-')] and 
-                        buffer[2] == 0x00 and
-                        buffer[9] == 0x0D):
-                        
-                        packet = buffer[:11]
-                        buffer = buffer[11:]
-                        
-                        sign = chr(packet[1])
-                        digits = ''.join([chr(b) for b in packet[3:9] if 48 <= b <= 57])
-                        
-                        if len(digits) == 6:
-                            raw_value = float(digits) / 1000
-                            if sign == '-':
-                                raw_value = -raw_value
-                            
-                            gauge_data['raw_value'] = raw_value
-                            zeroed_value = raw_value - gauge_data['offset']
-                            gauge_data['current_value'] = zeroed_value
-                            
-                            # Update stats
-                            gauge_data['count'] += 1
-                            gauge_data['sum'] += zeroed_value
-                            
-                            if gauge_data['min'] is None or zeroed_value < gauge_data['min']:
-                                gauge_data['min'] = zeroed_value
-                            if gauge_data['max'] is None or zeroed_value > gauge_data['max']:
-                                gauge_data['max'] = zeroed_value
-                            
-                            # Check tolerance
-                            status = check_tolerance(zeroed_value)
-                            if status == 'over':
-                                gauge_data['ng_plus'] += 1
-                            elif status == 'under':
-                                gauge_data['ng_minus'] += 1
-                            elif status == 'pass':
-                                gauge_data['pass_count'] += 1
-                            
-                            # Calculate average +  range
-                            avg = gauge_data['sum'] / gauge_data['count'] if gauge_data['count'] > 0 else None
-                            range_val = (gauge_data['max'] - gauge_data['min']) if (gauge_data['min'] is not None and gauge_data['max'] is not None) else None
-                            
-                            is_button = (packet[10] == 0x0A)
-                            if is_button:
-                                gauge_data['button_count'] += 1
-                            
-                            timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
-                            
-                            continuous_log.append({
-                                'time': timestamp,
-                                'value': zeroed_value,
-                                'status': status
-                            })
-                            
-                            socketio.emit('continuous_update', {
-                                'time': timestamp,
-                                'value': zeroed_value,
-                                'status': status
-                            })
-                            
-                            if is_button:
-                                important_log.append({
-                                    'time': timestamp,
-                                    'value': zeroed_value,
-                                    'type': 'Button',
-                                    'status': status
-                                })
-                                
-                                socketio.emit('important_capture', {
-                                    'time': timestamp,
-                                    'value': zeroed_value,
-                                    'type': 'Button',
-                                    'status': status
-                                })
-                            
-                            socketio.emit('gauge_data', {
-                                'value': zeroed_value,
-                                'min': gauge_data['min'],
-                                'max': gauge_data['max'],
-                                'avg': avg,
-                                'range': range_val,
-                                'count': gauge_data['count'],
-                                'button_count': gauge_data['button_count'],
-                                'pass_count': gauge_data['pass_count'],
-                                'ng_plus': gauge_data['ng_plus'],
-                                'ng_minus': gauge_data['ng_minus'],
-                                'button': is_button
-                            })
-                    else:
-                        buffer = buffer[1:]
-                        
-        except Exception as e:
-            print(f"Read error: {e}")
-            time.sleep(0.1)
-        
-        time.sleep(0.01)
+            ser.close()
+        except Exception:
+            pass
+        self.lost_ns = time.time_ns()
+        self.gauge_data['connected'] = False
+        self.publish()
+        self.emit_link({'connected': False, 'time': format_ts(self.lost_ns), 'reconnects': self.reconnects})
+    
+    def emit_link(self, data):
+        rooms = listeners(self.gauge_id, PROTOCOLS, STREAM_TIERS)
+        if rooms:
+            socketio.emit('gauge_link', dict(data, gauge=self.gauge_id), to=rooms)
+    
+    def find_device(self):
+        # a replugged adapter can come back under another path; follow its serial number
+        if self.usb is not None and self.usb[2]:
+            for p in port_watcher.snapshot().values():
+                if (p['vid'], p['pid'], p['serial_number']) == self.usb:
+                    return p['device']
+        return self.device
+    
+    def reconnect(self):
+        """Reopen the port with backoff. Runs without the writer role, so
+        commands and queries are served by their callers meanwhile."""
+        delay = RECONNECT_MIN
+        attempts = 0
+        while self.running:
+            # woken early by close() or by the port watcher seeing a new port
+            self.wake.wait(delay)
+            self.wake.clear()
+            if not self.running:
+                return False
+            attempts += 1
+            device = self.find_device()
+            try:
+                ser = serial.Serial(device, self.baud, timeout=SERIAL_TIMEOUT)
+                ser.reset_input_buffer()
+            except (serial.SerialException, OSError) as e:
+                if attempts == 1 or delay < RECONNECT_MAX:
+                    print(f"[{self.gauge_id}] Reconnect to {device} failed: {e}")
+                delay = min(delay * 2, RECONNECT_MAX)
+                continue
+            with self.writer:
+                if not self.running:
+                    ser.close()
+                    return False
+                restored_ns = time.time_ns()
+                gap = {
+                    'lost': format_ts(self.lost_ns),
+                    'restored': format_ts(restored_ns),
+                    'lost_ns': self.lost_ns,
+                    'restored_ns': restored_ns,
+                    'gap_s': (restored_ns - self.lost_ns) / 1e9,
+                    'attempts': attempts,
+                    'device': device,
+                }
+                self.gaps.append(gap)
+                self.reconnects += 1
+                self.downtime_ns += restored_ns - self.lost_ns
+                self.lost_ns = None
+                self.ser = ser
+                self.device = device
+                # a frame cut off by the dropout must not be glued to the next one
+                self.parser.discard_pending()
+                self.gauge_data['connected'] = True
+                self.publish()
+            print(f"[{self.gauge_id}] Reconnected on {device} after {gap['gap_s']:.1f}s ({attempts} tries)")
+            self.emit_link(dict(gap, connected=True, reconnects=self.reconnects))
+            return True
+        return False
+
+
+class Broadcaster:
+    """Sends one batched gauge_data frame per gauge per tick.
+    
+    Readers only append to their session's pending queue; this task does all
+    the JSON encoding and fan-out at a fixed rate, so the emit cost no longer
+    scales with the packet rate. Captures are still emitted immediately.
+    """
+    
+    def __init__(self, hz):
+        self.hz = hz
+        self.histogram_every = max(1, round(app.config['HISTOGRAM_INTERVAL'] * hz))
+        self.decimate_every = max(1, round(hz / app.config['DECIMATED_HZ']))
+        self.ticks = 0
+        self.task = None
+        self.lock = threading.Lock()
+    
+    def start(self):
+        with self.lock:
+            if self.task is None:
+                self.task = socketio.start_background_task(self.run)
+    
+    def flush(self):
+        with sessions_lock:
+            active = list(sessions.values())
+        self.ticks += 1
+        histograms = self.ticks % self.histogram_every == 0
+        slow_tick = self.ticks % self.decimate_every == 0
+        for session in active:
+            try:
+                session.flush_frame(slow_tick)
+                if histograms:
+                    session.flush_histogram()
+            except Exception as e:
+                print(f"[{session.gauge_id}] Broadcast error: {e}")
+    
+    def run(self):
+        interval = 1.0 / self.hz
+        next_tick = time.monotonic()
+        while True:
+            next_tick += interval
+            self.flush()
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                socketio.sleep(delay)
+            else:
+                # fell behind, don't try to catch up with a burst of ticks
+                next_tick = time.monotonic()
+
+broadcaster = Broadcaster(app.config['BROADCAST_HZ'])
+
+
+class PortWatcher:
+    """Serial port inventory kept in memory and rescanned on a timer.
+    
+    comports() walks sysfs (or the registry) on every call, so requests
+    never call it; they read the dict from the last scan, which is replaced
+    rather than changed. Differences between scans go out as port_added and
+    port_removed events.
+    """
+    
+    def __init__(self, interval):
+        self.interval = interval
+        self.ports = {}     # device -> port info
+        self.scanned = False
+        self.scans = 0
+        self.task = None
+        self.lock = threading.Lock()
+    
+    def start(self):
+        with self.lock:
+            if self.task is None:
+                self.task = socketio.start_background_task(self.run)
+    
+    def snapshot(self):
+        if not self.scanned:
+            # first caller before the watcher got going scans inline, once
+            with self.lock:
+                if not self.scanned:
+                    self.scan()
+        return self.ports
+    
+    def scan(self):
+        found = {}
+        for p in run_blocking(serial.tools.list_ports.comports):
+            found[p.device] = {
+                'device': p.device,
+                'description': p.description,
+                'vid': p.vid,
+                'pid': p.pid,
+                'serial_number': p.serial_number,
+                'manufacturer': p.manufacturer,
+                'hwid': p.hwid,
+            }
+        old = self.ports
+        self.ports = found
+        self.scanned = True
+        self.scans += 1
+        added = [info for device, info in found.items() if device not in old]
+        removed = [info for device, info in old.items() if device not in found]
+        return added, removed
+    
+    def run(self):
+        self.snapshot()
+        while True:
+            socketio.sleep(self.interval)
+            try:
+                added, removed = self.scan()
+            except Exception as e:
+                print(f"Port scan error: {e}")
+                continue
+            for info in removed:
+                print(f"Port removed: {info['device']}")
+                socketio.emit('port_removed', info)
+            for info in added:
+                print(f"Port added: {info['device']} - {info['description']}")
+                socketio.emit('port_added', info)
+            if added:
+                # a gauge waiting to reconnect can try right away
+                with sessions_lock:
+                    waiting = [s for s in sessions.values() if s.lost_ns is not None]
+                for session in waiting:
+                    session.wake.set()
+
+port_watcher = PortWatcher(PORT_SCAN_INTERVAL)
 
 
 #for it to run
@@ -1280,10 +2921,13 @@ if __name__ == '__main__':
     print("Gauge Monitor Start")
     print("="*50)
     print("\nOpen browser to: http://localhost:5000")
+    print(f"Async mode: {ASYNC_MODE}")
     print("="*50 + "\n")
     
+    open_store()
+    port_watcher.start()
+    
     try:
         socketio.run(app, host='0.0.0.0', port=5000, debug=False)
     except KeyboardInterrupt:
         print("\nclosing")
-        running = False
\ No newline at end of file
@@ -0,0 +1,223 @@
+# Virtual Etopoo gauges over pseudo-terminals, for load and soak testing
+#
+# Each simulated gauge owns a pty pair; the server opens the slave end like a
+# real port (through /api/connect) and the simulator writes frames to the
+# master end. POSIX only.
+#
+#   python gauge_sim.py --gauges 16 --rate 50 --profile sine --noise 0.002 \
+#       --garbage 0.01 --button-every 5 --connect http://localhost:5000
+
+import argparse
+import heapq
+import json
+import math
+import os
+import pty
+import random
+import threading
+import time
+import tty
+import urllib.request
+
+from gauge_parser import encode_frame
+
+PROFILES = ('constant', 'linear', 'sine', 'walk', 'step')
+
+
+class SimGauge:
+    """One virtual indicator: a pty plus a value profile."""
+
+    def __init__(self, rate=10.0, base=0.0, profile='constant', drift=0.0,
+                 amplitude=0.05, period=60.0, noise=0.0, garbage=0.0,
+                 button_every=0.0, button_prob=0.0, seed=None):
+        if profile not in PROFILES:
+            raise ValueError(f"profile must be one of {PROFILES}")
+        self.rate = rate
+        self.base = base
+        self.profile = profile
+        self.drift = drift            # mm/s for 'linear', step size for 'walk'/'step'
+        self.amplitude = amplitude    # mm for 'sine'
+        self.period = period          # s for 'sine' and 'step'
+        self.noise = noise            # gaussian sigma in mm
+        self.garbage = garbage        # chance per frame of junk bytes / a torn frame
+        self.button_every = button_every
+        self.button_prob = button_prob
+        self.rng = random.Random(seed)
+
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)        # no CR/LF translation of 0x0D/0x0A
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+
+        self.walk = 0.0
+        self.next_button = button_every or None
+        self.press_pending = False
+        self.frames = 0
+        self.buttons = 0
+        self.garbage_bytes = 0
+        self.overflows = 0            # writes dropped because nobody was reading
+
+    def close(self):
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def press(self):
+        # flag the next frame as a data-button press
+        self.press_pending = True
+
+    def value_at(self, t):
+        if self.profile == 'linear':
+            value = self.base + self.drift * t
+        elif self.profile == 'sine':
+            value = self.base + self.amplitude * math.sin(2 * math.pi * t / self.period)
+        elif self.profile == 'walk':
+            self.walk += self.rng.gauss(0.0, self.drift or 0.001)
+            value = self.base + self.walk
+        elif self.profile == 'step':
+            value = self.base + self.drift * int(t // self.period)
+        else:
+            value = self.base
+        if self.noise:
+            value += self.rng.gauss(0.0, self.noise)
+        return max(-999.999, min(999.999, value))
+
+    def next_chunk(self, t):
+        button = self.press_pending
+        self.press_pending = False
+        if self.next_button is not None and t >= self.next_button:
+            button = True
+            self.next_button += self.button_every
+        if self.button_prob and self.rng.random() < self.button_prob:
+            button = True
+
+        frame = encode_frame(self.value_at(t), button)
+        self.frames += 1
+        self.buttons += button
+
+        if self.garbage and self.rng.random() < self.garbage:
+            junk = bytes(self.rng.randrange(256) for _ in range(self.rng.randint(1, 8)))
+            self.garbage_bytes += len(junk)
+            if self.rng.random() < 0.5:
+                # torn frame: the parser has to resync past it. Cut before
+                # the 0x0D so the junk can't complete it into a valid frame
+                cut = self.rng.randint(1, 8)
+                if junk[0] == 0x0D:
+                    junk = b'\x00' + junk[1:]
+                self.garbage_bytes += cut
+                return frame[:cut] + junk + frame
+            return junk + frame
+        return frame
+
+    def write(self, data):
+        try:
+            os.write(self.master, data)
+        except BlockingIOError:
+            self.overflows += 1
+        except OSError:
+            # slave side hung up; keep going so a reconnect picks up again
+            self.overflows += 1
+
+
+class Simulator:
+    """Drives any number of SimGauges from one thread on a shared clock."""
+
+    def __init__(self, gauges):
+        self.gauges = list(gauges)
+        self.running = False
+        self.thread = None
+
+    @property
+    def ports(self):
+        return [g.port for g in self.gauges]
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True, name='gauge-sim')
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+        for g in self.gauges:
+            g.close()
+
+    def run(self):
+        start = time.monotonic()
+        # (next due time, index) heap, so each gauge keeps its own rate
+        due = [(start + i * 1e-4, i) for i in range(len(self.gauges))]
+        heapq.heapify(due)
+        while self.running and due:
+            when, i = due[0]
+            delay = when - time.monotonic()
+            if delay > 0:
+                time.sleep(min(delay, 0.05))
+                continue
+            heapq.heapreplace(due, (when + 1.0 / self.gauges[i].rate, i))
+            g = self.gauges[i]
+            g.write(g.next_chunk(when - start))
+
+    def stats(self):
+        return [{'port': g.port, 'frames': g.frames, 'buttons': g.buttons,
+                 'garbage_bytes': g.garbage_bytes, 'overflows': g.overflows} for g in self.gauges]
+
+
+def connect_server(url, ports, baud=9600):
+    body = json.dumps({'ports': ports, 'baud': baud}).encode()
+    req = urllib.request.Request(url.rstrip('/') + '/api/connect', data=body,
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return json.loads(resp.read())
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Simulate Etopoo gauges on pseudo-terminals')
+    ap.add_argument('--gauges', type=int, default=1)
+    ap.add_argument('--rate', type=float, default=10.0, help='frames per second per gauge')
+    ap.add_argument('--base', type=float, default=0.0, help='starting value in mm')
+    ap.add_argument('--spread', type=float, default=0.0, help='offset between gauges in mm')
+    ap.add_argument('--profile', choices=PROFILES, default='sine')
+    ap.add_argument('--drift', type=float, default=0.0)
+    ap.add_argument('--amplitude', type=float, default=0.05)
+    ap.add_argument('--period', type=float, default=60.0)
+    ap.add_argument('--noise', type=float, default=0.001)
+    ap.add_argument('--garbage', type=float, default=0.0)
+    ap.add_argument('--button-every', type=float, default=0.0, help='seconds between button presses')
+    ap.add_argument('--button-prob', type=float, default=0.0, help='chance per frame of a button press')
+    ap.add_argument('--seed', type=int, default=None)
+    ap.add_argument('--connect', metavar='URL', help='ask a running server to open the ports')
+    args = ap.parse_args()
+
+    gauges = [SimGauge(rate=args.rate, base=args.base + i * args.spread, profile=args.profile,
+                       drift=args.drift, amplitude=args.amplitude, period=args.period,
+                       noise=args.noise, garbage=args.garbage, button_every=args.button_every,
+                       button_prob=args.button_prob,
+                       seed=None if args.seed is None else args.seed + i)
+              for i in range(args.gauges)]
+    sim = Simulator(gauges).start()
+
+    print("Simulated gauges:")
+    for port in sim.ports:
+        print(f"  {port}")
+    if args.connect:
+        print(connect_server(args.connect, sim.ports))
+
+    print("Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(5)
+            total = sum(g.frames for g in gauges)
+            dropped = sum(g.overflows for g in gauges)
+            print(f"{total} frames sent, {dropped} writes dropped")
+    except KeyboardInterrupt:
+        print("\nclosing")
+    finally:
+        sim.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+# Streaming SPC: X-bar/R and individuals/moving-range charts
+#
+# Points come in one at a time (a subgroup mean, or a single reading when the
+# subgroup size is 1) and every rule keeps a run counter or a fixed 3-5 slot
+# window, so checking a new point never looks back through the history.
+#
+# Limits are Phase I style: they follow the running grand mean and average
+# range until `baseline` points have been seen, then freeze and the Nelson
+# rules start being checked against them. A baseline with no spread at all
+# (average range 0, e.g. a steady part at 1 um resolution) would give zero
+# width limits, so it keeps collecting until some shows up. reset() starts a
+# new baseline.
+
+from collections import deque
+
+# subgroup size -> (A2, D3, D4) for X-bar/R limits
+XBAR_R_CONSTANTS = {
+    2: (1.880, 0.0, 3.267),
+    3: (1.023, 0.0, 2.574),
+    4: (0.729, 0.0, 2.282),
+    5: (0.577, 0.0, 2.114),
+    6: (0.483, 0.0, 2.004),
+    7: (0.419, 0.076, 1.924),
+    8: (0.373, 0.136, 1.864),
+    9: (0.337, 0.184, 1.816),
+    10: (0.308, 0.223, 1.777),
+}
+# individuals chart, moving range of two: E2 = 3 / d2(2), D4(2)
+E2 = 2.660
+MR_D4 = 3.267
+
+RULES = {
+    1: 'point beyond 3 sigma',
+    2: '9 points in a row on one side of the center line',
+    3: '6 points in a row steadily increasing or decreasing',
+    4: '14 points in a row alternating up and down',
+    5: '2 of 3 points beyond 2 sigma on the same side',
+    6: '4 of 5 points beyond 1 sigma on the same side',
+    7: '15 points in a row within 1 sigma',
+    8: '8 points in a row beyond 1 sigma, on both sides',
+}
+RANGE_RULE = 'range outside its control limits'
+
+
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+
+class RuleState:
+    """Nelson rules 1-8 evaluated one point at a time."""
+
+    def __init__(self):
+        self.prev = None
+        self.side = 0
+        self.side_run = 0
+        self.trend_dir = 0
+        self.trend_run = 0
+        self.alt_dir = 0
+        self.alt_run = 0
+        self.inner_run = 0
+        self.outer = deque(maxlen=8)   # sides of the current run beyond 1 sigma
+        self.outer_fired = False
+        self.beyond2 = deque(maxlen=3)
+        self.beyond1 = deque(maxlen=5)
+
+    def check(self, x, cl, sigma):
+        """Rule numbers that fire on this point."""
+        fired = []
+        dev = x - cl
+        side = _sign(dev)
+        a = abs(dev)
+
+        if a > 3 * sigma:
+            fired.append(1)
+
+        # runs are reported once, when they reach their length
+        if side and side == self.side:
+            self.side_run += 1
+        else:
+            self.side_run = 1 if side else 0
+        self.side = side
+        if self.side_run == 9:
+            fired.append(2)
+
+        if self.prev is not None:
+            step = _sign(x - self.prev)
+            if step and step == self.trend_dir:
+                self.trend_run += 1
+            else:
+                self.trend_run = 1 if step else 0
+            self.trend_dir = step
+            if self.trend_run == 5:     # 5 steps = 6 points
+                fired.append(3)
+
+            if step and step == -self.alt_dir:
+                self.alt_run += 1
+            else:
+                self.alt_run = 1 if step else 0
+            self.alt_dir = step
+            if self.alt_run == 13:      # 13 flips = 14 points
+                fired.append(4)
+        self.prev = x
+
+        # 2-of-3 and 4-of-5 only fire on a point that is itself out there
+        far = side if a > 2 * sigma else 0
+        self.beyond2.append(far)
+        if far and self.beyond2.count(far) >= 2:
+            fired.append(5)
+        out = side if a > sigma else 0
+        self.beyond1.append(out)
+        if out and self.beyond1.count(out) >= 4:
+            fired.append(6)
+
+        self.inner_run = self.inner_run + 1 if a < sigma else 0
+        if self.inner_run == 15:
+            fired.append(7)
+        # rule 8 needs both sides in the last 8, so a one-sided run that
+        # crosses over later still counts; once per run
+        if out:
+            self.outer.append(out)
+            if (len(self.outer) == 8 and not self.outer_fired
+                    and 1 in self.outer and -1 in self.outer):
+                self.outer_fired = True
+                fired.append(8)
+        else:
+            self.outer.clear()
+            self.outer_fired = False
+        return fired
+
+
+class ControlChart:
+    """X-bar/R chart (subgroup 2-10) or individuals/MR chart (subgroup 1)."""
+
+    def __init__(self, subgroup=5, baseline=25):
+        subgroup = int(subgroup)
+        baseline = int(baseline)
+        if subgroup != 1 and subgroup not in XBAR_R_CONSTANTS:
+            raise ValueError('subgroup size must be 1 to 10')
+        if baseline < 2:
+            raise ValueError('baseline needs at least 2 points')
+        self.subgroup = subgroup
+        self.baseline = baseline
+        self.reset()
+
+    def reset(self):
+        self.group = []
+        self.group_ts = None
+        self.points = 0
+        self.x_sum = 0.0
+        self.r_sum = 0.0
+        self.r_count = 0
+        self.last_x = None
+        self.frozen = None
+        self.rules = RuleState()
+        self.violations = 0
+
+    def limits(self):
+        if self.frozen is not None:
+            return self.frozen
+        if self.points == 0 or self.r_count == 0:
+            return None
+        cl = self.x_sum / self.points
+        rbar = self.r_sum / self.r_count
+        if self.subgroup == 1:
+            width, r_lcl, r_ucl = E2 * rbar, 0.0, MR_D4 * rbar
+        else:
+            a2, d3, d4 = XBAR_R_CONSTANTS[self.subgroup]
+            width, r_lcl, r_ucl = a2 * rbar, d3 * rbar, d4 * rbar
+        return {'cl': cl, 'ucl': cl + width, 'lcl': cl - width,
+                'r_cl': rbar, 'r_ucl': r_ucl, 'r_lcl': r_lcl}
+
+    def add(self, x, ts_ns):
+        """Feed one measurement; returns the chart point when a subgroup closes."""
+        if not self.group:
+            self.group_ts = ts_ns
+        self.group.append(x)
+        if len(self.group) < self.subgroup:
+            return None
+        group = self.group
+        self.group = []
+        if self.subgroup == 1:
+            xbar = x
+            r = abs(x - self.last_x) if self.last_x is not None else None
+            self.last_x = x
+        else:
+            xbar = sum(group) / len(group)
+            r = max(group) - min(group)
+        return self._point(xbar, r, self.group_ts)
+
+    def _point(self, xbar, r, ts_ns):
+        monitoring = self.frozen is not None
+        if not monitoring:
+            self.points += 1
+            self.x_sum += xbar
+            if r is not None:
+                self.r_sum += r
+                self.r_count += 1
+        limits = self.limits()
+
+        violations = []
+        if monitoring:
+            sigma = (limits['ucl'] - limits['cl']) / 3
+            for rule in self.rules.check(xbar, limits['cl'], sigma):
+                violations.append({'chart': 'x', 'rule': rule, 'message': RULES[rule]})
+            if r is not None and (r > limits['r_ucl'] or r < limits['r_lcl']):
+                violations.append({'chart': 'r', 'rule': 1, 'message': RANGE_RULE})
+            self.violations += len(violations)
+        elif self.points >= self.baseline and limits is not None and limits['r_cl'] > 0:
+            self.frozen = limits
+
+        point = {
+            'ts_ns': ts_ns,
+            'x': xbar,
+            'r': r,
+            'phase': 'monitor' if monitoring else 'baseline',
+            'violations': violations,
+        }
+        if limits is not None:
+            point.update(limits)
+        return point
+
+    def info(self):
+        return {
+            'subgroup': self.subgroup,
+            'chart': 'xbar_r' if self.subgroup > 1 else 'individuals_mr',
+            'baseline': self.baseline,
+            'baseline_points': self.points,
+            'phase': 'monitor' if self.frozen is not None else 'baseline',
+            'limits': self.limits(),
+            'violations': self.violations,
+            'open_group': len(self.group),
+        }
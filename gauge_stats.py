@@ -0,0 +1,412 @@
+# Online statistics for gauge readings
+#
+# Welford's update keeps mean and the sum of squared deviations (M2) exactly
+# enough in O(1) per sample, and Chan's formula merges two of them without
+# looking at the samples again, so stats can be combined across gauges and
+# across time partitions.
+
+import math
+import re
+from collections import OrderedDict, deque
+
+
+def capability(mean, sigma, usl, lsl):
+    if not sigma:
+        return None, None
+    cp = (usl - lsl) / (6 * sigma) if usl is not None and lsl is not None else None
+    sides = []
+    if usl is not None:
+        sides.append((usl - mean) / (3 * sigma))
+    if lsl is not None:
+        sides.append((mean - lsl) / (3 * sigma))
+    cpk = min(sides) if sides else None
+    return cp, cpk
+
+
+class RunningStats:
+    """Count, mean, variance, min and max of a stream, mergeable."""
+
+    __slots__ = ('n', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+
+    def merge(self, other):
+        """Fold other into self (Chan et al.) and return self."""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def copy(self):
+        return RunningStats().merge(self)
+
+    @property
+    def variance(self):
+        # sample variance, what Cp/Cpk are normally quoted with
+        return self.m2 / (self.n - 1) if self.n > 1 else None
+
+    @property
+    def std(self):
+        var = self.variance
+        return math.sqrt(var) if var is not None else None
+
+    @property
+    def range(self):
+        return (self.max - self.min) if self.n else None
+
+    def capability(self, usl, lsl):
+        """(Cp, Cpk) against the spec limits; one-sided limits give only Cpk."""
+        return capability(self.mean, self.std, usl, lsl)
+
+    def as_dict(self, usl=None, lsl=None):
+        cp, cpk = self.capability(usl, lsl)
+        return {
+            'count': self.n,
+            'min': self.min,
+            'max': self.max,
+            'avg': self.mean if self.n else None,
+            'range': self.range,
+            'std': self.std,
+            'cp': cp,
+            'cpk': cpk,
+        }
+
+
+class PartitionedStats:
+    """RunningStats per fixed time partition, for range queries without a re-scan."""
+
+    def __init__(self, partition_ns=3600 * 10**9, keep=24 * 31):
+        self.partition_ns = partition_ns
+        self.keep = keep
+        self.parts = OrderedDict()
+        self._key = None
+        self._current = None
+
+    def update(self, ts_ns, x):
+        key = ts_ns // self.partition_ns
+        if key != self._key:
+            self._current = self.parts.get(key)
+            if self._current is None:
+                self._current = self.parts[key] = RunningStats()
+                while len(self.parts) > self.keep:
+                    self.parts.popitem(last=False)
+            self._key = key
+        self._current.update(x)
+
+    def clear(self):
+        self.parts.clear()
+        self._key = None
+        self._current = None
+
+    def query(self, start_ns=None, end_ns=None):
+        """Merged stats of every partition that overlaps [start_ns, end_ns]."""
+        return self.query_span(start_ns, end_ns)[0]
+
+    def query_span(self, start_ns=None, end_ns=None):
+        """(stats, first_ns, last_ns) like query, plus the time actually covered.
+
+        Whole partitions are merged, so the covered span runs from the start
+        of the first partition used to the end of the last one and is usually
+        wider than asked for; (stats, None, None) if none had data.
+        """
+        lo = start_ns // self.partition_ns if start_ns is not None else None
+        hi = end_ns // self.partition_ns if end_ns is not None else None
+        out = RunningStats()
+        first = last = None
+        for key, stats in list(self.parts.items()):
+            if (lo is None or key >= lo) and (hi is None or key <= hi) and stats.n:
+                out.merge(stats)
+                first = key if first is None else min(first, key)
+                last = key if last is None else max(last, key)
+        if first is None:
+            return out, None, None
+        return out, first * self.partition_ns, (last + 1) * self.partition_ns - 1
+
+
+_UNITS = {'s': 10**9, 'm': 60 * 10**9, 'h': 3600 * 10**9}
+
+
+def parse_window(spec):
+    """'500' -> last 500 readings, '30s' / '5m' / '1h' -> last T of readings."""
+    spec = str(spec).strip().lower()
+    m = re.fullmatch(r'(\d+(?:\.\d+)?)([smh]?)', spec)
+    if not m or float(m.group(1)) <= 0:
+        raise ValueError(f"bad window '{spec}', use a count like 500 or a time like 30s, 5m, 1h")
+    if m.group(2):
+        return SlidingWindow(seconds=float(m.group(1)) * _UNITS[m.group(2)] / 10**9, name=spec)
+    return SlidingWindow(size=int(float(m.group(1))), name=spec)
+
+
+class SlidingWindow:
+    """Stats over the last `size` readings or the last `seconds`, O(1) amortized.
+
+    min/max come from monotonic deques (each reading is pushed and popped at
+    most once), mean/variance from Welford with a matching remove step.
+    Removing leaves rounding behind, so the sums are redone from the samples
+    once per full turn of the window (still O(1) amortized) and set exactly
+    whenever the window is flat. The window only moves when a reading arrives.
+    """
+
+    def __init__(self, size=None, seconds=None, name=None):
+        if not size and not seconds:
+            raise ValueError('window needs a size or a duration')
+        self.size = size
+        self.span_ns = int(seconds * 10**9) if seconds else None
+        self.name = name or (f'{size}' if size else f'{seconds:g}s')
+        self.samples = deque()   # (seq, ts_ns, x)
+        self.mins = deque()      # (seq, x), x increasing
+        self.maxs = deque()      # (seq, x), x decreasing
+        self.seq = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.dropped = 0         # removals since the sums were last redone
+
+    def clear(self):
+        self.samples.clear()
+        self.mins.clear()
+        self.maxs.clear()
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.dropped = 0
+
+    def update(self, ts_ns, x):
+        seq = self.seq
+        self.seq += 1
+        self.samples.append((seq, ts_ns, x))
+        mins, maxs = self.mins, self.maxs
+        while mins and mins[-1][1] >= x:
+            mins.pop()
+        mins.append((seq, x))
+        while maxs and maxs[-1][1] <= x:
+            maxs.pop()
+        maxs.append((seq, x))
+
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+        samples = self.samples
+        if self.size is not None:
+            while len(samples) > self.size:
+                self._drop()
+        if self.span_ns is not None:
+            cutoff = ts_ns - self.span_ns
+            while samples[0][1] < cutoff:
+                self._drop()
+
+        if mins[0][1] == maxs[0][1]:
+            # all the same reading: no spread, and no rounding left over
+            self.mean = x
+            self.m2 = 0.0
+            self.dropped = 0
+        elif self.dropped >= len(samples):
+            self._resum()
+
+    def _resum(self):
+        values = [x for _, _, x in self.samples]
+        self.mean = math.fsum(values) / len(values)
+        self.m2 = math.fsum((x - self.mean) ** 2 for x in values)
+        self.dropped = 0
+
+    def _drop(self):
+        seq, _, x = self.samples.popleft()
+        if self.mins[0][0] == seq:
+            self.mins.popleft()
+        if self.maxs[0][0] == seq:
+            self.maxs.popleft()
+        self.n -= 1
+        self.dropped += 1
+        if self.n == 0:
+            self.mean = 0.0
+            self.m2 = 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / self.n
+        self.m2 -= delta * (x - self.mean)
+        if self.m2 < 0.0:
+            self.m2 = 0.0  # rounding after many removals
+
+    def as_dict(self, usl=None, lsl=None):
+        n = self.n
+        lo = self.mins[0][1] if n else None
+        hi = self.maxs[0][1] if n else None
+        std = math.sqrt(self.m2 / (n - 1)) if n > 1 else None
+        cp, cpk = capability(self.mean, std, usl, lsl)
+        return {
+            'window': self.name,
+            'count': n,
+            'min': lo,
+            'max': hi,
+            'avg': self.mean if n else None,
+            'range': (hi - lo) if n else None,
+            'std': std,
+            'cp': cp,
+            'cpk': cpk,
+        }
+
+
+# Etopoo indicators read in 0.001 mm steps
+RESOLUTION_MM = 0.001
+
+
+def _nice_width(span_um, bins):
+    # smallest 1-2-5 step (in um) that covers span_um in at most `bins` bins
+    step = 1
+    while True:
+        for m in (1, 2, 5):
+            if step * m * bins >= span_um:
+                return step * m
+        step *= 10
+
+
+class ToleranceHistogram:
+    """Reading distribution with bins laid out on the tolerance band.
+
+    Every reading lands in a per-micron count (the gauge can't resolve finer)
+    and, once limits are set, in a display bin found by arithmetic, both O(1).
+    Changing the tolerance rebins from the per-micron counts, which has one
+    entry per distinct reading rather than one per sample. Not locked: the
+    gauge's reader thread is the only one that touches it.
+    """
+
+    TARGET_BINS = 50   # bins across the tolerance band, at most
+    MARGIN = 0.5       # extra band width shown on each side of the limits
+
+    def __init__(self):
+        self.fine = {}
+        self.total = 0
+        self.version = 0
+        self.limits = (None, None, None)
+        self.layout = None
+        self.counts = None
+        self.under = 0
+        self.over = 0
+
+    def clear(self):
+        self.fine = {}
+        self.total = 0
+        self._rebin()
+
+    def update(self, x):
+        um = round(x / RESOLUTION_MM)
+        self.fine[um] = self.fine.get(um, 0) + 1
+        self.total += 1
+        self.version += 1
+        if self.layout is not None:
+            self._bin(um, 1)
+
+    def _bin(self, um, n):
+        origin, width, nbins = self.layout
+        i = (um - origin) // width
+        if i < 0:
+            self.under += n
+        elif i >= nbins:
+            self.over += n
+        else:
+            self.counts[i] += n
+
+    def set_limits(self, usl, lsl, std):
+        self.limits = (usl, lsl, std)
+        self._rebin()
+
+    def _layout(self, usl, lsl, std):
+        um = lambda v: round(v / RESOLUTION_MM)
+        if usl is not None and lsl is not None and usl > lsl:
+            lo, hi = um(lsl), um(usl)
+        elif std is not None and (usl is not None or lsl is not None):
+            half = abs(um(usl if usl is not None else lsl) - um(std))
+            if not half:
+                return None
+            lo, hi = um(std) - half, um(std) + half
+        else:
+            return None
+        span = hi - lo
+        if span <= 0:
+            # limits closer than the gauge resolves, nothing to lay bins on
+            return None
+        # prefer a width that divides the band so both limits sit on an edge
+        width = next((w for w in range(-(-span // self.TARGET_BINS), span // 10 + 1) if span % w == 0), None)
+        if width is None:
+            width = _nice_width(span, self.TARGET_BINS)
+        margin = max(1, math.ceil(span * self.MARGIN / width))
+        nbins = -(-span // width) + 2 * margin
+        return lo - margin * width, width, nbins
+
+    def _rebin(self):
+        self.version += 1
+        self.layout = self._layout(*self.limits)
+        self.under = self.over = 0
+        if self.layout is None:
+            self.counts = None
+            return
+        self.counts = [0] * self.layout[2]
+        for um, n in self.fine.items():
+            self._bin(um, n)
+
+    def _auto(self):
+        # no usable limits: spread the observed readings over TARGET_BINS
+        lo, hi = min(self.fine), max(self.fine)
+        width = _nice_width(max(hi - lo + 1, 1), self.TARGET_BINS)
+        origin = (lo // width) * width
+        counts = [0] * ((hi - origin) // width + 1)
+        for um, n in self.fine.items():
+            counts[(um - origin) // width] += n
+        return origin, width, counts
+
+    def snapshot(self):
+        usl, lsl, std = self.limits
+        if self.layout is not None:
+            origin, width, _ = self.layout
+            counts, under, over, auto = list(self.counts), self.under, self.over, False
+        elif self.fine:
+            origin, width, counts = self._auto()
+            under = over = 0
+            auto = True
+        else:
+            origin, width, counts, under, over, auto = 0, 1, [], 0, 0, True
+        total, version = self.total, self.version
+        return {
+            'origin': round(origin * RESOLUTION_MM, 3),
+            'width': round(width * RESOLUTION_MM, 3),
+            'counts': counts,
+            'under': under,
+            'over': over,
+            'total': total,
+            'auto': auto,
+            'resolution': RESOLUTION_MM,
+            'usl': usl,
+            'lsl': lsl,
+            'std': std,
+            'version': version,
+        }
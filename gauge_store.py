@@ -0,0 +1,237 @@
+# Durable measurement store (SQLite in WAL mode)
+#
+# The reader threads only put rows on a queue; a single writer thread commits
+# them in batches, so disk latency never reaches the serial parsing. With
+# synchronous=NORMAL a WAL commit does not fsync, the fsync happens at
+# checkpoints, which gives batched fsyncs for free. sync='full' fsyncs every
+# batch instead.
+
+import array
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gauges (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS samples (
+    gauge_id INTEGER NOT NULL,
+    ts_ns INTEGER NOT NULL,
+    value REAL NOT NULL,
+    status INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_gauge_ts ON samples (gauge_id, ts_ns);
+CREATE TABLE IF NOT EXISTS captures (
+    gauge_id INTEGER NOT NULL,
+    ts_ns INTEGER NOT NULL,
+    value REAL NOT NULL,
+    status INTEGER NOT NULL,
+    type INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS captures_gauge_ts ON captures (gauge_id, ts_ns);
+"""
+
+SAMPLE = 0
+CAPTURE = 1
+_STOP = object()
+
+
+class MeasurementStore:
+    """Append-only sample/capture store with a batching writer thread."""
+
+    def __init__(self, path, batch_rows=2000, flush_interval=0.25, sync='normal', run_blocking=None):
+        self.path = path
+        # runs the commit; under gevent/eventlet the server passes one that
+        # moves it off the hub, since sqlite blocks without yielding
+        self.run_blocking = run_blocking or (lambda fn, *args: fn(*args))
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+        self.gauge_ids = {}
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_error = None
+
+        # opening the db replays any WAL left by a crash
+        conn = self._connect()
+        conn.execute('PRAGMA synchronous=' + ('FULL' if sync == 'full' else 'NORMAL'))
+        conn.executescript(SCHEMA)
+        for gauge_id, name in conn.execute('SELECT id, name FROM gauges'):
+            self.gauge_ids[name] = gauge_id
+        # rowid only grows, so this is a cheap upper bound on what survived
+        self.recovered_rows = conn.execute('SELECT MAX(rowid) FROM samples').fetchone()[0] or 0
+        self._conn = conn
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True, name='gauge-store-writer')
+        self.thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def gauge_id(self, name):
+        gauge_id = self.gauge_ids.get(name)
+        if gauge_id is None:
+            with self.lock:
+                self._conn.execute('INSERT OR IGNORE INTO gauges (name) VALUES (?)', (name,))
+                gauge_id = self._conn.execute('SELECT id FROM gauges WHERE name = ?', (name,)).fetchone()[0]
+            self.gauge_ids[name] = gauge_id
+        return gauge_id
+
+    @property
+    def backlog(self):
+        return self.queue.qsize()
+
+    # called from the reader threads, must stay O(1)
+    def add_sample(self, gauge_id, ts_ns, value, status):
+        self.queue.put((SAMPLE, (gauge_id, ts_ns, value, status)))
+
+    def add_capture(self, gauge_id, ts_ns, value, status, capture_type):
+        self.queue.put((CAPTURE, (gauge_id, ts_ns, value, status, capture_type)))
+
+    def _run(self):
+        get = self.queue.get
+        while True:
+            item = get()
+            if item is _STOP:
+                return
+            samples, captures = [], []
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                (samples if item[0] == SAMPLE else captures).append(item[1])
+                if len(samples) + len(captures) >= self.batch_rows:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = get(timeout=timeout)
+                except queue.Empty:
+                    break
+            self._write(samples, captures)
+            if stop:
+                return
+
+    def _write(self, samples, captures):
+        try:
+            with self.lock:
+                self.run_blocking(self._commit, samples, captures)
+            self.written += len(samples) + len(captures)
+            self.batches += 1
+        except sqlite3.Error as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"Store write error: {e}")
+            try:
+                self._conn.execute('ROLLBACK')
+            except sqlite3.Error:
+                pass
+
+    def _commit(self, samples, captures):
+        conn = self._conn
+        conn.execute('BEGIN')
+        if samples:
+            conn.executemany('INSERT INTO samples VALUES (?, ?, ?, ?)', samples)
+        if captures:
+            conn.executemany('INSERT INTO captures VALUES (?, ?, ?, ?, ?)', captures)
+        conn.execute('COMMIT')
+
+    def close(self):
+        # drain whatever the readers already queued
+        self.queue.put(_STOP)
+        self.thread.join(timeout=10)
+        with self.lock:
+            self._conn.close()
+
+    def blocks(self, name, start_ns=None, end_ns=None, block=4096):
+        """Yield (ts, values, status) arrays from disk, oldest first.
+
+        Uses its own connection, so a long read never holds up the writer;
+        WAL gives it a consistent snapshot for the whole iteration.
+        """
+        gauge_id = self.gauge_ids.get(name)
+        if gauge_id is None:
+            return
+        conn = self._connect()
+        try:
+            sql = 'SELECT ts_ns, value, status FROM samples WHERE gauge_id = ?'
+            params = [gauge_id]
+            if start_ns is not None:
+                sql += ' AND ts_ns >= ?'
+                params.append(start_ns)
+            if end_ns is not None:
+                sql += ' AND ts_ns <= ?'
+                params.append(end_ns)
+            cur = conn.execute(sql + ' ORDER BY ts_ns', params)
+            while True:
+                rows = cur.fetchmany(block)
+                if not rows:
+                    break
+                ts, values, status = zip(*rows)
+                yield array.array('q', ts), array.array('d', values), array.array('B', status)
+        finally:
+            conn.close()
+
+    def captures(self, name, start_ns=None, end_ns=None):
+        """List of (ts_ns, value, status, type) rows, oldest first."""
+        gauge_id = self.gauge_ids.get(name)
+        if gauge_id is None:
+            return []
+        conn = self._connect()
+        try:
+            sql = 'SELECT ts_ns, value, status, type FROM captures WHERE gauge_id = ?'
+            params = [gauge_id]
+            if start_ns is not None:
+                sql += ' AND ts_ns >= ?'
+                params.append(start_ns)
+            if end_ns is not None:
+                sql += ' AND ts_ns <= ?'
+                params.append(end_ns)
+            return conn.execute(sql + ' ORDER BY ts_ns', params).fetchall()
+        finally:
+            conn.close()
+
+    def time_range(self, name):
+        gauge_id = self.gauge_ids.get(name)
+        if gauge_id is None:
+            return None, None
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT MIN(ts_ns), MAX(ts_ns) FROM samples WHERE gauge_id = ?',
+                                (gauge_id,)).fetchone()
+        finally:
+            conn.close()
+
+    def aggregate(self, name, start_ns, end_ns, width):
+        """{bucket: [count, sum, min, min_ts, max, max_ts]} for ts_ns // width buckets."""
+        gauge_id = self.gauge_ids.get(name)
+        if gauge_id is None:
+            return {}
+        where = 'FROM samples WHERE gauge_id = ? AND ts_ns >= ? AND ts_ns <= ? GROUP BY b'
+        params = (width, gauge_id, start_ns, end_ns)
+        conn = self._connect()
+        try:
+            # with a single MIN()/MAX() sqlite fills bare columns from that row,
+            # which gives us the timestamp of each extreme
+            out = {}
+            conn.execute('BEGIN')  # both queries see the same snapshot
+            for b, count, total, lo, lo_ts in conn.execute(
+                    'SELECT ts_ns / ? AS b, COUNT(*), SUM(value), MIN(value), ts_ns ' + where, params):
+                out[b] = [count, total, lo, lo_ts, lo, lo_ts]
+            for b, hi, hi_ts in conn.execute('SELECT ts_ns / ? AS b, MAX(value), ts_ns ' + where, params):
+                agg = out[b]
+                agg[4] = hi
+                agg[5] = hi_ts
+            conn.execute('COMMIT')
+            return out
+        finally:
+            conn.close()
@@ -0,0 +1,178 @@
+# Compact binary frames for the gauge_bin Socket.IO event
+#
+# One message carries any mix of samples, captures and stats for one gauge.
+# Everything is little-endian:
+#
+#   u8  version (1)
+#   u8  flags          1 samples, 2 captures, 4 stats, 8 keyframe, 16 windows
+#   u8  len + utf-8    gauge id
+#   i64 base_ts_ns     sample/capture times are offsets from this
+#   [samples]  u16 n, then n x (u32 dt_us, i32 value_um, u8 status | button << 2)
+#   [captures] u16 n, then n x (u32 dt_us, i32 value_um, u8 status | type << 2)
+#   [stats]    u16 field mask, then the masked fields of STAT_FIELDS in order;
+#              without the keyframe flag only fields that changed are present
+#   [windows]  u8 n, then n x (u8 len + name, u32 count, 7 x f64 of WINDOW_FIELDS)
+#
+# Readings are 0.001 mm steps, so values travel as integer microns. Missing
+# float stats (no std yet, no limits for cp) are NaN.
+
+import math
+import struct
+
+WIRE_VERSION = 1
+
+F_SAMPLES = 1
+F_CAPTURES = 2
+F_STATS = 4
+F_KEYFRAME = 8
+F_WINDOWS = 16
+
+_HEAD = struct.Struct('<BBB')
+_BASE = struct.Struct('<q')
+_COUNT = struct.Struct('<H')
+_ROW = struct.Struct('<IiB')
+_MASK = struct.Struct('<H')
+_WINDOW = struct.Struct('<I7d')
+
+STAT_FIELDS = (
+    ('count', 'I'), ('min', 'd'), ('max', 'd'), ('avg', 'd'), ('range', 'd'),
+    ('std', 'd'), ('cp', 'd'), ('cpk', 'd'), ('button_count', 'I'),
+    ('pass_count', 'I'), ('ng_plus', 'I'), ('ng_minus', 'I'),
+)
+WINDOW_FIELDS = ('min', 'max', 'avg', 'range', 'std', 'cp', 'cpk')
+_FIELD_STRUCTS = {fmt: struct.Struct('<' + fmt) for fmt in ('I', 'd')}
+
+
+def _um(value):
+    return max(-2**31, min(2**31 - 1, round(value * 1000)))
+
+
+def _float(value):
+    return math.nan if value is None else value
+
+
+def _rows(rows, base):
+    # rows of (ts_ns, value, code)
+    pack = _ROW.pack
+    return b''.join(pack((ts - base) // 1000, _um(value), code) for ts, value, code in rows)
+
+
+class StatsEncoder:
+    """Remembers what was last sent so each frame carries only the changes."""
+
+    def __init__(self):
+        self.last = {}
+        self.last_windows = None
+        self.keyframe = True
+
+    def encode(self, stats):
+        """(flags, bytes) for the stats and windows sections, possibly empty."""
+        full = self.keyframe
+        self.keyframe = False
+        mask = 0
+        parts = []
+        last = self.last
+        for bit, (name, fmt) in enumerate(STAT_FIELDS):
+            value = stats.get(name)
+            if full or name not in last or last[name] != value:
+                mask |= 1 << bit
+                last[name] = value
+                parts.append(_FIELD_STRUCTS[fmt].pack(_float(value) if fmt == 'd' else value))
+        flags = 0
+        out = []
+        if mask:
+            flags |= F_STATS | (F_KEYFRAME if full else 0)
+            out.append(_MASK.pack(mask))
+            out.extend(parts)
+
+        windows = stats.get('windows') or []
+        if full or windows != self.last_windows:
+            self.last_windows = windows
+            flags |= F_WINDOWS
+            out.append(bytes((len(windows),)))
+            for window in windows:
+                name = window['window'].encode()
+                out.append(bytes((len(name),)) + name)
+                out.append(_WINDOW.pack(window['count'], *(_float(window[f]) for f in WINDOW_FIELDS)))
+        return flags, b''.join(out)
+
+
+def pack_message(gauge, samples=(), captures=(), stats=None):
+    """samples: (ts_ns, value, status_code, button); captures: (ts_ns, value, status_code, type_index);
+    stats: the (flags, bytes) pair from StatsEncoder.encode."""
+    flags = 0
+    times = []
+    if samples:
+        flags |= F_SAMPLES
+        times.append(samples[0][0])
+    if captures:
+        flags |= F_CAPTURES
+        times.append(captures[0][0])
+    stats_flags, stats_bytes = stats or (0, b'')
+    flags |= stats_flags
+    base = min(times) if times else 0
+
+    name = gauge.encode()[:255]
+    out = [_HEAD.pack(WIRE_VERSION, flags, len(name)), name, _BASE.pack(base)]
+    if samples:
+        out.append(_COUNT.pack(len(samples)))
+        out.append(_rows(((ts, v, code | (button << 2)) for ts, v, code, button in samples), base))
+    if captures:
+        out.append(_COUNT.pack(len(captures)))
+        out.append(_rows(((ts, v, code | (kind << 2)) for ts, v, code, kind in captures), base))
+    out.append(stats_bytes)
+    return b''.join(out)
+
+
+def unpack_message(buf):
+    """Decode a gauge_bin message (used by the benchmark; the dashboard has its own)."""
+    view = memoryview(buf)
+    version, flags, name_len = _HEAD.unpack_from(view, 0)
+    if version != WIRE_VERSION:
+        raise ValueError(f'unknown wire version {version}')
+    pos = _HEAD.size
+    msg = {'gauge': bytes(view[pos:pos + name_len]).decode(), 'keyframe': bool(flags & F_KEYFRAME)}
+    pos += name_len
+    (base,) = _BASE.unpack_from(view, pos)
+    pos += _BASE.size
+
+    def rows():
+        nonlocal pos
+        (n,) = _COUNT.unpack_from(view, pos)
+        pos += _COUNT.size
+        out = []
+        for dt, um, bits in _ROW.iter_unpack(view[pos:pos + n * _ROW.size]):
+            out.append((base + dt * 1000, um / 1000, bits & 3, bits >> 2))
+        pos += n * _ROW.size
+        return out
+
+    if flags & F_SAMPLES:
+        msg['samples'] = rows()
+    if flags & F_CAPTURES:
+        msg['captures'] = rows()
+    if flags & F_STATS:
+        (mask,) = _MASK.unpack_from(view, pos)
+        pos += _MASK.size
+        stats = {}
+        for bit, (name, fmt) in enumerate(STAT_FIELDS):
+            if mask & (1 << bit):
+                field = _FIELD_STRUCTS[fmt]
+                (value,) = field.unpack_from(view, pos)
+                pos += field.size
+                stats[name] = None if fmt == 'd' and math.isnan(value) else value
+        msg['stats'] = stats
+    if flags & F_WINDOWS:
+        n = view[pos]
+        pos += 1
+        windows = []
+        for _ in range(n):
+            name_len = view[pos]
+            name = bytes(view[pos + 1:pos + 1 + name_len]).decode()
+            pos += 1 + name_len
+            count, *values = _WINDOW.unpack_from(view, pos)
+            pos += _WINDOW.size
+            window = {'window': name, 'count': count}
+            window.update((f, None if math.isnan(v) else v) for f, v in zip(WINDOW_FIELDS, values))
+            windows.append(window)
+        msg['windows'] = windows
+    return msg
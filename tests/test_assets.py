@@ -0,0 +1,37 @@
+import os
+import re
+
+os.environ.setdefault('GAUGE_STORE_PATH', '')
+
+import gauge_server as gs  # noqa: E402
+
+
+def script_src():
+    page = gs.app.test_client().get('/').get_data(as_text=True)
+    return re.search(r'<script src="([^"]+)"></script>', page).group(1)
+
+
+def test_dashboard_uses_bundled_client():
+    src = script_src()
+    assert src.startswith('/static/socket.io.')
+    resp = gs.app.test_client().get(src)
+    assert resp.status_code == 200
+    assert resp.headers['Cache-Control'] == gs.IMMUTABLE
+    with open(gs.app.config['SOCKETIO_JS'], 'rb') as f:
+        assert resp.get_data() == f.read()
+
+
+def test_cdn_only_when_asked_for():
+    default = gs.app.config['SOCKETIO_JS']
+    cdn = 'https://cdn.socket.io/4.5.0/socket.io.min.js'
+    try:
+        gs.app.config['SOCKETIO_JS'] = cdn
+        gs.build_assets()
+        assert script_src() == cdn
+        # a missing file does not quietly turn into the CDN either
+        gs.app.config['SOCKETIO_JS'] = os.path.join(os.path.dirname(default), 'missing.js')
+        gs.build_assets()
+        assert script_src().startswith('/static/')
+    finally:
+        gs.app.config['SOCKETIO_JS'] = default
+        gs.build_assets()
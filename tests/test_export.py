@@ -0,0 +1,62 @@
+import os
+from urllib.parse import quote
+
+os.environ.setdefault('GAUGE_STORE_PATH', '')
+
+import gauge_server as gs  # noqa: E402
+
+
+def export(path, name):
+    session = gs.GaugeSession('test-export')
+    with gs.sessions_lock:
+        gs.sessions['test-export'] = session
+    try:
+        session.handle_reading(1.0, True)
+        resp = gs.app.test_client().get(path, query_string={'gauge': 'test-export', 'filename': name})
+        return resp, resp.get_data()
+    finally:
+        with gs.sessions_lock:
+            gs.sessions.pop('test-export', None)
+
+
+def test_non_ascii_filename_downloads():
+    for path in ('/export/important', '/export/continuous'):
+        resp, body = export(path, '測定.csv')
+        assert resp.status_code == 200
+        disposition = resp.headers['Content-Disposition']
+        assert disposition.startswith('attachment; filename=')
+        assert "filename*=UTF-8''" + quote('測定.csv') in disposition
+        assert body
+
+
+def test_ascii_filename_unchanged():
+    resp, _ = export('/export/important', 'run 1 (a).csv')
+    assert resp.headers['Content-Disposition'] == 'attachment; filename="run 1 (a).csv"'
+
+
+def test_store_export_after_restart(tmp_path, monkeypatch):
+    path = str(tmp_path / 'gauge.db')
+    monkeypatch.setattr(gs, 'store', gs.MeasurementStore(path))
+    session = gs.GaugeSession('test-restart')
+    session.store_id = gs.store.gauge_id('test-restart')   # as open() does
+    for value in (1.0, 1.1, 1.2):
+        session.handle_reading(value, value == 1.1)
+    gs.store.close()
+
+    # a fresh process: the rows are on disk, no session for the gauge
+    monkeypatch.setattr(gs, 'store', gs.MeasurementStore(path))
+    try:
+        client = gs.app.test_client()
+        args = {'gauge': 'test-restart', 'source': 'store'}
+        resp = client.get('/export/continuous', query_string=args)
+        assert resp.status_code == 200
+        rows = resp.get_data(as_text=True).splitlines()[1:]
+        assert [row.split(',')[1] for row in rows] == ['1.000', '1.100', '1.200']
+        resp = client.get('/export/important', query_string=args)
+        assert resp.status_code == 200
+        assert len(resp.get_data(as_text=True).splitlines()) == 2
+        # memory export still needs a live session
+        assert client.get('/export/continuous', query_string={'gauge': 'test-restart'}).status_code == 404
+        assert client.get('/export/continuous', query_string={'gauge': 'nope', 'source': 'store'}).status_code == 404
+    finally:
+        gs.store.close()
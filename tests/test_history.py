@@ -0,0 +1,139 @@
+import math
+import os
+import random
+import time
+
+os.environ.setdefault('GAUGE_STORE_PATH', '')
+
+import gauge_server as gs  # noqa: E402
+from gauge_history import BucketCache, aggregate_blocks, bucket_width, lttb, minmax_points  # noqa: E402
+
+MS = 1_000_000
+T0 = 1_600_000_000_000_000_000   # long past, so every bucket is sealed
+
+
+def series(n, seed=0):
+    rng = random.Random(seed)
+    ts = [T0 + i * MS for i in range(n)]
+    values = [math.sin(i / 50) + rng.gauss(0, 0.05) for i in range(n)]
+    return ts, values
+
+
+def test_lttb_keeps_ends_and_count():
+    ts, values = series(5000)
+    for threshold in (3, 10, 999, 4999):
+        out_t, out_v = lttb(ts, values, threshold)
+        assert len(out_t) == len(out_v) == threshold
+        assert (out_t[0], out_v[0]) == (ts[0], values[0])
+        assert (out_t[-1], out_v[-1]) == (ts[-1], values[-1])
+        assert out_t == sorted(set(out_t))
+    # nothing to drop
+    assert lttb(ts[:10], values[:10], 10) == (ts[:10], values[:10])
+
+
+def test_lttb_keeps_a_spike():
+    ts, values = series(5000)
+    values[2500] = 50.0
+    assert 50.0 in lttb(ts, values, 100)[1]
+
+
+def test_minmax_points_keep_extremes_in_order():
+    ts, values = series(5000)
+    width = bucket_width(ts[0], ts[-1], 40)
+    aggs = aggregate_blocks([(ts, values, None)], width)
+    out_t, out_v = minmax_points(aggs)
+    assert len(out_t) <= 2 * len(aggs)
+    assert out_t == sorted(out_t)
+    for b, agg in aggs.items():
+        in_bucket = [v for t, v in zip(out_t, out_v) if t // width == b]
+        assert min(in_bucket) == agg[2] and max(in_bucket) == agg[4]
+
+
+def test_bucket_cache_fetches_only_gaps():
+    width = 10 * MS
+    calls = []
+
+    def fetch(lo, hi):
+        calls.append((lo, hi))
+        return {b: [1, b, b, b * width, b, b * width] for b in range(lo // width, hi // width + 1)}
+
+    b0 = T0 // width
+    cache = BucketCache()
+    cache.get('g', width, b0 + 3, b0 + 5, fetch)
+    cache.get('g', width, b0 + 8, b0 + 8, fetch)
+    calls.clear()
+    out = cache.get('g', width, b0, b0 + 10, fetch)
+    assert sorted(out) == list(range(b0, b0 + 11))
+    # one query per run of missing buckets: 0-2, 6-7, 9-10
+    assert calls == [(b0 * width, (b0 + 3) * width - 1), ((b0 + 6) * width, (b0 + 8) * width - 1),
+                     ((b0 + 9) * width, (b0 + 11) * width - 1)]
+
+    # the same query again comes from the cache alone
+    calls.clear()
+    hits = cache.hits
+    assert cache.get('g', width, b0, b0 + 10, fetch) == out
+    assert calls == [] and cache.hits == hits + 11
+
+
+def test_bucket_cache_remembers_empty_but_not_unsealed():
+    width = 1000 * MS
+    calls = []
+
+    def fetch(lo, hi):
+        calls.append((lo, hi))
+        return {}
+
+    cache = BucketCache()
+    b0 = T0 // width
+    assert cache.get('g', width, b0, b0 + 4, fetch) == {}
+    assert cache.get('g', width, b0, b0 + 4, fetch) == {}
+    assert len(calls) == 1
+    # buckets that can still get rows are fetched every time
+    now = time.time_ns() // width
+    cache.get('g', width, now, now, fetch)
+    cache.get('g', width, now, now, fetch)
+    assert len(calls) == 3
+
+
+def test_bucket_cache_lru_trim():
+    width = MS
+    fetch = lambda lo, hi: {}
+    cache = BucketCache(max_buckets=10)
+    b0 = T0 // width
+    cache.get('a', width, b0, b0 + 5, fetch)
+    cache.get('b', width, b0, b0 + 5, fetch)
+    # 'a' was used longest ago and goes first
+    assert list(cache.levels) == [('b', width)] and cache.size == 6
+    cache.get('b', width, b0, b0 + 5, fetch)
+    cache.get('c', width, b0, b0 + 2, fetch)
+    assert list(cache.levels) == [('b', width), ('c', width)]
+
+
+def test_history_never_exceeds_points_and_repeats_from_cache(tmp_path, monkeypatch):
+    store = gs.MeasurementStore(str(tmp_path / 'gauge.db'))
+    monkeypatch.setattr(gs, 'store', store)
+    monkeypatch.setattr(gs, 'history_cache', BucketCache())
+    try:
+        gauge_id = store.gauge_id('COM7')
+        ts, values = series(20000, seed=1)
+        for t, v in zip(ts, values):
+            store.add_sample(gauge_id, t, v, 0)
+        store.close()
+        monkeypatch.setattr(gs, 'store', gs.MeasurementStore(str(tmp_path / 'gauge.db')))
+        client = gs.app.test_client()
+        for method in ('minmax', 'lttb'):
+            for points in (3, 7, 100, 1001):
+                args = {'gauge': 'COM7', 'source': 'store', 'method': method, 'points': points,
+                        'start': ts[0] / 1e9, 'end': ts[-1] / 1e9}
+                result = client.get('/api/history', query_string=args).json['gauges'][0]
+                assert result['mode'] == method and result['count'] == 20000
+                assert 0 < len(result['t']) <= points
+                if method == 'lttb':
+                    assert result['t'][0] >= ts[0] // MS and result['t'][-1] <= ts[-1] // MS
+
+                misses = gs.history_cache.misses
+                again = client.get('/api/history', query_string=args).json
+                assert again['gauges'][0] == result
+                assert again['cache']['misses'] == misses
+    finally:
+        gs.store.close()
@@ -0,0 +1,110 @@
+import array
+import os
+
+from gauge_log import ROW_BYTES, SampleLog
+
+
+def make_log(tmp_path=None, capacity=8, chunk_rows=4):
+    spill = str(tmp_path / 'spill.bin') if tmp_path is not None else None
+    return SampleLog(memory_budget=capacity * ROW_BYTES, spill_path=spill, chunk_rows=chunk_rows)
+
+
+def fill(log, rows, start=0):
+    # ts 1000, 1010, ... so rows and times map one to one
+    for i in range(start, start + rows):
+        log.append(1000 + 10 * i, i / 10, i % 4)
+
+
+def expected(rows, start=0):
+    return [(1000 + 10 * i, i / 10, i % 4) for i in range(start, start + rows)]
+
+
+def test_spill_round_trip(tmp_path):
+    log = make_log(tmp_path)
+    fill(log, 30)
+    assert log.capacity == 8
+    assert len(log) == 30
+    assert len(log.spilled) == 6 and log.evicted == 0
+    assert os.path.getsize(log.spill_file) == 24 * ROW_BYTES
+    assert list(log.rows()) == expected(30)
+
+
+def test_extend_matches_append(tmp_path):
+    log = make_log(tmp_path)
+    rows = expected(21)
+    log.extend(array.array('q', [r[0] for r in rows]), array.array('d', [r[1] for r in rows]),
+               array.array('B', [r[2] for r in rows]))
+    assert list(log.rows()) == rows
+
+
+def test_eviction_without_spill():
+    log = make_log()
+    fill(log, 30)
+    # the ring drops a chunk at a time
+    assert log.evicted == 24
+    assert len(log) == 6
+    assert list(log.rows()) == expected(6, 24)
+
+
+def test_read_while_ring_is_overtaken(tmp_path):
+    log = make_log(tmp_path)
+    fill(log, 8)
+    blocks = log.blocks(block=2)
+    got = list(zip(*next(blocks)))
+    # the ring goes round twice before the reader comes back
+    fill(log, 16, 8)
+    for ts, values, status in blocks:
+        got.extend(zip(ts, values, status))
+    # the snapshot, once each, the overtaken part read back from the spill file
+    assert got == expected(8)
+
+
+def test_overtaken_without_spill_skips_lost_rows():
+    log = make_log()
+    fill(log, 8)
+    blocks = log.blocks(block=2)
+    got = list(zip(*next(blocks)))
+    fill(log, 4, 8)
+    for ts, values, status in blocks:
+        got.extend(zip(ts, values, status))
+    # rows 2-3 went with the evicted chunk; the rest of the snapshot follows
+    assert got == expected(2) + expected(4, 4)
+
+
+def test_time_trim(tmp_path):
+    log = make_log(tmp_path)
+    fill(log, 30)
+    rows = expected(30)
+    for start_ns, end_ns in ((1000, 1290), (1035, 1105), (1040, 1040), (1200, None),
+                             (None, 1055), (1241, 1290), (1295, None), (None, 999)):
+        want = [r for r in rows if (start_ns is None or r[0] >= start_ns) and (end_ns is None or r[0] <= end_ns)]
+        assert list(log.rows(start_ns, end_ns)) == want, (start_ns, end_ns)
+
+
+def test_clear_while_exporting(tmp_path):
+    log = make_log(tmp_path)
+    fill(log, 30)
+    old_file = log.spill_file
+    blocks = log.blocks(block=2)
+    got = list(zip(*next(blocks)))
+    # a reconnect clears the log while the export still reads the spill file
+    log.clear()
+    fill(log, 12, 100)
+    assert log.spill_file != old_file and os.path.exists(old_file)
+    for ts, values, status in blocks:
+        got.extend(zip(ts, values, status))
+    # the rest of the old spill file, nothing from after the clear
+    assert got == expected(24)
+    assert not os.path.exists(old_file)
+    assert log.readers == {}
+    assert list(log.rows()) == expected(12, 100)
+
+
+def test_clear_without_readers_reuses_file(tmp_path):
+    log = make_log(tmp_path)
+    fill(log, 30)
+    path = log.spill_file
+    list(log.rows())
+    log.clear()
+    assert log.spill_file == path and not os.path.exists(path)
+    assert len(log) == 0 and list(log.rows()) == []
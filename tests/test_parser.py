@@ -0,0 +1,111 @@
+import pytest
+
+from gauge_parser import FRAME_LEN, PacketParser, encode_frame
+
+
+def frames(*values):
+    return b''.join(encode_frame(v) for v in values)
+
+
+def test_decodes_frames_and_button():
+    parser = PacketParser()
+    out = parser.feed(encode_frame(1.234) + encode_frame(-0.5, button=True))
+    assert out == [(1.234, False), (-0.5, True)]
+    assert parser.frames == 2
+    assert parser.pending == 0
+
+
+def test_frame_split_across_chunks():
+    parser = PacketParser()
+    data = frames(1.0, 2.0, 3.0)
+    out = []
+    for cut in (5, 14, 30):
+        out += parser.feed(data[:cut])
+        data = data[cut:]
+    out += parser.feed(data)
+    assert [v for v, _ in out] == [1.0, 2.0, 3.0]
+    assert parser.dropped_bytes == 0
+
+
+def test_byte_at_a_time():
+    parser = PacketParser()
+    out = []
+    for b in frames(0.001, -999.999):
+        out += parser.feed(bytes((b,)))
+    assert out == [(0.001, False), (-999.999, False)]
+
+
+def test_garbage_is_skipped_and_counted():
+    parser = PacketParser()
+    out = parser.feed(b'abc' + encode_frame(1.0) + b'\x00\xff' + encode_frame(2.0) + b'zz')
+    assert [v for v, _ in out] == [1.0, 2.0]
+    assert parser.dropped_bytes == 3 + 2 + 2
+
+
+def test_false_sync_resyncs_on_next_frame():
+    parser = PacketParser()
+    # a sync byte that isn't followed by a valid header costs exactly one byte
+    out = parser.feed(b'\x12xx' + encode_frame(4.2))
+    assert out == [(4.2, False)]
+    assert parser.dropped_bytes == 3
+
+
+def test_torn_frame_then_good_frame():
+    parser = PacketParser()
+    out = parser.feed(encode_frame(1.0)[:6] + encode_frame(2.0))
+    assert [v for v, _ in out] == [2.0]
+    assert parser.frames == 1
+    assert parser.dropped_bytes > 0
+
+
+def test_bad_digits_counted():
+    parser = PacketParser()
+    bad = bytearray(encode_frame(1.0))
+    bad[5] = ord('x')
+    out = parser.feed(bytes(bad) + encode_frame(2.0))
+    assert out == [(2.0, False)]
+    assert parser.bad_frames == 1
+    assert parser.dropped_bytes == 0
+
+
+def test_bad_sign_is_not_a_frame():
+    parser = PacketParser()
+    bad = bytearray(encode_frame(1.0))
+    bad[1] = ord('*')
+    out = parser.feed(bytes(bad) + encode_frame(2.0))
+    assert out == [(2.0, False)]
+    assert parser.bad_frames == 0
+    assert parser.dropped_bytes == FRAME_LEN
+
+
+def test_capacity_smaller_than_a_frame():
+    with pytest.raises(ValueError):
+        PacketParser(capacity=FRAME_LEN - 1)
+
+
+def test_chunk_larger_than_capacity():
+    parser = PacketParser(capacity=FRAME_LEN)
+    values = [i / 1000 for i in range(50)]
+    out = parser.feed(frames(*values))
+    assert [v for v, _ in out] == values
+
+
+def test_reset_clears_tail_and_counters():
+    parser = PacketParser()
+    parser.feed(b'junk' + encode_frame(1.0) + encode_frame(2.0)[:4])
+    assert parser.pending == 4
+    parser.reset()
+    assert (parser.pending, parser.frames, parser.bad_frames, parser.dropped_bytes) == (0, 0, 0, 0)
+    # the old partial frame must not join the next chunk
+    assert parser.feed(encode_frame(3.0)) == [(3.0, False)]
+
+
+def test_discard_pending_keeps_counters():
+    parser = PacketParser()
+    parser.feed(b'junk' + encode_frame(1.0) + encode_frame(2.0)[:4])
+    parser.discard_pending()
+    assert parser.pending == 0
+    assert parser.frames == 1
+    assert parser.dropped_bytes == 4 + 4
+    assert parser.feed(encode_frame(3.0)) == [(3.0, False)]
+    assert parser.frames == 2
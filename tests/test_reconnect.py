@@ -0,0 +1,67 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip('pty')
+os.environ.setdefault('GAUGE_STORE_PATH', '')
+
+import serial  # noqa: E402
+
+import gauge_server as gs  # noqa: E402
+from gauge_sim import SimGauge, Simulator  # noqa: E402
+
+
+def wait_for(cond, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def metric(text, name):
+    for line in text.splitlines():
+        if line.startswith(name + '{'):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+def test_counters_survive_reconnect(monkeypatch):
+    sim = Simulator([SimGauge(rate=100, seed=1)])
+    port = sim.ports[0]
+    client = gs.app.test_client()
+    assert client.post('/api/connect', json={'port': port}).json['success']
+    sim.start()
+    try:
+        session = gs.sessions[port]
+        assert wait_for(lambda: session.parser.frames >= 30)
+
+        # fail the next read once, as an unplugged cable would
+        real = gs.read_available
+        failed = []
+
+        def flaky(ser):
+            if not failed:
+                failed.append(True)
+                raise serial.SerialException('device disconnected')
+            return real(ser)
+
+        before = metric(client.get('/metrics').data.decode(), 'gauge_packets_decoded_total')
+        monkeypatch.setattr(gs, 'read_available', flaky)
+        assert wait_for(lambda: session.reconnects == 1)
+        frames_at_reconnect = session.parser.frames
+        assert frames_at_reconnect >= before
+        assert wait_for(lambda: session.parser.frames > frames_at_reconnect + 10)
+
+        text = client.get('/metrics').data.decode()
+        assert metric(text, 'gauge_packets_decoded_total') > before
+        assert metric(text, 'gauge_reconnects_total') == 1
+        info = client.get('/api/gauges').json['gauges'][0]
+        assert info['count'] >= session.parser.frames - 5
+        assert info['dropped_bytes'] >= 0
+        assert len(info['gaps']) == 1
+    finally:
+        client.post('/api/disconnect', json={'gauge': port})
+        sim.stop()
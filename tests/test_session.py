@@ -0,0 +1,78 @@
+import os
+import threading
+
+os.environ.setdefault('GAUGE_STORE_PATH', '')
+
+import gauge_server as gs  # noqa: E402
+
+
+def test_submit_while_writer_is_held_is_not_lost():
+    session = gs.GaugeSession('test-drain')
+    apply = session.apply_commands
+    queued = []
+
+    def apply_then_submit():
+        apply()
+        if not queued:
+            # another thread queues a command after the queue was emptied but
+            # before this thread lets go of the writer role
+            def other():
+                queued.append(session.submit(session._zero))
+            t = threading.Thread(target=other)
+            t.start()
+            t.join()
+
+    session.apply_commands = apply_then_submit
+    session.gauge_data['raw_value'] = 1.5
+    first = session.submit(session._set_tolerance, 1.0, -1.0, 0.0)
+    assert first.done()
+    assert queued and queued[0].result(timeout=1) is None
+    assert session.gauge_data['offset'] == 1.5
+
+
+def test_call_answers_without_a_reader():
+    session = gs.GaugeSession('test-call')
+    session.set_tolerance(0.5, -0.5, 0.0)
+    assert session.call(lambda: session.gauge_data['tolerance']['usl']) == 0.5
+
+
+def test_reset_after_sub_micron_tolerance():
+    session = gs.GaugeSession('test-tol')
+    session.call(session._set_tolerance, 0.0104, 0.0101, None)
+    session.spc_points.append({'x': 1.0})
+    session.call(session._reset_stats)
+    assert not session.spc_points
+
+
+def test_failed_connect_leaves_no_gauge(tmp_path, monkeypatch):
+    monkeypatch.setattr(gs, 'store', gs.MeasurementStore(str(tmp_path / 'gauge.db')))
+    try:
+        port = str(tmp_path / 'no-such-port')
+        resp = gs.app.test_client().post('/api/connect', json={'ports': [port]})
+        assert resp.json['success'] is False
+        assert port not in gs.sessions
+        assert port not in gs.store.gauge_ids
+    finally:
+        gs.store.close()
+
+
+def test_stats_range_reports_the_hours_used():
+    session = gs.GaugeSession('test-stats')
+    hour = 3600 * 10**9
+    for i, x in enumerate((1.0, 2.0, 3.0)):
+        session.partitions.update(10 * hour + i * 60 * 10**9, x)
+    with gs.sessions_lock:
+        gs.sessions['test-stats'] = session
+    try:
+        # five minutes asked for, the whole hour comes back
+        resp = gs.app.test_client().get('/api/stats', query_string={
+            'gauge': 'test-stats', 'start': 10 * 3600 + 60, 'end': 10 * 3600 + 360})
+        data = resp.json
+        assert data['merged']['count'] == 3
+        assert (data['start_ns'], data['end_ns']) == (10 * hour, 11 * hour - 1)
+        assert data['gauges']['test-stats']['start_ns'] == 10 * hour
+        # no range: cumulative stats, no span to report
+        assert gs.app.test_client().get('/api/stats', query_string={'gauge': 'test-stats'}).json['start_ns'] is None
+    finally:
+        with gs.sessions_lock:
+            gs.sessions.pop('test-stats', None)
@@ -0,0 +1,100 @@
+import random
+
+from gauge_spc import ControlChart, RuleState
+
+
+def feed(values, cl=0.0, sigma=1.0):
+    # rules fired on each point, against a fixed centre line and sigma
+    rules = RuleState()
+    return [rules.check(x, cl, sigma) for x in values]
+
+
+def first(fired, rule):
+    # index of the first point that fired rule, None if none did
+    return next((i for i, f in enumerate(fired) if rule in f), None)
+
+
+def test_rule1_beyond_3_sigma():
+    fired = feed([0.0, 3.0, 3.5, -3.1])
+    assert [1 in f for f in fired] == [False, False, True, True]
+
+
+def test_rule2_nine_on_one_side():
+    fired = feed([0.5] * 12)
+    assert first(fired, 2) == 8
+    assert sum(2 in f for f in fired) == 1
+    # a point on the centre line breaks the run
+    assert first(feed([0.5] * 8 + [0.0] + [0.5] * 8), 2) is None
+
+
+def test_rule3_six_trending():
+    fired = feed([0.0, 0.1, 0.2, 0.3, 0.4, 0.5])
+    assert first(fired, 3) == 5
+    assert first(feed([0.5, 0.4, 0.3, 0.2, 0.1, 0.0]), 3) == 5
+    assert first(feed([0.0, 0.1, 0.2, 0.2, 0.3, 0.4, 0.5]), 3) is None
+
+
+def test_rule4_fourteen_alternating():
+    fired = feed([0.2, -0.2] * 7)
+    assert first(fired, 4) == 13
+    assert first(feed([0.2, -0.2] * 6 + [-0.3, 0.2]), 4) is None
+
+
+def test_rule5_two_of_three_beyond_2_sigma():
+    assert first(feed([2.5, 0.0, 2.5]), 5) == 2
+    assert first(feed([2.5, -2.5, 0.0]), 5) is None
+    # only fires on a point that is out there itself
+    assert first(feed([2.5, 2.5, 0.0]), 5) == 1
+
+
+def test_rule6_four_of_five_beyond_1_sigma():
+    assert first(feed([1.5, 1.5, 0.0, 1.5, 1.5]), 6) == 4
+    assert first(feed([1.5, -1.5, 0.0, 1.5, 1.5]), 6) is None
+
+
+def test_rule7_fifteen_within_1_sigma():
+    fired = feed([0.1, -0.1] * 8)
+    assert first(fired, 7) == 14
+    assert first(feed([0.1, -0.1] * 7 + [1.5, 0.1]), 7) is None
+
+
+def test_rule8_eight_beyond_1_sigma_both_sides():
+    assert first(feed([1.5, -1.5] * 4), 8) == 7
+    # all on one side is rule 2/6 territory, not 8
+    assert first(feed([1.5] * 8), 8) is None
+    # until a point on the other side makes the last 8 two-sided
+    fired = feed([1.5] * 8 + [-1.5, -1.5])
+    assert first(fired, 8) == 8
+    assert sum(8 in f for f in fired) == 1
+    # a point inside 1 sigma ends the run
+    assert first(feed([1.5, -1.5] * 3 + [0.5] + [1.5, -1.5]), 8) is None
+
+
+def test_chart_waits_for_spread_before_freezing():
+    chart = ControlChart(subgroup=1, baseline=5)
+    points = [chart.add(1.000, i) for i in range(10)]
+    assert all(p['phase'] == 'baseline' and not p['violations'] for p in points[1:])
+    assert chart.frozen is None
+    # 1 um apart: no alarms while there is nothing to set limits from
+    assert not chart.add(1.001, 10)['violations']
+    for i, x in enumerate([1.000, 1.002, 1.001, 1.000], 11):
+        chart.add(x, i)
+    assert chart.frozen is not None and chart.frozen['r_cl'] > 0
+
+
+def test_chart_flags_a_shift():
+    rng = random.Random(3)
+    chart = ControlChart(subgroup=5, baseline=20)
+    for i in range(100):
+        chart.add(rng.gauss(10.0, 0.01), i)
+    limits = chart.info()['limits']
+    assert chart.info()['phase'] == 'monitor'
+    assert limits['lcl'] < 10.0 < limits['ucl']
+    point = None
+    for i in range(5):
+        point = chart.add(10.1, 100 + i) or point
+    assert any(v['chart'] == 'x' and v['rule'] == 1 for v in point['violations'])
+    # one wide subgroup trips the range chart
+    for i, x in enumerate([9.9, 10.1, 10.0, 10.0, 10.0]):
+        point = chart.add(x, 200 + i) or point
+    assert any(v['chart'] == 'r' for v in point['violations'])
@@ -0,0 +1,192 @@
+import random
+import statistics
+
+import pytest
+
+from collections import deque
+
+from gauge_stats import PartitionedStats, RunningStats, ToleranceHistogram, parse_window
+
+HOUR = 3600 * 10**9
+
+
+def stats_of(values):
+    stats = RunningStats()
+    for x in values:
+        stats.update(x)
+    return stats
+
+
+def assert_matches(stats, values):
+    assert stats.n == len(values)
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.std == pytest.approx(statistics.stdev(values))
+    assert (stats.min, stats.max) == (min(values), max(values))
+
+
+def test_merge_matches_one_pass():
+    rng = random.Random(1)
+    values = [rng.gauss(10.0, 0.02) for _ in range(1000)]
+    for cut in (1, 2, 500, 999):
+        assert_matches(stats_of(values[:cut]).merge(stats_of(values[cut:])), values)
+
+
+def test_merge_with_empty():
+    values = [1.0, 1.5, 0.5]
+    assert_matches(stats_of(values).merge(RunningStats()), values)
+    assert_matches(RunningStats().merge(stats_of(values)), values)
+    assert RunningStats().merge(RunningStats()).n == 0
+    # copy is a merge into an empty one and must not share state
+    original = stats_of(values)
+    copy = original.copy()
+    copy.update(9.0)
+    assert original.n == 3
+
+
+def test_partition_query():
+    parts = PartitionedStats(partition_ns=HOUR)
+    by_hour = {0: [1.0, 2.0], 1: [3.0, 4.0, 5.0], 3: [6.0, 7.0]}
+    for hour, values in by_hour.items():
+        for i, x in enumerate(values):
+            parts.update(hour * HOUR + i, x)
+    assert_matches(parts.query(), [x for v in by_hour.values() for x in v])
+    # any overlap pulls in the whole partition
+    assert_matches(parts.query(HOUR + 5 * 60 * 10**9, HOUR + 10 * 60 * 10**9), by_hour[1])
+    assert_matches(parts.query(HOUR - 1, HOUR), by_hour[0] + by_hour[1])
+    assert_matches(parts.query(start_ns=2 * HOUR), by_hour[3])
+    assert_matches(parts.query(end_ns=HOUR - 1), by_hour[0])
+    assert parts.query(2 * HOUR, 3 * HOUR - 1).n == 0
+
+
+def test_partition_query_span():
+    parts = PartitionedStats(partition_ns=HOUR)
+    parts.update(HOUR + 1, 1.0)
+    parts.update(3 * HOUR + 1, 2.0)
+    stats, first, last = parts.query_span(HOUR + 10, HOUR + 20)
+    assert stats.n == 1
+    assert (first, last) == (HOUR, 2 * HOUR - 1)
+    # empty hours in between don't widen it, only the ones merged do
+    assert parts.query_span(0, 4 * HOUR)[1:] == (HOUR, 4 * HOUR - 1)
+    assert parts.query_span(2 * HOUR, 2 * HOUR + 1)[1:] == (None, None)
+
+
+def test_partitions_keep_limit():
+    parts = PartitionedStats(partition_ns=HOUR, keep=2)
+    for hour in range(4):
+        parts.update(hour * HOUR, float(hour))
+    assert list(parts.parts) == [2, 3]
+    assert_matches(parts.query(), [2.0, 3.0])
+
+
+def test_layout_two_sided():
+    # 100 um band in 2 um bins, both limits on an edge, half a band either side
+    origin, width, nbins = ToleranceHistogram()._layout(0.05, -0.05, None)
+    assert (origin, width, nbins) == (-100, 2, 100)
+    assert (-50 - origin) % width == 0 and (50 - origin) % width == 0
+
+
+def test_layout_one_sided_with_std():
+    h = ToleranceHistogram()
+    assert h._layout(0.05, None, 0.0) == h._layout(0.05, -0.05, None)
+    # lower limit only: mirrored around the standard
+    assert h._layout(None, -0.02, 0.01) == h._layout(0.04, -0.02, None)
+
+
+def test_layout_degenerate_limits():
+    h = ToleranceHistogram()
+    assert h._layout(None, None, 0.0) is None
+    assert h._layout(0.05, None, None) is None
+    assert h._layout(0.05, None, 0.05) is None
+    assert h._layout(-0.05, 0.05, None) is None
+    assert h._layout(0.01, 0.01, None) is None
+    # USL > LSL, but both round to the same micron
+    assert h._layout(0.0104, 0.0101, None) is None
+
+
+def test_sub_micron_band_keeps_counting():
+    h = ToleranceHistogram()
+    h.set_limits(0.0104, 0.0101, None)
+    assert h.counts is None
+    h.update(0.010)
+    h.clear()
+    assert h.total == 0
+
+
+def brute(values):
+    return {
+        'count': len(values),
+        'min': min(values),
+        'max': max(values),
+        'avg': statistics.mean(values),
+        'std': statistics.stdev(values) if len(values) > 1 else None,
+    }
+
+
+def assert_window(window, values):
+    got = window.as_dict()
+    want = brute(values)
+    assert (got['count'], got['min'], got['max']) == (want['count'], want['min'], want['max'])
+    assert got['range'] == want['max'] - want['min']
+    assert got['avg'] == pytest.approx(want['avg'], rel=1e-12)
+    if want['std'] is None:
+        assert got['std'] is None
+    else:
+        assert got['std'] == pytest.approx(want['std'], rel=1e-9, abs=1e-12)
+
+
+def gauge_readings(n, seed):
+    # 1 um steps around a nominal, with flat stretches and a trend
+    rng = random.Random(seed)
+    x = 12.345
+    for i in range(n):
+        if i % 300 < 50:
+            pass
+        else:
+            x += rng.choice((-0.001, 0.0, 0.001)) + (0.0005 if i % 1000 > 900 else 0.0)
+        yield round(x, 3)
+
+
+def test_count_window_matches_brute_force():
+    for size in (1, 2, 7, 100):
+        window = parse_window(str(size))
+        history = []
+        for i, x in enumerate(gauge_readings(3000, size)):
+            window.update(i * 10**6, x)
+            history.append(x)
+            assert_window(window, history[-size:])
+
+
+def test_time_window_matches_brute_force():
+    rng = random.Random(5)
+    window = parse_window('2s')
+    history = []
+    t = 0
+    for x in gauge_readings(3000, 5):
+        # uneven gaps, some longer than the window itself
+        t += rng.choice((1, 5, 20, 100, 3000)) * 10**6
+        window.update(t, x)
+        history.append((t, x))
+        assert_window(window, [v for ts, v in history if ts >= t - 2 * 10**9])
+
+
+def test_window_stays_exact_over_a_long_run():
+    window = parse_window('500')
+    history = deque(maxlen=500)
+    for i, x in enumerate(gauge_readings(200_000, 9)):
+        window.update(i, x)
+        history.append(x)
+    assert_window(window, list(history))
+    # a flat stretch comes out as exactly zero spread, not rounding noise
+    for i in range(500):
+        window.update(200_000 + i, 10.0)
+    assert window.as_dict()['std'] == 0.0
+
+
+def test_window_clear():
+    window = parse_window('5')
+    for i in range(10):
+        window.update(i, float(i))
+    window.clear()
+    assert window.as_dict()['count'] == 0 and window.as_dict()['min'] is None
+    window.update(10, 3.0)
+    assert_window(window, [3.0])
@@ -0,0 +1,17 @@
+from gauge_store import MeasurementStore
+
+
+def test_commits_go_through_run_blocking(tmp_path):
+    calls = []
+
+    def run_blocking(fn, *args):
+        calls.append(fn.__name__)
+        return fn(*args)
+
+    store = MeasurementStore(str(tmp_path / 'gauge.db'), run_blocking=run_blocking)
+    gauge_id = store.gauge_id('COM1')
+    store.add_sample(gauge_id, 1, 1.0, 0)
+    store.add_capture(gauge_id, 1, 1.0, 0, 0)
+    store.close()
+    assert calls and set(calls) == {'_commit'}
+    assert store.written == 2
@@ -0,0 +1,85 @@
+import pytest
+
+from gauge_wire import (F_KEYFRAME, F_STATS, F_WINDOWS, STAT_FIELDS, WIRE_VERSION, StatsEncoder,
+                        pack_message, unpack_message)
+
+STATS = {
+    'count': 3, 'min': 0.998, 'max': 1.004, 'avg': 1.001, 'range': 0.006,
+    'std': 0.003, 'cp': None, 'cpk': 1.25, 'button_count': 1,
+    'pass_count': 2, 'ng_plus': 1, 'ng_minus': 0,
+    'windows': [{'window': '500', 'count': 3, 'min': 0.998, 'max': 1.004, 'avg': 1.001,
+                 'range': 0.006, 'std': None, 'cp': None, 'cpk': None}],
+}
+
+
+def roundtrip(encoder, stats):
+    return unpack_message(pack_message('COM3', stats=encoder.encode(stats)))
+
+
+def test_keyframe_then_deltas():
+    encoder = StatsEncoder()
+    msg = roundtrip(encoder, STATS)
+    assert msg['gauge'] == 'COM3' and msg['keyframe']
+    assert msg['stats'] == {name: STATS[name] for name, _ in STAT_FIELDS}
+    assert msg['windows'] == STATS['windows']
+
+    # only what changed, and the windows only when they do
+    changed = dict(STATS, count=4, max=1.006)
+    msg = roundtrip(encoder, changed)
+    assert not msg['keyframe']
+    assert msg['stats'] == {'count': 4, 'max': 1.006}
+    assert 'windows' not in msg
+
+    # nothing new: no stats section at all
+    flags, body = encoder.encode(changed)
+    assert (flags, body) == (0, b'')
+    assert set(unpack_message(pack_message('COM3', stats=(flags, body)))) == {'gauge', 'keyframe'}
+
+    # a new subscriber asks for a keyframe again
+    encoder.keyframe = True
+    flags, _ = encoder.encode(changed)
+    assert flags == F_STATS | F_KEYFRAME | F_WINDOWS
+
+
+def test_none_travels_as_nan():
+    encoder = StatsEncoder()
+    roundtrip(encoder, STATS)
+    msg = roundtrip(encoder, dict(STATS, std=None, cpk=None))
+    assert msg['stats'] == {'std': None, 'cpk': None}
+    msg = roundtrip(encoder, dict(STATS, std=0.004))
+    assert msg['stats'] == {'std': 0.004, 'cpk': 1.25}
+
+
+def test_windows_change_and_empty():
+    encoder = StatsEncoder()
+    roundtrip(encoder, STATS)
+    windows = STATS['windows'] + [{'window': '30s', 'count': 0, 'min': None, 'max': None, 'avg': None,
+                                   'range': None, 'std': None, 'cp': None, 'cpk': None}]
+    msg = roundtrip(encoder, dict(STATS, windows=windows))
+    assert msg['windows'] == windows and 'stats' not in msg
+    # dropping every window sends an empty list, not nothing
+    assert roundtrip(encoder, dict(STATS, windows=[]))['windows'] == []
+
+
+def test_samples_and_captures_share_the_earliest_base():
+    t0 = 1_700_000_000_000_000_000
+    samples = [(t0 + 5_000_000, 1.234, 1, 0), (t0 + 6_000_000, -0.5, 3, 1)]
+    # a capture older than the first sample sets the base
+    captures = [(t0, 1.2, 1, 0), (t0 + 5_000_000, 1.234, 2, 1)]
+    msg = unpack_message(pack_message('COM3', samples=samples, captures=captures))
+    assert msg['samples'] == samples
+    assert msg['captures'] == captures
+    assert 'stats' not in msg and not msg['keyframe']
+
+
+def test_values_are_whole_microns_and_times_whole_microseconds():
+    t0 = 1_000_000_000
+    msg = unpack_message(pack_message('COM3', samples=[(t0, 1.0, 0, 0), (t0 + 1_999, 0.0014, 0, 0)]))
+    assert msg['samples'] == [(t0, 1.0, 0, 0), (t0 + 1_000, 0.001, 0, 0)]
+
+
+def test_unknown_version():
+    buf = bytearray(pack_message('COM3', samples=[(0, 1.0, 0, 0)]))
+    buf[0] = WIRE_VERSION + 1
+    with pytest.raises(ValueError):
+        unpack_message(bytes(buf))